@@ -0,0 +1,91 @@
+"""Benchmark building and serializing large listing results.
+
+Compares plain per-entry dicts (`dicts`) with a `RecordTable` in the default records layout and in the columns
+layout. Each variant is timed for building the result, for the conversion FastMCP applies to tool results
+(structured content plus JSON text) and for encoding the result with the JSON encoder used for cached results.
+
+Usage:
+    python benchmarks/bench_listings.py [--entries 20000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from fastmcp import FastMCP
+
+from copick_mcp.records import RecordTable, dumps, orjson
+
+FIELDS = ("object_name", "user_id", "session_id", "num_points")
+
+
+def build_dicts(n: int) -> Dict[str, Any]:
+    picks = []
+    for i in range(n):
+        picks.append({"object_name": "ribosome", "user_id": "picker", "session_id": str(i), "num_points": i % 1000})
+    return {"success": True, "picks": picks, "count": len(picks)}
+
+
+def build_table(n: int, layout: str) -> Dict[str, Any]:
+    table = RecordTable(FIELDS, layout=layout)
+    for i in range(n):
+        table.append("ribosome", "picker", str(i), i % 1000)
+    return {"success": True, "picks": table.render(layout), "count": len(table)}
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def peak_memory(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024**2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mcp = FastMCP("bench")
+
+    @mcp.tool()
+    def listing() -> Dict[str, Any]:
+        return {}
+
+    tool = asyncio.run(mcp.get_tool("listing"))
+    variants = {
+        "dicts": lambda: build_dicts(args.entries),
+        "table/records": lambda: build_table(args.entries, "records"),
+        "table/columns": lambda: build_table(args.entries, "columns"),
+    }
+
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"{args.entries} entries, best of {args.repeat}, cache encoder: {encoder}")
+    print(f"{'variant':<16}{'build ms':>10}{'peak MiB':>10}{'fastmcp ms':>12}{'json ms':>10}{encoder + ' ms':>12}")
+    for name, build in variants.items():
+        result = build()
+        print(
+            f"{name:<16}"
+            f"{timed(build, args.repeat):>10.1f}"
+            f"{peak_memory(build):>10.1f}"
+            f"{timed(lambda result=result: tool.convert_result(result), args.repeat):>12.1f}"
+            f"{timed(lambda result=result: json.dumps(result), args.repeat):>10.1f}"
+            f"{timed(lambda result=result: dumps(result), args.repeat):>12.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
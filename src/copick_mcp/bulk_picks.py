@@ -0,0 +1,323 @@
+"""Bulk writing of picks for many runs from compact coordinate arrays.
+
+Points are given as columns (one array per field, with the run of every point) inline, or in an NPY or Parquet file:
+
+    run_name     Name of the run of each point (optional if all points belong to one run).
+    x, y, z      Coordinates, in angstrom.
+    score        Score of each point (optional, default 1.0).
+    instance_id  Instance ID of each point (optional, default 0).
+    transform    4x4 transformation matrix of each point, nested or flattened to 16 values (optional, default
+                 identity).
+
+NPY files hold a structured array with these fields, or an [N, 3] array of coordinates of a single run. Reading
+Parquet files requires pyarrow.
+
+Each run's pick file is encoded directly from the arrays, without creating one copick point model per point, and
+written atomically: local files are written to a temporary file that replaces the pick file, remote pick files are
+uploaded with a single request. Readers never see a partially written pick file.
+"""
+
+import concurrent.futures
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from copick_mcp.paths import FILE_MODE, atomic_write_bytes
+from copick_mcp.records import dumps, loads
+
+_IDENTITY = np.eye(4).tolist()
+
+
+def check_name(value: str, kind: str) -> str:
+    """Raise a ValueError if a name breaks the copick naming rules (e.g. contains underscores or whitespace)."""
+    from copick.util.escape import sanitize_name
+
+    try:
+        sanitized = sanitize_name(value, suppress_warnings=True)
+    except ValueError as e:
+        raise ValueError(f"Invalid {kind} '{value}': {e}") from e
+    if sanitized != value:
+        raise ValueError(
+            f"Invalid {kind} '{value}': underscores, whitespace and <>:\"/\\|?* are not allowed (e.g. '{sanitized}')",
+        )
+    return value
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+
+def _columns_from_npy(path: str) -> Dict[str, Any]:
+    array = np.load(path, allow_pickle=False)
+    if array.dtype.names is not None:
+        return {name: array[name] for name in array.dtype.names}
+    if array.ndim == 2 and array.shape[1] == 3:
+        return {"x": array[:, 0], "y": array[:, 1], "z": array[:, 2]}
+    raise ValueError(f"{path}: expected a structured array or an [N, 3] array of coordinates, got shape {array.shape}")
+
+
+def _columns_from_parquet(path: str) -> Dict[str, Any]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)") from e
+
+    table = pq.read_table(path)
+    columns: Dict[str, Any] = {}
+    for name in table.column_names:
+        column = table.column(name)
+        columns[name] = column.to_pylist() if name in ("run_name", "transform") else column.to_numpy()
+    return columns
+
+
+def load_points(
+    points: Optional[Dict[str, Any]] = None,
+    path: Optional[str] = None,
+    run_name: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Read and validate the columns of a bulk pick upload.
+
+    Args:
+        points: Columns given inline (optional).
+        path: Path to an NPY or Parquet file with the columns (optional).
+        run_name: Run of all points, if the columns have no run_name (optional).
+        voxel_size: If given, coordinates are voxel indices and are scaled by this voxel size to angstrom (optional).
+
+    Returns:
+        Columns as arrays: run_name, positions ([N, 3]), and transforms ([N, 4, 4]), instance_ids and scores if given.
+    """
+    if (points is None) == (path is None):
+        raise ValueError("Provide either points or path")
+
+    if path is not None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npy":
+            columns = _columns_from_npy(path)
+        elif extension in (".parquet", ".pq"):
+            columns = _columns_from_parquet(path)
+        else:
+            raise ValueError(f"Unsupported file type '{extension}', expected .npy or .parquet")
+    else:
+        columns = dict(points)
+
+    missing = [name for name in ("x", "y", "z") if name not in columns]
+    if missing:
+        raise ValueError(f"Missing coordinate columns: {', '.join(missing)}")
+    positions = np.stack([np.asarray(columns[name], dtype=np.float64) for name in ("x", "y", "z")], axis=1)
+    n = len(positions)
+    if not np.all(np.isfinite(positions)):
+        raise ValueError("Coordinates must be finite")
+    if voxel_size is not None:
+        positions *= voxel_size
+
+    if "run_name" in columns:
+        run_names = np.asarray(columns["run_name"], dtype=object)
+        if run_name is not None and np.any(run_names != run_name):
+            raise ValueError("run_name is given both as argument and as column, with different values")
+    elif run_name is not None:
+        run_names = np.full(n, run_name, dtype=object)
+    else:
+        raise ValueError("Provide a run_name column or the run_name argument")
+    if run_names.shape != (n,):
+        raise ValueError(f"run_name must have {n} values, got {len(run_names)}")
+
+    result: Dict[str, Any] = {"run_name": run_names, "positions": positions}
+
+    if columns.get("transform") is not None:
+        transforms = np.asarray(list(columns["transform"]), dtype=np.float64).reshape(n, 4, 4)
+        if not np.allclose(transforms[:, 3, :], [0.0, 0.0, 0.0, 1.0]):
+            raise ValueError("The last row of every transformation matrix must be [0, 0, 0, 1]")
+        result["transforms"] = transforms
+
+    if columns.get("instance_id") is not None:
+        instance_ids = np.asarray(columns["instance_id"], dtype=np.float64)
+        if instance_ids.shape != (n,) or not np.all(np.mod(instance_ids, 1) == 0) or np.any(instance_ids < 0):
+            raise ValueError(f"instance_id must be {n} integers >= 0")
+        result["instance_ids"] = instance_ids.astype(np.int64)
+
+    if columns.get("score") is not None:
+        scores = np.asarray(columns["score"], dtype=np.float64)
+        if scores.shape != (n,) or not np.all(np.isfinite(scores)):
+            raise ValueError(f"score must be {n} finite values")
+        result["scores"] = scores
+
+    return result
+
+
+def group_by_run(columns: Dict[str, Any]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Split the columns of a bulk pick upload by run, keeping the order of the points within each run."""
+    run_names, inverse = np.unique(columns["run_name"].astype(str), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(run_names) + 1))
+
+    groups = {}
+    for index, name in enumerate(run_names):
+        rows = order[bounds[index] : bounds[index + 1]]
+        groups[str(name)] = {key: value[rows] for key, value in columns.items() if key != "run_name"}
+    return groups
+
+
+# ============================================================================
+# Writing
+# ============================================================================
+
+
+def _new_picks(run: Any, object_name: str, user_id: str, session_id: str) -> Any:
+    """Create an overlay pick object of a run, without storing it or adding it to the run."""
+    from copick.models import CopickPicksFile
+
+    meta = CopickPicksFile(pickable_object_name=object_name, user_id=user_id, session_id=session_id, run_name=run.name)
+    return run._picks_factory()(run=run, file=meta)
+
+
+def _overlay_picks(run: Any, object_name: str, user_id: str, session_id: str) -> Any:
+    """Get the (writable) overlay pick set of a run, creating the pick object without storing it if needed."""
+    for picks in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id):
+        if not getattr(picks, "read_only", False):
+            return picks
+
+    picks = _new_picks(run, object_name, user_id, session_id)
+    if run._picks is None:
+        run._picks = []
+    run._picks.append(picks)
+    return picks
+
+
+def existing_pick_runs(runs: Iterable[Any], object_name: str, user_id: str, session_id: str) -> List[str]:
+    """Names of the runs whose overlay pick file for an object, user and session already exists.
+
+    The pick files are checked on the filesystem (concurrently, for remote overlays), not in the runs' cached pick
+    listings, which may predate files written by other processes.
+    """
+
+    def exists(run: Any) -> bool:
+        picks = _new_picks(run, object_name, user_id, session_id)
+        return picks.fs.exists(picks.path)
+
+    runs = list(runs)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(runs) or 1)) as executor:
+        found = list(executor.map(exists, runs))
+    return sorted(run.name for run, run_exists in zip(runs, found) if run_exists)
+
+
+def encode_picks(
+    run_name: str,
+    object_name: str,
+    user_id: str,
+    session_id: str,
+    positions: np.ndarray,
+    transforms: Optional[np.ndarray] = None,
+    instance_ids: Optional[np.ndarray] = None,
+    scores: Optional[np.ndarray] = None,
+) -> bytes:
+    """Encode a copick pick file (same fields as `CopickPicksFile`) from arrays."""
+    transformations = transforms.tolist() if transforms is not None else None
+    ids = instance_ids.tolist() if instance_ids is not None else None
+    values = scores.tolist() if scores is not None else None
+
+    points: List[Dict[str, Any]] = [
+        {
+            "location": {"x": x, "y": y, "z": z},
+            "transformation_": transformations[i] if transformations is not None else _IDENTITY,
+            "instance_id": ids[i] if ids is not None else 0,
+            "score": values[i] if values is not None else 1.0,
+        }
+        for i, (x, y, z) in enumerate(positions.tolist())
+    ]
+    return dumps(
+        {
+            "pickable_object_name": object_name,
+            "user_id": user_id,
+            "session_id": session_id,
+            "run_name": run_name,
+            "voxel_spacing": None,
+            "unit": "angstrom",
+            "points": points,
+            "trust_orientation": True,
+        },
+    )
+
+
+def decode_picks(data: bytes) -> Dict[str, np.ndarray]:
+    """Decode the points of a copick pick file into arrays, without validating one copick point model per point.
+
+    Returns:
+        Arrays of the points: positions ([N, 3], angstrom), scores and instance_ids.
+    """
+    points = loads(data).get("points") or []
+    positions = np.array([[p["location"]["x"], p["location"]["y"], p["location"]["z"]] for p in points], dtype=float)
+    return {
+        "positions": positions.reshape(len(points), 3),
+        "scores": np.array([p.get("score", 1.0) for p in points], dtype=float),
+        "instance_ids": np.array([p.get("instance_id", 0) for p in points], dtype=np.int64),
+    }
+
+
+def read_run_picks(pick: Any) -> Dict[str, np.ndarray]:
+    """Read the points of a pick set into arrays (see `decode_picks`), reading its file once."""
+    if pick.fs.exists(pick.path):
+        return decode_picks(pick.fs.cat_file(pick.path))
+
+    # Pick sets not backed by a file, e.g. from the data portal
+    positions, _ = pick.numpy()
+    return {
+        "positions": positions,
+        "scores": np.array([p.score for p in pick.points], dtype=float),
+        "instance_ids": np.array([p.instance_id for p in pick.points], dtype=np.int64),
+    }
+
+
+def write_run_picks(
+    run: Any,
+    object_name: str,
+    user_id: str,
+    session_id: str,
+    positions: np.ndarray,
+    transforms: Optional[np.ndarray] = None,
+    instance_ids: Optional[np.ndarray] = None,
+    scores: Optional[np.ndarray] = None,
+    exist_ok: bool = False,
+) -> Dict[str, Any]:
+    """Write (or replace) the pick file of a run atomically.
+
+    Args:
+        run: The copick run.
+        object_name: Name of the pickable object.
+        user_id: User ID of the picks.
+        session_id: Session ID of the picks.
+        positions: [N, 3] coordinates in angstrom.
+        transforms: [N, 4, 4] transformation matrices (optional).
+        instance_ids: [N] instance IDs (optional).
+        scores: [N] scores (optional).
+        exist_ok: Replace an existing pick file instead of failing.
+
+    Returns:
+        Number of points written and whether an existing pick file was replaced.
+    """
+    picks = _overlay_picks(run, object_name, user_id, session_id)
+    fs, path = picks.fs, picks.path
+
+    existed = fs.exists(path)
+    if existed and not exist_ok:
+        raise ValueError(f"Picks for {object_name} by {user_id} already exist in session {session_id}")
+
+    data = encode_picks(run.name, object_name, user_id, session_id, positions, transforms, instance_ids, scores)
+    if "file" in fs.protocol or "local" in fs.protocol:
+        atomic_write_bytes(path, data, mode=FILE_MODE)
+    else:
+        # A single upload is atomic on object stores
+        fs.makedirs(picks.directory, exist_ok=True)
+        fs.pipe_file(path, data)
+
+    register_picks(run, object_name, user_id, session_id)
+    return {"num_points": len(positions), "replaced": existed}
+
+
+def register_picks(run: Any, object_name: str, user_id: str, session_id: str) -> None:
+    """Make a run's cached pick objects reflect a pick file written outside of copick."""
+    picks = _overlay_picks(run, object_name, user_id, session_id)
+    # Empty points are reloaded from the file on first access
+    picks.meta.points = []
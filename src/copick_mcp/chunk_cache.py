@@ -0,0 +1,315 @@
+"""Read-through local disk cache for files read from remote static stores.
+
+Static copick stores (e.g. the CryoET Data Portal, S3 buckets or SMB shares that the project only reads from) are
+treated as immutable, so files read from them (zarr metadata and chunks) are cached on local disk under a name
+derived from the store URL and the file path, and never revalidated: clear the cache after a static store changed.
+The cache is bounded in size and evicts the least recently used files. Files are written atomically and eviction is
+guarded by a lock file, so several server processes can share the cache directory.
+
+Environment variables:
+    COPICK_MCP_CHUNK_CACHE_GB: Maximum size of the cache in GB (default 5, 0 disables the cache).
+"""
+
+import contextlib
+import hashlib
+import os
+import threading
+from glob import has_magic
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fsspec import AbstractFileSystem
+from fsspec.mapping import FSMap
+
+from copick_mcp.paths import atomic_write_bytes, evict_lru, get_cache_dir
+
+# Protocols of filesystems that are not worth caching
+_LOCAL_PROTOCOLS = {"file", "local"}
+
+# Fraction of the maximum size written between two eviction passes, and size eviction shrinks the cache to
+_EVICTION_INTERVAL = 0.05
+_EVICTION_TARGET = 0.9
+
+
+class ChunkCache:
+    """Size-bounded, least recently used, on-disk cache of file contents.
+
+    Attributes:
+        directory: Directory holding the cached files.
+        max_bytes: Maximum total size of the cached files.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.bytes_downloaded = 0
+        self.evicted_files = 0
+        self._written_since_eviction = 0
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    @staticmethod
+    def key(namespace: str, path: str) -> str:
+        """Derive the cache key of a file from its store and path."""
+        return hashlib.sha256(f"{namespace}\0{path}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached file contents, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Mark as recently used. The file may have been evicted by another process in the meantime.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_from_cache += len(data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store file contents, evicting least recently used files if the cache grew too large."""
+        if len(data) > self.max_bytes * (1 - _EVICTION_TARGET):
+            return
+
+        try:
+            atomic_write_bytes(self._path(key), data)
+        except OSError:
+            return
+
+        with self._lock:
+            self.bytes_downloaded += len(data)
+            self._written_since_eviction += len(data)
+            evict = self._written_since_eviction > self.max_bytes * _EVICTION_INTERVAL
+            if evict:
+                self._written_since_eviction = 0
+        if evict:
+            self.evict()
+
+    def _scan(self) -> List[Tuple[str, os.stat_result]]:
+        entries = []
+        for sub in self.directory.iterdir():
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub):
+                if entry.is_file() and not entry.name.startswith("."):
+                    try:
+                        entries.append((entry.path, entry.stat()))
+                    except OSError:
+                        continue
+        return entries
+
+    def evict(self) -> None:
+        """Delete least recently used files until the cache is below its target size."""
+        evicted = evict_lru(self.directory, self.max_bytes, _EVICTION_TARGET)
+        with self._lock:
+            self.evicted_files += evicted
+
+    def clear(self) -> None:
+        """Delete all cached files."""
+        for path, _ in self._scan():
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process and the current size of the (shared) cache directory."""
+        entries = self._scan()
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "directory": str(self.directory),
+                "max_bytes": self.max_bytes,
+                "files": len(entries),
+                "bytes": sum(stat.st_size for _, stat in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else None,
+                "bytes_from_cache": self.bytes_from_cache,
+                "bytes_downloaded": self.bytes_downloaded,
+                "evicted_files": self.evicted_files,
+                # Cached files are never revalidated against the remote store
+                "assumes_immutable": True,
+            }
+
+
+_chunk_cache: Optional[ChunkCache] = None
+_chunk_cache_lock = threading.Lock()
+
+
+def get_chunk_cache() -> Optional[ChunkCache]:
+    """Get the chunk cache of this process, or None if it is disabled."""
+    global _chunk_cache
+    with _chunk_cache_lock:
+        if _chunk_cache is None:
+            max_gb = float(os.getenv("COPICK_MCP_CHUNK_CACHE_GB", "5"))
+            if max_gb <= 0:
+                return None
+            _chunk_cache = ChunkCache(get_cache_dir("chunks"), int(max_gb * 1024**3))
+        return _chunk_cache
+
+
+def _is_local(fs: Any) -> bool:
+    protocols = fs.protocol if isinstance(fs.protocol, (tuple, list)) else (fs.protocol,)
+    return any(protocol in _LOCAL_PROTOCOLS for protocol in protocols)
+
+
+def _delegate(name: str):
+    """Create a method that delegates to the wrapped filesystem."""
+
+    def method(self, *args: Any, **kwargs: Any) -> Any:
+        return getattr(self.fs, name)(*args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f"CachedFileSystem.{name}"
+    return method
+
+
+class CachedFileSystem(AbstractFileSystem):
+    """Read-only view of a remote static filesystem reading whole files through a chunk cache.
+
+    Each copick root gets its own instance, so reads through the wrapped filesystem by anything else are not
+    cached. Whole-file reads (`cat`/`cat_file`, used by zarr for metadata and chunks) are served from the cache,
+    all other operations are delegated. Cached files are not revalidated: static stores are assumed immutable.
+
+    Attributes:
+        fs: The wrapped filesystem.
+        cache: The chunk cache.
+        namespace: Namespace of the cache keys, identifying the store.
+    """
+
+    def __init__(self, fs: AbstractFileSystem, cache: ChunkCache, namespace: str, **kwargs: Any):
+        super().__init__(skip_instance_cache=True, **kwargs)
+        self.fs = fs
+        self.cache = cache
+        self.namespace = namespace
+
+    @property
+    def protocol(self) -> Any:
+        return self.fs.protocol
+
+    # Primitives the generic AbstractFileSystem methods are built on, and methods the wrapped filesystem may
+    # implement more efficiently than the generic ones
+    ls = _delegate("ls")
+    info = _delegate("info")
+    glob = _delegate("glob")
+    find = _delegate("find")
+    du = _delegate("du")
+    exists = _delegate("exists")
+    isdir = _delegate("isdir")
+    isfile = _delegate("isfile")
+    open = _delegate("open")
+    ukey = _delegate("ukey")
+    modified = _delegate("modified")
+    created = _delegate("created")
+    cat_ranges = _delegate("cat_ranges")
+    pipe = _delegate("pipe")
+    pipe_file = _delegate("pipe_file")
+    mkdir = _delegate("mkdir")
+    makedirs = _delegate("makedirs")
+    rm = _delegate("rm")
+    rm_file = _delegate("rm_file")
+    rmdir = _delegate("rmdir")
+    touch = _delegate("touch")
+    invalidate_cache = _delegate("invalidate_cache")
+
+    def _strip_protocol(self, path: str) -> str:
+        return self.fs._strip_protocol(path)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "fs":
+            raise AttributeError(name)
+        return getattr(self.fs, name)
+
+    def cat_file(self, path: str, start: Optional[int] = None, end: Optional[int] = None, **kwargs: Any) -> bytes:
+        if start is not None or end is not None or kwargs:
+            return self.fs.cat_file(path, start=start, end=end, **kwargs)
+
+        key = self.cache.key(self.namespace, self.fs._strip_protocol(path))
+        data = self.cache.get(key)
+        if data is None:
+            data = self.fs.cat_file(path)
+            self.cache.put(key, data)
+        return data
+
+    def cat(
+        self,
+        path: Union[str, List[str]],
+        recursive: bool = False,
+        on_error: str = "raise",
+        **kwargs: Any,
+    ) -> Union[bytes, Dict[str, Any]]:
+        paths = [path] if isinstance(path, str) else list(path)
+        if recursive or kwargs or any(has_magic(p) for p in paths):
+            return self.fs.cat(path, recursive=recursive, on_error=on_error, **kwargs)
+        if isinstance(path, str):
+            return self.cat_file(path)
+
+        out: Dict[str, Any] = {}
+        missing = []
+        for p in paths:
+            data = self.cache.get(self.cache.key(self.namespace, self.fs._strip_protocol(p)))
+            if data is None:
+                missing.append(p)
+            else:
+                out[p] = data
+
+        if missing:
+            # Fetch all misses in one (possibly concurrent) request
+            fetched = self.fs.cat(missing, on_error=on_error)
+            if isinstance(fetched, bytes):
+                fetched = {missing[0]: fetched}
+            by_stripped = {self.fs._strip_protocol(k): v for k, v in fetched.items()}
+            for p in missing:
+                stripped = self.fs._strip_protocol(p)
+                if stripped not in by_stripped:
+                    continue
+                value = by_stripped[stripped]
+                if isinstance(value, bytes):
+                    self.cache.put(self.cache.key(self.namespace, stripped), value)
+                out[p] = value
+
+        return out
+
+    def get_mapper(self, root: str = "", check: bool = False, create: bool = False, missing_exceptions: Any = None):
+        # Mappers must read through this filesystem (not the wrapped one) for reads to hit the cache.
+        return FSMap(root, self, check=check, create=create, missing_exceptions=missing_exceptions)
+
+
+def install_chunk_cache(root: Any) -> bool:
+    """Read the static store of a copick root through the local chunk cache.
+
+    Replaces the static filesystem of the root (and only of this root) with a `CachedFileSystem` wrapping it.
+    Only remote static stores are cached. The overlay store is writable and never cached.
+
+    Args:
+        root: The copick root.
+
+    Returns:
+        Whether reads from the static store are cached.
+    """
+    cache = get_chunk_cache()
+    fs = getattr(root, "fs_static", None)
+    if isinstance(fs, CachedFileSystem):
+        return True
+    if cache is None or fs is None or fs is getattr(root, "fs_overlay", None) or _is_local(fs):
+        return False
+
+    namespace = str(getattr(fs, "_url", None) or getattr(root.config, "static_root", "")) or repr(fs.protocol)
+    root.fs_static = CachedFileSystem(fs, cache, namespace)
+    return True
@@ -0,0 +1,157 @@
+"""Replay subcommand for traces of Copick MCP tool calls.
+
+This command is registered under the 'copick setup' group defined in the core copick CLI, and can also be run with
+`python -m copick_mcp.cli.replay`.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import click
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    click.echo(
+        f"Replayed {report['calls']} calls in {report['wall_time_s']:.2f} s "
+        f"(concurrency {report['concurrency']}, speed-up {report['speedup'] or 'none'}), {report['errors']} errors",
+    )
+    if report["skipped_writes"]:
+        click.echo(f"Skipped {report['skipped_writes']} calls writing data (replay them with --include-writes)")
+    if report["skipped_truncated"]:
+        click.echo(f"Skipped {report['skipped_truncated']} calls whose arguments were too large to be recorded")
+
+    header = f"{'tool':<32}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    click.echo(f"{header}{'rec p50':>10}{'rec p90':>10}")
+
+    def row(name: str, stats: Dict[str, Any], errors: int) -> str:
+        replay, recorded = stats["replay"], stats["recorded"]
+        line = f"{name:<32}{replay['count']:>7}{errors:>8}"
+        line += "".join(f"{replay[key]:>10.1f}" for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms"))
+        line += "".join(
+            f"{recorded[key]:>10.1f}" if recorded["count"] else f"{'-':>10}" for key in ("p50_ms", "p90_ms")
+        )
+        return line
+
+    for tool, stats in report["tools"].items():
+        click.echo(row(tool, stats, stats["errors"]))
+    if report["calls"]:
+        click.echo(row("(all)", report["overall"], report["errors"]))
+
+    for failed in report["failed_calls"][:10]:
+        click.echo(f"❌ #{failed['index']} {failed['tool']}: {failed['error']}")
+
+
+@click.command("mcp-replay")
+@click.argument("trace", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--config-path",
+    help="Copick configuration file replacing the one recorded in the calls",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Maximum number of calls in flight",
+)
+@click.option(
+    "--speedup",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="Replay the recorded pacing this many times faster (0 sends calls as fast as possible)",
+)
+@click.option(
+    "--tool",
+    "tools",
+    multiple=True,
+    help="Only replay calls of this tool (repeatable)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Skip calls of this tool (repeatable)",
+)
+@click.option(
+    "--include-writes",
+    is_flag=True,
+    help="Also replay calls writing data or changing the server state (e.g. add_picks_bulk, submit_job)",
+)
+@click.option(
+    "--stdio",
+    is_flag=True,
+    help="Replay against a server subprocess over stdio instead of an in-process server",
+)
+@click.option(
+    "--python-path",
+    help="Python executable running the server subprocess (with --stdio, defaults to current Python)",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the full report as JSON",
+)
+def mcp_replay(
+    trace: Path,
+    config_path: Optional[str],
+    concurrency: int,
+    speedup: float,
+    tools: Tuple[str, ...],
+    exclude: Tuple[str, ...],
+    include_writes: bool,
+    stdio: bool,
+    python_path: Optional[str],
+    output: Optional[Path],
+):
+    """Replay a trace of tool calls and report latency distributions.
+
+    TRACE is a JSONL trace recorded by a server started with COPICK_MCP_TRACE. Calls are sent in the recorded order,
+    with the recorded pacing compressed by --speedup, and their latencies are reported per tool next to the
+    latencies of the recording. Calls of tools writing data or changing the state of the server are skipped unless
+    --include-writes is given.
+    """
+    import anyio
+    from fastmcp import Client
+
+    from copick_mcp.tracing import load_trace, replay_trace
+
+    try:
+        calls = load_trace(trace)
+    except (OSError, ValueError) as e:
+        raise click.BadParameter(str(e), param_hint="TRACE") from e
+
+    calls = [c for c in calls if (not tools or c["tool"] in tools) and c["tool"] not in exclude]
+    if not calls:
+        click.echo("No calls to replay.")
+        return
+
+    if stdio:
+        from fastmcp.client.transports import StdioTransport
+
+        target: Any = StdioTransport(python_path or sys.executable, ["-m", "copick_mcp.main"])
+    else:
+        from copick_mcp.main import mcp as target
+
+    async def run() -> Dict[str, Any]:
+        async with Client(target) as client:
+            return await replay_trace(
+                client,
+                calls,
+                config_path=config_path,
+                concurrency=concurrency,
+                speedup=speedup,
+                include_writes=include_writes,
+            )
+
+    report = anyio.run(run)
+    _print_report(report)
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
+        click.echo(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    mcp_replay()
@@ -6,12 +6,20 @@ These commands are registered under the 'copick setup' group defined in the core
 import json
 import os
 import platform
+import stat
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
 
+from copick_mcp.paths import atomic_write_bytes
+
+TARGETS = ["desktop", "code-global", "code-project"]
+
+# Seconds to wait for another process updating the same configuration file
+LOCK_TIMEOUT = 60
+
 
 def get_claude_code_global_config_path() -> Path:
     """Get the Claude Code global configuration file path."""
@@ -75,6 +83,98 @@ def get_claude_desktop_config_path() -> Path:
 get_claude_config_path = get_claude_desktop_config_path
 
 
+class ConfigFileError(Exception):
+    """An MCP client configuration file could not be read, locked or written."""
+
+
+def build_server_config(python_path: Optional[str] = None, config_path: Optional[str] = None) -> Dict[str, Any]:
+    """Build the MCP server entry for the Copick MCP server."""
+    env_vars = {}
+    if config_path:
+        env_vars["COPICK_MCP_DEFAULT_CONFIG"] = config_path
+    return {"command": python_path or sys.executable, "args": ["-m", "copick_mcp.main"], "env": env_vars}
+
+
+def _read_config(path: Path, force: bool) -> Tuple[Dict[str, Any], Optional[int]]:
+    """Read a client configuration file, returning its contents and permission bits (empty and None if missing)."""
+    if not path.exists():
+        return {}, None
+
+    mode = stat.S_IMODE(path.stat().st_mode)
+    try:
+        with open(path, "r") as f:
+            return json.load(f), mode
+    except (json.JSONDecodeError, OSError) as e:
+        if not force:
+            raise ConfigFileError(f"Error reading existing config: {e}") from e
+        return {}, mode
+
+
+def _apply_changes(
+    config: Dict[str, Any],
+    changes: Dict[str, Optional[Dict[str, Any]]],
+    force: bool,
+) -> Dict[str, str]:
+    """Apply server changes to a client configuration in place and return the outcome per server name."""
+    servers = config.setdefault("mcpServers", {})
+    outcomes = {}
+    for server_name, server_config in changes.items():
+        if server_config is None:
+            outcomes[server_name] = "removed" if servers.pop(server_name, None) is not None else "missing"
+        elif servers.get(server_name) == server_config:
+            outcomes[server_name] = "unchanged"
+        elif server_name in servers and not force:
+            outcomes[server_name] = "exists"
+        else:
+            outcomes[server_name] = "updated" if server_name in servers else "added"
+            servers[server_name] = server_config
+    return outcomes
+
+
+def update_mcp_servers(
+    config_file_path: Path,
+    changes: Dict[str, Optional[Dict[str, Any]]],
+    force: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, str]:
+    """Add, replace or remove MCP server entries of a client configuration file.
+
+    The file is locked (advisory lock file next to it) while it is read, modified and written, and is written to a
+    temporary file that replaces it atomically, so concurrent invocations never clobber or truncate each other's
+    changes. The file is only rewritten if an entry changed.
+
+    Args:
+        config_file_path: Path to the client configuration file.
+        changes: Server entries by server name, None removes the server.
+        force: Replace existing servers with a different configuration, and start from an empty configuration if
+            the existing file cannot be parsed.
+        dry_run: Only compute the outcomes, without locking or writing the file.
+
+    Returns:
+        Outcome per server name: "added", "updated", "unchanged", "exists" (differs, not replaced without force),
+        "removed" or "missing" (not configured, nothing to remove).
+    """
+    from filelock import FileLock, Timeout
+
+    # Replace the target of a symlinked configuration, not the link
+    path = Path(config_file_path).expanduser().resolve()
+    if dry_run:
+        return _apply_changes(_read_config(path, force)[0], changes, force)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with FileLock(f"{path}.lock", timeout=LOCK_TIMEOUT):
+            config, mode = _read_config(path, force)
+            outcomes = _apply_changes(config, changes, force)
+            if any(outcome in ("added", "updated", "removed") for outcome in outcomes.values()):
+                atomic_write_bytes(path, json.dumps(config, indent=2).encode(), mode=mode)
+            return outcomes
+    except Timeout as e:
+        raise ConfigFileError(f"Timed out waiting for the lock on {path} (held by another process)") from e
+    except OSError as e:
+        raise ConfigFileError(f"Error writing configuration file: {e}") from e
+
+
 @click.command("mcp")
 @click.option(
     "--target",
@@ -116,77 +216,55 @@ def mcp(
     """Setup Copick MCP server configuration for Claude Desktop or Claude Code."""
     config_file_path = get_config_path_for_target(target, project_path)
 
-    # Ensure directory exists
-    config_file_path.parent.mkdir(parents=True, exist_ok=True)
-
     # Get Python path
     if not python_path:
         python_path = sys.executable
 
-    # Load existing configuration or create new one
-    config = {}
-    if config_file_path.exists():
-        try:
-            with open(config_file_path, "r") as f:
-                config = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            if not force:
-                click.echo(f"Error reading existing config: {e}")
-                click.echo("Use --force to overwrite or fix the configuration manually.")
-                sys.exit(1)
-            click.echo(f"Warning: Existing config has errors, creating new one: {e}")
+    server_config = build_server_config(python_path, config_path)
+    env_vars = server_config["env"]
 
-    # Initialize mcpServers section if it doesn't exist
-    if "mcpServers" not in config:
-        config["mcpServers"] = {}
+    try:
+        outcome = update_mcp_servers(config_file_path, {server_name: server_config}, force=force)[server_name]
+    except ConfigFileError as e:
+        click.echo(f"❌ {e}")
+        if not force:
+            click.echo("Use --force to overwrite or fix the configuration manually.")
+        sys.exit(1)
 
     # Check if server already exists
-    if server_name in config["mcpServers"] and not force:
+    if outcome == "exists":
         click.echo(f"Server '{server_name}' already exists in configuration.")
         click.echo("Use --force to overwrite or choose a different --server-name.")
         sys.exit(1)
 
-    # Build environment variables for server configuration
-    env_vars = {}
-    if config_path:
-        env_vars["COPICK_MCP_DEFAULT_CONFIG"] = config_path
-
-    # Add Copick MCP server configuration
-    config["mcpServers"][server_name] = {"command": python_path, "args": ["-m", "copick_mcp.main"], "env": env_vars}
-
-    # Write configuration
-    try:
-        with open(config_file_path, "w") as f:
-            json.dump(config, f, indent=2)
-
-        target_name = get_target_display_name(target)
-        click.echo(f"✅ Successfully configured {target_name} MCP server!")
-        click.echo(f"   Server name: {server_name}")
-        click.echo(f"   Config file: {config_file_path}")
-        click.echo(f"   Python path: {python_path}")
-        if env_vars:
-            click.echo("   Environment variables:")
-            for key, value in env_vars.items():
-                click.echo(f"     {key}: {value}")
-        else:
-            click.echo("   💡 No default config path set - provide config_path in each tool call")
-        click.echo()
-        click.echo("📋 Next steps:")
-        if target == "desktop":
-            click.echo("   1. Restart Claude Desktop completely")
-            click.echo("   2. The Copick MCP tools should now be available in Claude Desktop")
-            click.echo("   💡 Note: The server starts automatically when Claude Desktop connects")
-        elif target == "code-global":
-            click.echo("   1. Restart Claude Code or start a new session")
-            click.echo("   2. The Copick MCP tools should now be available in all Claude Code sessions")
-        else:  # code-project
-            click.echo(f"   1. Open Claude Code in the project directory: {project_path or Path.cwd()}")
-            click.echo("   2. The Copick MCP tools should now be available for this project")
-            click.echo("   💡 Note: This configuration only applies to this specific project")
+    if outcome == "unchanged":
+        click.echo(f"✅ Server '{server_name}' is already configured in {config_file_path}, nothing to do.")
+        return
 
-    except OSError as e:
-        click.echo(f"❌ Error writing configuration file: {e}")
-        sys.exit(1)
+    target_name = get_target_display_name(target)
+    click.echo(f"✅ Successfully configured {target_name} MCP server!")
+    click.echo(f"   Server name: {server_name}")
+    click.echo(f"   Config file: {config_file_path}")
+    click.echo(f"   Python path: {python_path}")
+    if env_vars:
+        click.echo("   Environment variables:")
+        for key, value in env_vars.items():
+            click.echo(f"     {key}: {value}")
+    else:
+        click.echo("   💡 No default config path set - provide config_path in each tool call")
+    click.echo()
+    click.echo("📋 Next steps:")
+    if target == "desktop":
+        click.echo("   1. Restart Claude Desktop completely")
+        click.echo("   2. The Copick MCP tools should now be available in Claude Desktop")
+        click.echo("   💡 Note: The server starts automatically when Claude Desktop connects")
+    elif target == "code-global":
+        click.echo("   1. Restart Claude Code or start a new session")
+        click.echo("   2. The Copick MCP tools should now be available in all Claude Code sessions")
+    else:  # code-project
+        click.echo(f"   1. Open Claude Code in the project directory: {project_path or Path.cwd()}")
+        click.echo("   2. The Copick MCP tools should now be available for this project")
+        click.echo("   💡 Note: This configuration only applies to this specific project")
 
 
 @click.command("mcp-status")
@@ -283,22 +361,117 @@ def mcp_remove(target: str, project_path: Optional[Path], server_name: str, forc
     if not force:
         click.confirm(f"Remove MCP server '{server_name}'?", abort=True)
 
-    # Remove server
-    del mcp_servers[server_name]
+    # Remove server (re-reads the configuration under the lock)
+    try:
+        outcome = update_mcp_servers(config_file_path, {server_name: None})[server_name]
+    except ConfigFileError as e:
+        click.echo(f"❌ {e}")
+        sys.exit(1)
+
+    if outcome == "missing":
+        click.echo(f"✅ Server '{server_name}' was already removed.")
+        return
+
+    click.echo(f"✅ Successfully removed MCP server '{server_name}'")
+    if target == "desktop":
+        click.echo("   Restart Claude Desktop to apply changes.")
+    elif target == "code-global":
+        click.echo("   Restart Claude Code or start a new session to apply changes.")
+    else:
+        click.echo("   Start a new Claude Code session in this project to apply changes.")
+
+
+def _load_bulk_spec(spec_path: Path) -> List[Dict[str, Any]]:
+    with open(spec_path, "r") as f:
+        spec = json.load(f)
+    entries = spec.get("servers") if isinstance(spec, dict) else spec
+    if not isinstance(entries, list):
+        raise click.BadParameter(
+            "Expected a list of server entries or an object with a 'servers' list",
+            param_hint="SPEC",
+        )
+    return entries
+
+
+@click.command("mcp-bulk")
+@click.argument("spec", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--python-path",
+    help="Default path to the Python executable of entries without 'python_path' (defaults to current Python)",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Replace existing servers with a different configuration",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only report what would change",
+)
+def mcp_bulk(spec: Path, python_path: Optional[str], force: bool, dry_run: bool):
+    """Register or remove many Copick MCP servers in one invocation.
+
+    SPEC is a JSON file with a list of entries (or an object with a "servers" list). Each entry has a "server_name"
+    and optionally a "target" (default: desktop), "project_path" (code-project target), "python_path",
+    "config_path" and "remove" (true removes the server).
 
-    # Write updated configuration
+    Each configuration file is locked, updated once for all of its entries, and written atomically only if an entry
+    changed, so provisioning is idempotent and safe to run concurrently.
+    """
     try:
-        with open(config_file_path, "w") as f:
-            json.dump(config, f, indent=2)
-
-        click.echo(f"✅ Successfully removed MCP server '{server_name}'")
-        if target == "desktop":
-            click.echo("   Restart Claude Desktop to apply changes.")
-        elif target == "code-global":
-            click.echo("   Restart Claude Code or start a new session to apply changes.")
+        entries = _load_bulk_spec(spec)
+    except (json.JSONDecodeError, OSError) as e:
+        raise click.BadParameter(f"Could not read spec: {e}", param_hint="SPEC") from e
+
+    # Group the changes by configuration file, so every file is updated once
+    changes: Dict[Path, Dict[str, Optional[Dict[str, Any]]]] = {}
+    labels: Dict[Path, str] = {}
+    for i, entry in enumerate(entries):
+        target = entry.get("target", "desktop")
+        server_name = entry.get("server_name")
+        if target not in TARGETS or not server_name:
+            raise click.BadParameter(
+                f"Entry {i}: needs a 'server_name' and a 'target' out of {', '.join(TARGETS)}",
+                param_hint="SPEC",
+            )
+
+        project_path = Path(entry["project_path"]) if entry.get("project_path") else None
+        config_file_path = get_config_path_for_target(target, project_path).expanduser().resolve()
+        file_changes = changes.setdefault(config_file_path, {})
+        if server_name in file_changes:
+            raise click.BadParameter(
+                f"Entry {i}: server '{server_name}' is listed twice for {config_file_path}",
+                param_hint="SPEC",
+            )
+
+        if entry.get("remove"):
+            file_changes[server_name] = None
         else:
-            click.echo("   Start a new Claude Code session in this project to apply changes.")
-
-    except OSError as e:
-        click.echo(f"❌ Error writing configuration: {e}")
+            file_changes[server_name] = build_server_config(
+                entry.get("python_path") or python_path,
+                entry.get("config_path"),
+            )
+        labels[config_file_path] = get_target_display_name(target)
+
+    failed = False
+    counts: Dict[str, int] = {}
+    for config_file_path, file_changes in changes.items():
+        try:
+            outcomes = update_mcp_servers(config_file_path, file_changes, force=force, dry_run=dry_run)
+        except ConfigFileError as e:
+            click.echo(f"❌ {labels[config_file_path]} ({config_file_path}): {e}")
+            failed = True
+            continue
+
+        for server_name, outcome in outcomes.items():
+            counts[outcome] = counts.get(outcome, 0) + 1
+            failed = failed or outcome == "exists"
+            symbol = "❌" if outcome == "exists" else "✅"
+            click.echo(f"{symbol} {labels[config_file_path]} ({config_file_path}): {server_name} {outcome}")
+
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+    click.echo(f"{'Would apply' if dry_run else 'Done'}: {summary or 'no entries'}")
+    if failed:
+        click.echo("Use --force to replace existing servers with a different configuration.")
         sys.exit(1)
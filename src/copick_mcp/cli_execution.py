@@ -0,0 +1,459 @@
+"""Execution of copick CLI commands as run-sharded local subprocesses.
+
+A command is split into shards of runs by rewriting its run-selection option, and every shard runs as a separate
+`copick` process, at most `max_workers` at a time, so CPU-bound `process` and `convert` commands use all cores of a
+node. The stdout and stderr of each shard are written to files below the cache directory. The state of every shard is
+kept in a manifest next to them, keyed on the command and its shards: executing the same command again skips the
+shards that already succeeded and only runs the failed, cancelled or unfinished ones. The output directories of
+the least recently run commands are deleted once they grow beyond their maximum size.
+
+Environment variables:
+    COPICK_MCP_COMMAND_CACHE_MB: Maximum size of the output directories of commands in MB (default 1024).
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import math
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from copick_mcp.paths import atomic_write_bytes, get_cache_dir, limit_cache_dir
+from copick_mcp.records import dumps, loads
+
+# Names of the run-selection parameters a command can be sharded by, preferred first. Repeatable options are given
+# once per run, the others (e.g. deprecated aliases such as --run-ids) get comma-joined run names.
+RUN_PARAMETERS = ("run_names", "run_ids", "legacy_run_names")
+
+# Shard statuses. Shards that did not succeed are run again when the command is resumed.
+SHARD_STATUSES = ("pending", "succeeded", "failed", "timed_out", "cancelled")
+
+# Number of shards per worker if the shard size is not given, so that slow runs do not leave workers idle
+_SHARDS_PER_WORKER = 4
+
+# Seconds between checks for finished shards and cancellation
+_POLL_INTERVAL = 0.2
+
+# Seconds a terminated shard gets to exit before it is killed
+_KILL_GRACE = 5.0
+
+# Command line running the copick CLI with the server's interpreter
+_COPICK = [sys.executable, "-m", "copick.cli.cli"]
+
+# Output directories of the commands running in this process, never evicted
+_running: Set[Path] = set()
+_running_lock = threading.Lock()
+
+
+@dataclass
+class CommandPlan:
+    """A copick command line prepared for sharding by run.
+
+    Attributes:
+        command: Path of the command (e.g. "convert.picks2seg").
+        args: Arguments of the command line, without "copick" and without its run selection.
+        run_flag: Flag of the run-selection option (e.g. "--run-names").
+        repeatable: Whether the run-selection option is given once per run (else the runs are comma-joined).
+        config_path: Value of the command's --config option, if any.
+        run_names: Runs selected on the command line, or None for all runs.
+    """
+
+    command: str
+    args: List[str]
+    run_flag: str
+    repeatable: bool
+    config_path: Optional[str]
+    run_names: Optional[List[str]]
+
+    def shard_args(self, run_names: List[str]) -> List[str]:
+        """Arguments of the command line restricted to some runs."""
+        if self.repeatable:
+            return self.args + [arg for name in run_names for arg in (self.run_flag, name)]
+        return self.args + [self.run_flag, ",".join(run_names)]
+
+
+def _strip_option(args: List[str], flags: List[str]) -> List[str]:
+    """Arguments without the occurrences of options taking a value (as "--flag value", "--flag=value" or "-fvalue")."""
+    long_flags = tuple(f"{flag}=" for flag in flags if flag.startswith("--"))
+    short_flags = tuple(flag for flag in flags if not flag.startswith("--"))
+
+    stripped = []
+    skip = False
+    for i, arg in enumerate(args):
+        if skip:
+            skip = False
+        elif arg == "--":
+            stripped.extend(args[i:])
+            break
+        elif arg in flags:
+            skip = True
+        elif not (arg.startswith(long_flags) or (short_flags and arg.startswith(short_flags))):
+            stripped.append(arg)
+    return stripped
+
+
+def plan_command(command_string: str) -> CommandPlan:
+    """Parse and validate a copick command line and find the option selecting its runs.
+
+    Args:
+        command_string: Full command line (e.g. "copick convert picks2seg --config config.json ...").
+
+    Returns:
+        The command prepared for sharding.
+
+    Raises:
+        ValueError: If the command line is invalid or the command cannot select runs.
+    """
+    import click
+
+    from copick_mcp.cli_introspection import parse_command_args, resolve_copick_command
+
+    args = shlex.split(command_string)
+    if not args or args[0] != "copick":
+        raise ValueError("Command must start with 'copick'")
+    args = args[1:]
+
+    try:
+        command, cmd, ctx, remaining = resolve_copick_command(args)
+        parse_command_args(cmd, ctx, remaining)
+    except click.ClickException as e:
+        raise ValueError(f"Invalid command: {e.format_message()}") from e
+
+    options = {param.name: param for param in cmd.params if isinstance(param, click.Option)}
+    run_params = [options[name] for name in RUN_PARAMETERS if name in options]
+    if not run_params:
+        raise ValueError(f"Command '{command}' has no run-selection option (--run-names) and cannot be sharded by run")
+
+    # Runs already selected on the command line, through any of the run-selection options
+    run_names = []
+    for param in run_params:
+        value = ctx.params.get(param.name)
+        values = value if isinstance(value, (list, tuple)) else [value] if value else []
+        run_names.extend(part.strip() for v in values for part in str(v).split(",") if part.strip())
+
+    selected = run_params[0]
+    flags = [flag for param in run_params for flag in param.opts + param.secondary_opts]
+    prefix = args[: len(args) - len(remaining)]
+    return CommandPlan(
+        command=command,
+        args=prefix + _strip_option(list(remaining), flags),
+        run_flag=max(selected.opts, key=len),
+        repeatable=selected.multiple,
+        config_path=ctx.params.get("config"),
+        run_names=run_names or None,
+    )
+
+
+def make_shards(run_names: List[str], runs_per_shard: int) -> List[List[str]]:
+    """Split runs into consecutive shards of at most `runs_per_shard` runs."""
+    return [run_names[i : i + runs_per_shard] for i in range(0, len(run_names), runs_per_shard)]
+
+
+def execution_id(plan: CommandPlan, shards: List[List[str]]) -> str:
+    """Identifier of the execution of a command with given shards."""
+    canonical = json.dumps({"args": plan.args, "run_flag": plan.run_flag, "shards": shards})
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _load_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(directory / "manifest.json", "rb") as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(directory: Path, manifest: Dict[str, Any]) -> None:
+    atomic_write_bytes(directory / "manifest.json", dumps(manifest))
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    """Terminate a shard and the processes it started, killing them if they do not exit in time."""
+    if os.name == "posix":
+        os.killpg(process.pid, signal.SIGTERM)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=_KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait()
+
+
+def _output_paths(directory: Path, index: int) -> Tuple[Path, Path]:
+    """Paths of the files capturing the stdout and stderr of a shard."""
+    return directory / f"shard-{index:04d}.out", directory / f"shard-{index:04d}.err"
+
+
+def _run_shard(
+    argv: List[str],
+    directory: Path,
+    index: int,
+    stop: threading.Event,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run one shard, writing its output to files, until it exits, times out or `stop` is set."""
+    start = time.monotonic()
+    status = None
+    returncode = None
+    stdout_path, stderr_path = _output_paths(directory, index)
+    with open(stdout_path, "wb") as out, open(stderr_path, "wb") as err:
+        try:
+            # A session of its own, so that terminating the shard also terminates the processes it started
+            process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=out, stderr=err, start_new_session=True)
+        except OSError as e:
+            err.write(f"Failed to start shard: {e}\n".encode())
+            status = "failed"
+        while status is None:
+            try:
+                returncode = process.wait(timeout=_POLL_INTERVAL)
+                status = "succeeded" if returncode == 0 else "failed"
+            except subprocess.TimeoutExpired:
+                if stop.is_set() or (timeout is not None and time.monotonic() - start > timeout):
+                    _terminate(process)
+                    returncode = process.returncode
+                    status = "cancelled" if stop.is_set() else "timed_out"
+
+    return {
+        "status": status,
+        "returncode": returncode,
+        "duration": time.monotonic() - start,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _record_shard(state: Dict[str, Any], future: concurrent.futures.Future) -> None:
+    """Update the state of a shard with the result of its finished future, a shard that raised is failed."""
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {
+            "status": "failed",
+            "returncode": None,
+            "duration": 0.0,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "error": str(e),
+        }
+    state.update(result)
+    state["attempts"] += 1
+
+
+def _tail(path: Path, lines: int) -> List[str]:
+    """Last lines of a file, reading at most its last 64 KiB."""
+    if lines <= 0 or not path.exists():
+        return []
+    with open(path, "rb") as f:
+        f.seek(max(0, path.stat().st_size - 65536))
+        text = f.read().decode(errors="replace")
+    return text.splitlines()[-lines:]
+
+
+def execute_command(
+    plan: CommandPlan,
+    run_names: List[str],
+    max_workers: Optional[int] = None,
+    runs_per_shard: Optional[int] = None,
+    resume: bool = True,
+    shard_timeout: Optional[float] = None,
+    tail_lines: int = 20,
+    dry_run: bool = False,
+    progress: Any = None,
+) -> Dict[str, Any]:
+    """Run a command over runs, split into shards running as parallel `copick` processes.
+
+    If the call is cancelled (through `progress`), running shards are terminated and the exception is re-raised after
+    the manifest is saved, so that the shards can be resumed later.
+
+    Args:
+        plan: The command (see `plan_command`).
+        run_names: Runs to run the command on.
+        max_workers: Maximum number of shards running at once (default: number of CPU cores).
+        runs_per_shard: Number of runs per shard (default: enough for about four shards per worker).
+        resume: Skip shards that succeeded in a previous execution of the same command and shards.
+        shard_timeout: Seconds after which a shard is terminated (optional).
+        tail_lines: Number of last lines of stdout and stderr returned per shard run.
+        dry_run: Only return the shards and their command lines.
+        progress: Progress reporter receiving the number of finished shards (optional).
+
+    Returns:
+        Dictionary with the execution ID and output directory, the shards with their status, return code, duration and
+        output, the number of shards per status, the runs of unsuccessful shards and aggregate timings.
+    """
+    from copick_mcp.parallel import default_max_workers
+
+    if not run_names:
+        raise ValueError("No runs to run the command on")
+    workers = max_workers or default_max_workers()
+    size = runs_per_shard or max(1, math.ceil(len(run_names) / (workers * _SHARDS_PER_WORKER)))
+    shards = make_shards(list(run_names), size)
+    exec_id = execution_id(plan, shards)
+
+    if dry_run:
+        return {
+            "execution_id": exec_id,
+            "command": plan.command,
+            "shards": [
+                {"index": i, "run_names": runs, "command_line": shlex.join(["copick"] + plan.shard_args(runs))}
+                for i, runs in enumerate(shards)
+            ],
+        }
+
+    directory = get_cache_dir("commands", exec_id)
+    with _running_lock:
+        _running.add(directory)
+        running = set(_running)
+    try:
+        limit_cache_dir(
+            "commands",
+            int(float(os.getenv("COPICK_MCP_COMMAND_CACHE_MB", "1024")) * 1024**2),
+            by_subdirectory=True,
+            keep=running,
+        )
+        return _execute_shards(plan, shards, exec_id, directory, workers, resume, shard_timeout, tail_lines, progress)
+    finally:
+        with _running_lock:
+            _running.discard(directory)
+
+
+def _execute_shards(
+    plan: CommandPlan,
+    shards: List[List[str]],
+    exec_id: str,
+    directory: Path,
+    workers: int,
+    resume: bool,
+    shard_timeout: Optional[float],
+    tail_lines: int,
+    progress: Any,
+) -> Dict[str, Any]:
+    """Run the shards of a command (see `execute_command`), keeping their state in the manifest of its directory."""
+    manifest = _load_manifest(directory) if resume else None
+    if manifest is None:
+        manifest = {
+            "execution_id": exec_id,
+            "command": plan.command,
+            "args": plan.args,
+            "shards": [
+                {"index": i, "run_names": runs, "status": "pending", "attempts": 0} for i, runs in enumerate(shards)
+            ],
+        }
+    states = manifest["shards"]
+    todo = [state for state in states if state["status"] != "succeeded"]
+    done = len(states) - len(todo)
+
+    stop = threading.Event()
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for state in todo:
+            argv = _COPICK + plan.shard_args(state["run_names"])
+            futures[executor.submit(_run_shard, argv, directory, state["index"], stop, shard_timeout)] = state
+        remaining = set(futures)
+        # Futures whose shard state is not updated yet, including finished ones when interrupted while recording them
+        unrecorded = set(futures)
+        try:
+            while remaining:
+                if progress is not None:
+                    progress.update(done, len(states), f"{done}/{len(states)} shards finished")
+                finished, remaining = concurrent.futures.wait(
+                    remaining,
+                    timeout=_POLL_INTERVAL,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in finished:
+                    unrecorded.discard(future)
+                    _record_shard(futures[future], future)
+                    done += 1
+                if finished:
+                    _save_manifest(directory, manifest)
+            if progress is not None:
+                progress.update(done, len(states), f"{done}/{len(states)} shards finished")
+        except BaseException:
+            # Terminate running shards and record them as cancelled; shards that did not start stay pending
+            stop.set()
+            try:
+                # Cancel all queued shards before waiting for any, so that none starts in a freed worker
+                started = [future for future in unrecorded if not future.cancel()]
+                for future in started:
+                    _record_shard(futures[future], future)
+            finally:
+                _save_manifest(directory, manifest)
+            raise
+    wall_time = time.monotonic() - start
+
+    ran = {state["index"] for state in todo}
+    durations = [state["duration"] for state in todo]
+    counts = dict.fromkeys(SHARD_STATUSES, 0)
+    for state in states:
+        counts[state["status"]] += 1
+
+    shard_results = []
+    for state in states:
+        entry = {key: state.get(key) for key in ("index", "run_names", "status", "returncode", "duration", "attempts")}
+        stdout_path, stderr_path = _output_paths(directory, state["index"])
+        entry["stdout_path"], entry["stderr_path"] = str(stdout_path), str(stderr_path)
+        if state["index"] in ran:
+            entry["stdout_tail"] = _tail(stdout_path, tail_lines)
+            entry["stderr_tail"] = _tail(stderr_path, tail_lines)
+        shard_results.append(entry)
+
+    return {
+        "execution_id": exec_id,
+        "command": plan.command,
+        "output_dir": str(directory),
+        "shards": shard_results,
+        "shard_counts": {status: count for status, count in counts.items() if count},
+        "skipped_shards": len(states) - len(ran),
+        "failed_runs": sorted(
+            name for state in states if state["status"] != "succeeded" for name in state["run_names"]
+        ),
+        "timings": {
+            "wall_seconds": wall_time,
+            "shard_seconds": sum(durations),
+            "mean_shard_seconds": sum(durations) / len(durations) if durations else 0.0,
+            "max_shard_seconds": max(durations, default=0.0),
+            # Summed shard time over wall time: how many shards ran in parallel on average
+            "parallelism": sum(durations) / wall_time if wall_time > 0 else 0.0,
+        },
+    }
+
+
+def run_copick_command(
+    command_string: str,
+    get_root: Callable[[str], Any],
+    run_names: Optional[List[str]] = None,
+    progress: Any = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Run a copick command line sharded by run (see `execute_command`).
+
+    Args:
+        command_string: Full command line, starting with "copick".
+        get_root: Callable returning a (cached) copick root for a configuration path.
+        run_names: Runs to run the command on (default: the runs selected on the command line, or all runs of the
+            command's --config).
+        progress: Progress reporter receiving the number of finished shards (optional).
+        **kwargs: Options of `execute_command`.
+
+    Returns:
+        The result of `execute_command`.
+    """
+    plan = plan_command(command_string)
+    runs = run_names or plan.run_names
+    if runs is None:
+        if plan.config_path is None:
+            raise ValueError(f"Command '{plan.command}' has no --config to list runs from, give run_names instead")
+        runs = [run.name for run in get_root(plan.config_path).runs]
+    return execute_command(plan, runs, progress=progress, **kwargs)
@@ -1,7 +1,7 @@
 """CLI introspection utilities for discovering and analyzing copick CLI commands."""
 
 import shlex
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
 from copick.cli.cli import (
@@ -17,23 +17,10 @@ from copick.cli.cli import (
 from copick.cli.ext import load_plugin_commands
 
 
-def get_all_cli_commands() -> Dict[str, Any]:
-    """Discover all copick CLI commands using load_plugin_commands().
-
-    Returns:
-        Dictionary containing hierarchical structure of all commands with metadata.
-    """
-    commands = {
-        "main": [],
-        "inference": [],
-        "training": [],
-        "evaluation": [],
-        "process": [],
-        "convert": [],
-        "logical": [],
-    }
+def _get_core_commands() -> List[Dict[str, Any]]:
+    """Discover the core copick CLI commands (and the subcommands of core command groups)."""
+    core_commands = []
 
-    # Get main commands (core commands)
     try:
         # Create a temporary group to get core commands
         @click.group()
@@ -66,11 +53,62 @@ def get_all_cli_commands() -> Dict[str, Any]:
                         },
                     )
 
-            commands["main"].append(cmd_info)
+            core_commands.append(cmd_info)
+    except Exception as e:
+        core_commands.append({"error": f"Failed to load core commands: {str(e)}"})
+
+    return core_commands
+
+
+def _get_plugin_group_commands(group_name: str) -> List[Dict[str, Any]]:
+    """Discover the plugin commands registered for a copick CLI group."""
+    group_commands = []
+
+    try:
+        plugin_commands = load_plugin_commands(group_name)
+        if plugin_commands:
+            for command, package_name in plugin_commands:
+                group_commands.append(
+                    {
+                        "name": command.name,
+                        "short_help": (
+                            command.get_short_help_str(limit=120)
+                            if hasattr(command, "get_short_help_str")
+                            else command.short_help
+                        ),
+                        "help": command.help,
+                        "package": package_name,
+                    },
+                )
     except Exception as e:
-        commands["main"].append({"error": f"Failed to load core commands: {str(e)}"})
+        group_commands.append({"error": f"Failed to load {group_name} commands: {str(e)}"})
+
+    return group_commands
+
+
+def get_all_cli_commands(progress: Any = None, partial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Discover all copick CLI commands using load_plugin_commands().
+
+    Args:
+        progress: Optional `ProgressReporter` receiving the number of command groups loaded.
+        partial: Optional dictionary of already discovered command groups. Groups found in it are not loaded again,
+            and newly loaded groups are added to it, so an interrupted discovery can be resumed.
+
+    Returns:
+        Dictionary containing hierarchical structure of all commands with metadata.
+    """
+    commands = {
+        "main": [],
+        "inference": [],
+        "training": [],
+        "evaluation": [],
+        "process": [],
+        "convert": [],
+        "logical": [],
+    }
+    partial = {} if partial is None else partial
 
-    # Get plugin commands for each group
+    # Plugin groups (everything except the core commands)
     groups = {
         "inference": inference,
         "training": training,
@@ -80,25 +118,25 @@ def get_all_cli_commands() -> Dict[str, Any]:
         "logical": logical,
     }
 
-    for group_name, _group_cmd in groups.items():
-        try:
-            plugin_commands = load_plugin_commands(group_name)
-            if plugin_commands:
-                for command, package_name in plugin_commands:
-                    commands[group_name].append(
-                        {
-                            "name": command.name,
-                            "short_help": (
-                                command.get_short_help_str(limit=120)
-                                if hasattr(command, "get_short_help_str")
-                                else command.short_help
-                            ),
-                            "help": command.help,
-                            "package": package_name,
-                        },
-                    )
-        except Exception as e:
-            commands[group_name].append({"error": f"Failed to load {group_name} commands: {str(e)}"})
+    for done, group_name in enumerate(commands):
+        if progress is not None:
+            progress.update(done, len(commands), f"Loading {group_name} commands")
+
+        if group_name in partial:
+            commands[group_name] = partial[group_name]
+            continue
+
+        if group_name == "main":
+            commands["main"] = _get_core_commands()
+        elif group_name in groups:
+            commands[group_name] = _get_plugin_group_commands(group_name)
+
+        # Only keep groups that loaded without errors, so a retry attempts the failed ones again
+        if not any("error" in cmd for cmd in commands[group_name]):
+            partial[group_name] = commands[group_name]
+
+    if progress is not None:
+        progress.update(len(commands), len(commands))
 
     return commands
 
@@ -261,6 +299,72 @@ def get_command_info(command_path: str) -> Dict[str, Any]:
         return {"success": False, "error": f"Failed to get command info: {str(e)}"}
 
 
+def resolve_copick_command(args: List[str]) -> Tuple[str, click.Command, click.Context, List[str]]:
+    """Resolve the command of a copick command line, descending into command groups.
+
+    Args:
+        args: Arguments of the command line, without the leading "copick".
+
+    Returns:
+        Tuple of the command path (e.g. "convert.picks2seg"), the command, its context and the remaining arguments
+        (the options and arguments of the command).
+
+    Raises:
+        click.UsageError: If the command does not exist.
+    """
+
+    @click.group()
+    def cli():
+        pass
+
+    cli = add_core_commands(cli)
+    cli = add_plugin_commands(cli)
+
+    ctx = click.Context(cli)
+    path = []
+    cmd: click.Command = cli
+    while isinstance(cmd, click.Group):
+        group = ".".join(path) or "copick"
+        if not args:
+            raise click.UsageError(f"Missing subcommand of '{group}'")
+        # Groups parse (and run eager options such as --help of) an option given instead of a subcommand
+        if args[0].startswith("-"):
+            raise click.UsageError(f"Expected a subcommand of '{group}', got option '{args[0]}'")
+        name, cmd, args = cmd.resolve_command(ctx, args)
+        path.append(name)
+        ctx = click.Context(cmd, parent=ctx, info_name=name)
+    return ".".join(path), cmd, ctx, args
+
+
+def parse_command_args(cmd: click.Command, ctx: click.Context, args: List[str]) -> None:
+    """Parse the options and arguments of a resolved command into `ctx.params`, without running the command.
+
+    Eager options that act while the command line is parsed and then exit, such as --help and --version, are
+    rejected instead of parsed: they would print to the server's stdout (the stdio transport) and abort parsing.
+
+    Args:
+        cmd: The command, as returned by `resolve_copick_command`.
+        ctx: The command's context.
+        args: The options and arguments of the command.
+
+    Raises:
+        click.ClickException: If an eager option is given or the arguments are invalid.
+    """
+    eager = set()
+    for param in cmd.get_params(ctx):
+        if isinstance(param, click.Option) and param.is_eager:
+            eager.update(param.opts + param.secondary_opts)
+
+    for arg in args:
+        if arg == "--":
+            break
+        if arg.split("=", 1)[0] in eager:
+            message = f"'{arg}' is not supported, it prints information instead of running the command"
+            raise click.UsageError(message, ctx)
+
+    cmd.parse_args(ctx, list(args))
+
+
 def validate_copick_cli_command(command_string: str) -> Dict[str, Any]:
     """Validate a copick CLI command string using Click's parsing.
 
@@ -280,73 +384,23 @@ def validate_copick_cli_command(command_string: str) -> Dict[str, Any]:
         if len(args) < 2:
             return {"success": False, "error": "No command specified"}
 
-        # Build the CLI
-        @click.group()
-        def cli():
-            pass
-
-        cli = add_core_commands(cli)
-        cli = add_plugin_commands(cli)
-
-        # Create a test context
-        ctx = click.Context(cli)
-
-        # Try to parse the command
         try:
-            # Remove 'copick' from args
-            remaining_args = args[1:]
-
-            # Parse the command and its arguments
-            cmd_name, cmd, remaining_args = cli.resolve_command(ctx, remaining_args)
-
-            if isinstance(cmd, click.Group) and remaining_args:
-                # It's a group command with a subcommand
-                sub_ctx = click.Context(cmd, parent=ctx)
-                sub_cmd_name, sub_cmd, sub_remaining_args = cmd.resolve_command(sub_ctx, remaining_args)
-
-                # Try to parse the parameters
-                try:
-                    # Create a context for the subcommand
-                    final_ctx = click.Context(sub_cmd, parent=sub_ctx)
-                    sub_cmd.parse_args(final_ctx, sub_remaining_args)
-
-                    return {
-                        "success": True,
-                        "valid": True,
-                        "message": "Command syntax is valid",
-                        "command": f"{cmd_name}.{sub_cmd_name}",
-                    }
-                except click.ClickException as e:
-                    return {
-                        "success": True,
-                        "valid": False,
-                        "error": str(e),
-                        "command": f"{cmd_name}.{sub_cmd_name}",
-                        "message": "Parameter validation failed",
-                    }
-            else:
-                # It's a direct command
-                try:
-                    final_ctx = click.Context(cmd, parent=ctx)
-                    cmd.parse_args(final_ctx, remaining_args)
-
-                    return {
-                        "success": True,
-                        "valid": True,
-                        "message": "Command syntax is valid",
-                        "command": cmd_name,
-                    }
-                except click.ClickException as e:
-                    return {
-                        "success": True,
-                        "valid": False,
-                        "error": str(e),
-                        "command": cmd_name,
-                        "message": "Parameter validation failed",
-                    }
-
+            command, cmd, ctx, remaining_args = resolve_copick_command(args[1:])
         except click.UsageError as e:
             return {"success": True, "valid": False, "error": str(e), "message": "Command not found or usage error"}
 
+        try:
+            parse_command_args(cmd, ctx, remaining_args)
+        except click.ClickException as e:
+            return {
+                "success": True,
+                "valid": False,
+                "error": str(e),
+                "command": command,
+                "message": "Parameter validation failed",
+            }
+
+        return {"success": True, "valid": True, "message": "Command syntax is valid", "command": command}
+
     except Exception as e:
         return {"success": False, "error": f"Failed to validate command: {str(e)}"}
@@ -0,0 +1,134 @@
+"""Connection pooling for the backends shared by the projects opened by the server.
+
+Filesystems are already pooled by fsspec: instances are cached per filesystem class and storage options (URL,
+credentials), so all roots using the same S3 bucket or SMB share reuse one filesystem instance and its connections.
+
+CryoET Data Portal access is not: a new `cryoet_data_portal.Client` parses the GraphQL schema again and opens a new
+HTTP session (TLS handshake included) per request. `portal_client` returns a client that is shared per endpoint URL
+and sends its requests through keep-alive HTTP sessions reused across requests. The server's own portal queries
+use it, e.g. to check whether metadata snapshots are up to date (see `copick_mcp.portal`). Queries copick makes on
+its own, e.g. the bulk metadata fetch or when a new run is created in the overlay, still use a new client each.
+
+Environment variables:
+    COPICK_MCP_HTTP_POOL_SIZE: Maximum number of connections kept alive per host and thread (default 10).
+"""
+
+import os
+import threading
+from typing import Any, Collection, Dict, Optional, Tuple
+
+import cryoet_data_portal as cdp
+import requests
+from gql import Client as GQLClient
+from gql.transport.exceptions import TransportAlreadyConnected
+from gql.transport.requests import RequestsHTTPTransport
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_PortalClient = cdp.Client
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_sessions_created = 0
+_requests_sent = 0
+
+
+def _get_session(retries: int, backoff_factor: float, status_forcelist: Collection[int]) -> requests.Session:
+    """Get the keep-alive HTTP session of the current thread for the given retry policy."""
+    global _sessions_created
+
+    sessions: Dict[Tuple[Any, ...], requests.Session] = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+
+    key = (retries, backoff_factor, tuple(status_forcelist))
+    session = sessions.get(key)
+    if session is None:
+        pool_size = int(os.getenv("COPICK_MCP_HTTP_POOL_SIZE", "10"))
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=status_forcelist,
+                allowed_methods=None,
+            ),
+        )
+        session = requests.Session()
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, adapter)
+        sessions[key] = session
+
+        with _stats_lock:
+            _sessions_created += 1
+
+    return session
+
+
+class PooledRequestsHTTPTransport(RequestsHTTPTransport):
+    """GraphQL transport borrowing a keep-alive session of the current thread instead of opening a new one."""
+
+    def connect(self) -> None:
+        global _requests_sent
+
+        if self.session is not None:
+            raise TransportAlreadyConnected("Transport is already connected")
+        self.session = _get_session(self.retries, self.retry_backoff_factor, self.retry_status_forcelist)
+
+        with _stats_lock:
+            _requests_sent += 1
+
+    def close(self) -> None:
+        # Give the session back without closing it, so its connections stay alive for the next request.
+        self.session = None
+
+
+class PooledPortalClient(_PortalClient):
+    """CryoET Data Portal client shared per endpoint URL, sending requests through pooled HTTP sessions."""
+
+    _instances: Dict[str, "PooledPortalClient"] = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, url: Optional[str] = None):
+        key = url or ""
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                # Parse the schema once per endpoint
+                _PortalClient.__init__(instance, url)
+                cls._instances[key] = instance
+        return instance
+
+    def __init__(self, url: Optional[str] = None):
+        # Initialized once in __new__
+        pass
+
+    def get_client(self) -> GQLClient:
+        # Same configuration as `_PortalClient.get_client`
+        transport = PooledRequestsHTTPTransport(url=self.url, retries=3, headers=self._headers())
+        return GQLClient(transport=transport, schema=self.schema)
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        try:
+            from cryoet_data_portal._constants import USER_AGENT
+        except ImportError:
+            return {}
+        return {"User-agent": USER_AGENT}
+
+
+def portal_client(url: Optional[str] = None) -> PooledPortalClient:
+    """The shared portal client for an endpoint URL (default: the public portal)."""
+    return PooledPortalClient(url)
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Number of shared portal clients, HTTP sessions created and portal requests sent by this process."""
+    with _stats_lock:
+        return {
+            "portal_clients": len(PooledPortalClient._instances),
+            "http_sessions": _sessions_created,
+            "portal_requests": _requests_sent,
+        }
@@ -0,0 +1,255 @@
+"""3D density maps of pick coordinates.
+
+The points of a run are binned into a coarse grid spanning its tomogram with a single `np.histogramdd` call, after
+reading all matching pick files into one array. Maps pooled across runs bin coordinates normalized by each run's
+tomogram extent, so runs of different sizes share one grid and the pooled map is the sum of the per-run maps.
+
+Maps are (z, y, x) arrays like copick volumes, so they can be written as segmentation-like volumes whose voxels are
+the bins.
+"""
+
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Ways a density map can be returned: per-axis sums, the full (z, y, x) grid, or only summary statistics
+DENSITY_OUTPUTS = ("projections", "grid", "stats")
+
+
+def run_extent(run: Any, voxel_spacing: Optional[float] = None) -> Optional[np.ndarray]:
+    """Tomogram extent of a run in angstrom (x, y, z), from the first tomogram at the requested voxel spacing.
+
+    Args:
+        run: The copick run.
+        voxel_spacing: Voxel spacing of the tomogram (optional, defaults to the smallest voxel spacing with a
+            tomogram).
+
+    Returns:
+        The extent, or None if the run has no tomogram.
+    """
+    import zarr
+
+    spacings = sorted(run.voxel_spacings, key=lambda vs: vs.voxel_size)
+    if voxel_spacing is not None:
+        spacings = [vs for vs in spacings if vs.voxel_size == voxel_spacing]
+    for vs in spacings:
+        if vs.tomograms:
+            shape = zarr.open(vs.tomograms[0].zarr(), mode="r")["0"].shape
+            return np.array(shape[::-1], dtype=float) * vs.voxel_size
+    return None
+
+
+def grid_shape(
+    bins: Union[int, Sequence[int]],
+    bin_size: Optional[float] = None,
+    extent: Optional[np.ndarray] = None,
+) -> Tuple[int, int, int]:
+    """Number of bins along x, y and z.
+
+    Args:
+        bins: Number of bins along every axis, or along x, y and z.
+        bin_size: Edge length of the bins in angstrom (optional, overrides `bins`, requires `extent`).
+        extent: Extent of the binned region in angstrom (x, y, z).
+
+    Returns:
+        The number of bins along x, y and z.
+    """
+    if bin_size is not None:
+        if bin_size <= 0:
+            raise ValueError("bin_size must be positive")
+        return tuple(max(1, math.ceil(e / bin_size)) for e in extent.tolist())
+    shape = (bins,) * 3 if isinstance(bins, int) else tuple(bins)
+    if len(shape) != 3 or any(int(n) < 1 for n in shape):
+        raise ValueError("bins must be a positive integer or a list of three positive integers (x, y, z)")
+    return tuple(int(n) for n in shape)
+
+
+def read_points(
+    run: Any,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> np.ndarray:
+    """The coordinates of all matching picks of a run in angstrom, as one [N, 3] (x, y, z) array."""
+    from copick_mcp.bulk_picks import read_run_picks
+
+    positions = [
+        read_run_picks(pick)["positions"]
+        for pick in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id)
+    ]
+    positions = [p for p in positions if len(p)]
+    return np.concatenate(positions) if positions else np.zeros((0, 3), dtype=float)
+
+
+def run_density(
+    run: Any,
+    bins: Union[int, Sequence[int]] = 16,
+    bin_size: Optional[float] = None,
+    normalized: bool = False,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    voxel_spacing: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Bin the picks of a run into a 3D grid over its tomogram.
+
+    Args:
+        run: The copick run.
+        bins: Number of bins along every axis, or along x, y and z.
+        bin_size: Edge length of the bins in angstrom (optional, overrides `bins`, not with `normalized`).
+        normalized: Bin coordinates divided by the tomogram extent, i.e. over [0, 1] along every axis.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        voxel_spacing: Voxel spacing of the tomogram defining the extent (optional, defaults to the smallest).
+
+    Returns:
+        Dictionary with the counts (z, y, x), the extent in angstrom (x, y, z) and where it comes from, the upper bound
+        of the grid (x, y, z), the number of points and the number of points outside the grid (or with non-finite
+        coordinates).
+    """
+    points = read_points(run, object_name=object_name, user_id=user_id, session_id=session_id)
+    finite = np.all(np.isfinite(points), axis=1)
+
+    extent = run_extent(run, voxel_spacing)
+    extent_source = "tomogram"
+    if extent is None:
+        # Without a tomogram, the grid spans the picks
+        extent = points[finite].max(axis=0) if finite.any() else np.ones(3)
+        extent = np.where(extent > 0, extent, 1.0)
+        extent_source = "picks"
+
+    shape = grid_shape(bins, None if normalized else bin_size, extent)
+    if normalized:
+        coordinates, upper = points[finite] / extent, np.ones(3)
+    elif bin_size is not None:
+        coordinates, upper = points[finite], np.asarray(shape, dtype=float) * bin_size
+    else:
+        coordinates, upper = points[finite], extent
+
+    # Bin (z, y, x) coordinates so the counts have the axis order of copick volumes
+    counts, _ = np.histogramdd(
+        coordinates[:, ::-1],
+        bins=shape[::-1],
+        range=[(0.0, float(u)) for u in upper[::-1]],
+    )
+    counts = counts.astype(np.int64)
+    return {
+        "counts": counts,
+        "extent": extent.tolist(),
+        "extent_source": extent_source,
+        "upper": [float(u) for u in upper],
+        "points": int(len(points)),
+        "outside": int(len(points) - counts.sum()),
+    }
+
+
+def summarize_density(
+    counts: np.ndarray,
+    upper: Sequence[float],
+    output: str = "projections",
+    top_bins: int = 5,
+) -> Dict[str, Any]:
+    """Occupancy statistics, densest bins and (depending on `output`) projections or the grid of a density map.
+
+    Args:
+        counts: The counts (z, y, x).
+        upper: Upper bound of the grid along x, y and z (angstrom, or 1 for normalized coordinates).
+        output: "projections" (sums along each axis), "grid" (the full counts) or "stats".
+        top_bins: Number of densest bins to list.
+
+    Returns:
+        Dictionary with the grid shape (x, y, z), bin size (x, y, z), statistics and the requested arrays.
+    """
+    if output not in DENSITY_OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'. Use one of: {', '.join(DENSITY_OUTPUTS)}")
+
+    shape_xyz = counts.shape[::-1]
+    bin_size = [float(u) / n for u, n in zip(upper, shape_xyz)]
+    total = int(counts.sum())
+    occupied = int(np.count_nonzero(counts))
+    mean = total / counts.size
+
+    summary: Dict[str, Any] = {
+        "bins": list(shape_xyz),
+        "bin_size": bin_size,
+        "stats": {
+            "points": total,
+            "occupied_bins": occupied,
+            "empty_fraction": 1 - occupied / counts.size,
+            "max_count": int(counts.max()),
+            "mean_count": mean,
+            # Coefficient of variation of the counts: 0 for a uniform density, large for clustered picks
+            "cv": float(counts.std() / mean) if total else 0.0,
+        },
+    }
+
+    flat = counts.ravel()
+    top = min(top_bins, occupied)
+    if top > 0:
+        densest = np.argpartition(flat, flat.size - top)[flat.size - top :]
+        densest = densest[np.argsort(flat[densest], kind="stable")[::-1]]
+        zyx = np.stack(np.unravel_index(densest, counts.shape), axis=1)
+        centers = (zyx[:, ::-1] + 0.5) * np.asarray(bin_size)
+        summary["densest_bins"] = [
+            {"index": index[::-1], "center": center, "count": int(count)}
+            for index, center, count in zip(zyx.tolist(), centers.tolist(), flat[densest].tolist())
+        ]
+
+    if output == "projections":
+        # Views along z are (y, x) arrays, views along y and x are (z, x) and (z, y) arrays
+        summary["projections"] = {
+            "z": counts.sum(axis=0).tolist(),
+            "y": counts.sum(axis=1).tolist(),
+            "x": counts.sum(axis=2).tolist(),
+        }
+    elif output == "grid":
+        summary["grid"] = counts.tolist()
+    return summary
+
+
+def write_density_segmentation(
+    run: Any,
+    counts: np.ndarray,
+    bin_size: float,
+    name: str,
+    user_id: str,
+    session_id: str,
+    exist_ok: bool = False,
+) -> Dict[str, Any]:
+    """Write a density map as a multilabel segmentation whose voxels are the bins and whose values are the counts.
+
+    Args:
+        run: The copick run.
+        counts: The counts (z, y, x), binned with `bin_size` from the origin.
+        bin_size: Edge length of the bins in angstrom, used as the voxel size of the segmentation.
+        name: Name of the segmentation.
+        user_id: User ID of the segmentation.
+        session_id: Session ID of the segmentation.
+        exist_ok: Replace an existing segmentation instead of failing.
+
+    Returns:
+        The segmentation's name, user ID, session ID, voxel size, shape and dtype.
+    """
+    import zarr
+
+    seg = run.new_segmentation(
+        voxel_size=bin_size,
+        name=name,
+        session_id=session_id,
+        is_multilabel=True,
+        user_id=user_id,
+        exist_ok=exist_ok,
+    )
+    seg.from_numpy(counts)
+
+    array = zarr.open(seg.zarr(), mode="r")["0"]
+    return {
+        "name": seg.name,
+        "user_id": seg.user_id,
+        "session_id": seg.session_id,
+        "voxel_size": seg.voxel_size,
+        "shape": list(array.shape),
+        "dtype": str(array.dtype),
+    }
@@ -0,0 +1,119 @@
+"""Federated queries running a tool on several copick projects and merging the results.
+
+Projects are given as a list of configuration files or as a named project group. Groups are defined in a JSON file
+mapping group names to lists of configuration files:
+
+    {"campaign-2024": ["/data/ds-10001/config.json", "/data/ds-10002/config.json"]}
+
+Results are merged with their provenance: entries of listed tables (e.g. "runs" or "picks") are concatenated into
+one table with a "config_path" column, numeric fields (e.g. "count") are summed, and all other fields are kept per
+project.
+
+Environment variables:
+    COPICK_MCP_PROJECT_GROUPS: Path to the JSON file defining project groups.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from copick_mcp.records import RecordTable
+
+# Arguments set by the federated query itself, or that only make sense for a single project
+RESERVED_ARGUMENTS = ("config_path", "ctx", "if_none_match", "since_etag")
+
+
+def load_project_groups() -> Dict[str, List[str]]:
+    """Project groups defined in the file given by `COPICK_MCP_PROJECT_GROUPS` (empty if it is not set)."""
+    path = os.getenv("COPICK_MCP_PROJECT_GROUPS")
+    if not path:
+        return {}
+    with open(os.path.expanduser(path), "r") as f:
+        groups = json.load(f)
+    if not isinstance(groups, dict) or not all(isinstance(paths, list) for paths in groups.values()):
+        raise ValueError(f"Project groups in {path} must map group names to lists of configuration files")
+    return groups
+
+
+def resolve_projects(config_paths: Optional[List[str]] = None, group: Optional[str] = None) -> List[str]:
+    """Configuration files of a federated query, in the order given and without duplicates.
+
+    Args:
+        config_paths: Configuration files (optional).
+        group: Name of a project group whose configuration files are added (optional).
+
+    Returns:
+        The configuration files.
+    """
+    paths = list(config_paths or [])
+    if group is not None:
+        groups = load_project_groups()
+        if group not in groups:
+            available = ", ".join(sorted(groups)) or "none, set COPICK_MCP_PROJECT_GROUPS"
+            raise ValueError(f"Unknown project group '{group}'. Available groups: {available}")
+        paths.extend(groups[group])
+    if not paths:
+        raise ValueError("Provide config_paths or a project group")
+    return list(dict.fromkeys(paths))
+
+
+def _is_record_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def merge_results(results: Dict[str, Dict[str, Any]], layout: str = "records") -> Dict[str, Any]:
+    """Merge the results of a tool run on several projects.
+
+    Args:
+        results: Tool result by configuration file, in project order.
+        layout: Layout of the merged tables ("records" or "columns").
+
+    Returns:
+        Result fields: merged tables with a "config_path" column, summed numeric fields ("totals"), the remaining
+        fields per project ("projects") and the errors of failed projects ("errors").
+    """
+    entries: Dict[str, List[Dict[str, Any]]] = {}
+    totals: Dict[str, Any] = {}
+    projects: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+
+    for config_path, result in results.items():
+        if not result.get("success"):
+            errors[config_path] = result.get("error", "Unknown error")
+            continue
+
+        project: Dict[str, Any] = {}
+        for key, value in result.items():
+            if key in ("success", "etag"):
+                continue
+            if _is_record_list(value):
+                entries.setdefault(key, []).extend({"config_path": config_path, **item} for item in value)
+                project[f"{key}_count"] = len(value)
+                continue
+            if _is_number(value):
+                totals[key] = totals.get(key, 0) + value
+            project[key] = value
+        projects[config_path] = project
+
+    merged: Dict[str, Any] = {}
+    for key, records in entries.items():
+        # Union of the fields of all records, in order of appearance
+        fields = list(dict.fromkeys(field for record in records for field in record))
+        optional = [field for field in fields if any(record.get(field) is None for record in records)]
+        table = RecordTable(fields, optional=optional, layout=layout)
+        for record in records:
+            table.append(*(record.get(field) for field in fields))
+        merged[key] = table.render(layout)
+
+    return {
+        **merged,
+        "totals": totals,
+        "projects": projects,
+        "projects_succeeded": len(projects),
+        "projects_failed": len(errors),
+        **({"errors": errors} if errors else {}),
+    }
@@ -0,0 +1,182 @@
+"""Cheap content fingerprints for copick runs.
+
+Fingerprints are derived from directory listings (names, sizes and modification times) rather than file contents,
+so they can be recomputed on every call to detect whether cached results derived from a run are still valid.
+
+Zarr stores are directories whose listing entry does not change when data inside them is rewritten, so run
+fingerprints also cover the metadata documents of every store (`.zattrs` and the `.zarray` of each level), which are
+rewritten whenever a store or one of its arrays is created again. Chunks overwritten in place without touching these
+documents are not detected.
+"""
+
+import concurrent.futures
+import hashlib
+import os
+from typing import Any, Iterable, List, Optional, Tuple
+
+from copick_mcp.names import lookup_run
+
+# Sub-directories of a run that hold copick artifacts. Voxel spacing directories are discovered by prefix.
+_RUN_ARTIFACT_DIRS = ("Picks", "Meshes", "Segmentations")
+_VOXEL_SPACING_PREFIX = "VoxelSpacing"
+_ZARR_SUFFIX = ".zarr"
+
+
+def _entry_token(info: dict) -> Tuple[str, str, str]:
+    """Reduce an fsspec listing entry to the fields that change when the entry changes."""
+    name = str(info.get("name", "")).rstrip("/")
+    size = str(info.get("size", ""))
+    # Local/SSH filesystems report `mtime`, object stores report `LastModified`/`ETag`.
+    stamp = info.get("mtime", info.get("LastModified", info.get("ETag", info.get("last_modified", ""))))
+    return name, size, str(stamp)
+
+
+def _list_entries(fs: Any, path: str) -> List[dict]:
+    """List a directory with details, returning an empty list if it does not exist."""
+    try:
+        return fs.ls(path, detail=True)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _store_tokens(fs: Any, path: str) -> Iterable[Tuple[str, str, str]]:
+    """Yield tokens for the `.zattrs` document and the `.zarray` document of each level of a zarr store."""
+    for entry in _list_entries(fs, path):
+        name = str(entry.get("name", "")).rstrip("/")
+        if os.path.basename(name) == ".zattrs":
+            yield _entry_token(entry)
+        elif entry.get("type") == "directory":
+            try:
+                yield _entry_token(fs.info(f"{name}/.zarray"))
+            except FileNotFoundError:
+                continue
+
+
+def _location_tokens(fs: Any, path: str) -> Iterable[Tuple[str, str, str]]:
+    """Yield listing tokens for a run directory, its artifact sub-directories and the zarr stores within them."""
+    for entry in _list_entries(fs, path):
+        yield _entry_token(entry)
+
+        base = os.path.basename(str(entry.get("name", "")).rstrip("/"))
+        if entry.get("type") == "directory" and (base in _RUN_ARTIFACT_DIRS or base.startswith(_VOXEL_SPACING_PREFIX)):
+            for sub_entry in _list_entries(fs, entry["name"]):
+                yield _entry_token(sub_entry)
+
+                sub_name = str(sub_entry.get("name", "")).rstrip("/")
+                if sub_entry.get("type") == "directory" and sub_name.endswith(_ZARR_SUFFIX):
+                    yield from _store_tokens(fs, sub_name)
+
+
+def run_locations(run: Any) -> List[Tuple[Any, str]]:
+    """Get the distinct fsspec locations (static and overlay) of a run's directories.
+
+    Args:
+        run: The copick run.
+
+    Returns:
+        List of (filesystem, path) tuples. Locations not backed by fsspec paths are skipped.
+    """
+    locations = []
+    for fs_attr, path_attr in (("fs_static", "static_path"), ("fs_overlay", "overlay_path")):
+        try:
+            fs = getattr(run, fs_attr)
+            path = getattr(run, path_attr)
+        except (AttributeError, NotImplementedError):
+            continue
+        if fs is not None and path and (fs, path) not in locations:
+            locations.append((fs, path))
+
+    return locations
+
+
+def run_fingerprint(run: Any) -> str:
+    """Compute a fingerprint of a run's static and overlay directories.
+
+    The fingerprint changes whenever an artifact (picks, meshes, segmentations, voxel spacings, tomograms) is added,
+    removed or rewritten, except for zarr chunks overwritten in place (see the module docstring). Runs that are not
+    backed by fsspec paths (e.g. purely portal-backed static data) only contribute their overlay location.
+
+    Args:
+        run: The copick run to fingerprint.
+
+    Returns:
+        A hex digest identifying the current state of the run.
+    """
+    digest = hashlib.sha1(run.name.encode())
+
+    for fs, path in run_locations(run):
+        for token in sorted(_location_tokens(fs, path)):
+            digest.update("\0".join(token).encode())
+
+    return digest.hexdigest()
+
+
+def config_fingerprint(config_path: str) -> str:
+    """Compute a fingerprint of a copick configuration file.
+
+    Args:
+        config_path: Path to the copick configuration file.
+
+    Returns:
+        A string identifying the current state of the configuration file.
+    """
+    stat = os.stat(config_path)
+    return f"{os.path.abspath(config_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def project_fingerprint(root: Any, config_path: str, run_names: Optional[List[str]] = None) -> str:
+    """Compute a fingerprint of a project's configuration file and runs.
+
+    Args:
+        root: The copick root of the project.
+        config_path: Path to the copick configuration file.
+        run_names: Names of the runs to cover (default: all runs).
+
+    Returns:
+        A hex digest that changes whenever the configuration or one of the runs changes.
+    """
+    runs = root.runs if run_names is None else [lookup_run(root, name) for name in run_names]
+    runs = [run for run in runs if run is not None]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        fingerprints = list(executor.map(run_fingerprint, runs))
+
+    digest = hashlib.sha1(config_fingerprint(config_path).encode())
+    for fingerprint in fingerprints:
+        digest.update(fingerprint.encode())
+    return digest.hexdigest()
+
+
+def file_token(fs: Any, path: str) -> str:
+    """Compute a token identifying the current state of a single file.
+
+    Args:
+        fs: The fsspec filesystem holding the file.
+        path: Path of the file.
+
+    Returns:
+        A string that changes whenever the file is rewritten.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    return "\0".join(_entry_token(fs.info(path)))
+
+
+def store_fingerprint(store: Any, level: str) -> str:
+    """Compute a fingerprint of one pyramid level of a zarr store.
+
+    Covers the store's `.zattrs` document and the listing of the level's directory (`.zarray` and chunk files), so it
+    changes whenever the level's data or the store's multiscale metadata is rewritten.
+
+    Args:
+        store: The zarr store (e.g. the `FSStore` returned by `CopickTomogram.zarr()`).
+        level: Path of the pyramid level within the store (e.g. "0").
+
+    Returns:
+        A hex digest identifying the current state of the level.
+    """
+    digest = hashlib.sha1(store.path.encode())
+    digest.update(file_token(store.fs, f"{store.path}/.zattrs").encode())
+    for token in sorted(_entry_token(entry) for entry in _list_entries(store.fs, f"{store.path}/{level}")):
+        digest.update("\0".join(token).encode())
+    return digest.hexdigest()
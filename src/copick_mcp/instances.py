@@ -0,0 +1,269 @@
+"""Instance counting in segmentations with chunk-wise connected-component labeling.
+
+Each chunk of a segmentation is labeled on its own (voxels of the same label value sharing a face form a component),
+in parallel and with a bounded number of chunks in flight. Components touching across chunk faces are then merged:
+the labels on both sides of every face between two chunks give pairs of equivalent components, which are resolved
+with a union-find over all components. Only the faces of chunks whose neighbours have not been labeled yet are kept
+in memory, so memory use is bounded by a few chunks and one layer of chunk faces rather than by the volume size.
+
+Instance sizes are cached per segmentation store and reused while the store is unchanged.
+"""
+
+import concurrent.futures
+import itertools
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from copick_mcp.fingerprint import store_fingerprint
+
+# Instance sizes: store path -> (store fingerprint, sizes in voxels per label value)
+_instance_cache: Dict[str, Tuple[str, Dict[int, np.ndarray]]] = {}
+_instance_lock = threading.Lock()
+
+
+class UnionFind:
+    """Disjoint sets over integer IDs, with path halving and union by size."""
+
+    def __init__(self):
+        self.parent: List[int] = []
+        self.size: List[int] = []
+
+    def add(self, count: int) -> None:
+        """Add `count` singleton sets, with the next consecutive IDs."""
+        start = len(self.parent)
+        self.parent.extend(range(start, start + count))
+        self.size.extend([1] * count)
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def roots(self) -> np.ndarray:
+        """Root of every item."""
+        return np.fromiter(
+            (self.find(item) for item in range(len(self.parent))),
+            dtype=np.int64,
+            count=len(self.parent),
+        )
+
+
+def label_block(block: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Label the connected components of each label value in a block.
+
+    Args:
+        block: Labels of the block (z, y, x), 0 is background.
+
+    Returns:
+        Tuple of the component of every voxel (0 for background, 1..N otherwise), and the label value and size in
+        voxels of each component.
+    """
+    from scipy import ndimage
+
+    components = np.zeros(block.shape, dtype=np.int32)
+    values, sizes = [], []
+    for value in np.unique(block).tolist():
+        if value == 0:
+            continue
+        mask = block == value
+        labeled, count = ndimage.label(mask)
+        components[mask] = labeled[mask] + len(values)
+        values.extend([value] * count)
+        sizes.append(np.bincount(labeled[mask], minlength=count + 1)[1:])
+
+    sizes = np.concatenate(sizes) if sizes else np.zeros(0, dtype=np.int64)
+    return components, np.asarray(values, dtype=np.int64), sizes
+
+
+def _read_and_label(array: Any, index: Tuple[int, ...]) -> Dict[str, Any]:
+    """Label one chunk, keeping only what is needed for merging: its faces and its components' values and sizes."""
+    selection = tuple(slice(i * c, min((i + 1) * c, n)) for i, c, n in zip(index, array.chunks, array.shape))
+    block = np.asarray(array[selection])
+    components, values, sizes = label_block(block)
+
+    faces = {}
+    for axis in range(3):
+        low = [slice(None)] * 3
+        high = [slice(None)] * 3
+        low[axis], high[axis] = 0, -1
+        faces[axis] = (
+            (components[tuple(low)].copy(), block[tuple(low)].copy()),
+            (components[tuple(high)].copy(), block[tuple(high)].copy()),
+        )
+    return {"values": values, "sizes": sizes, "faces": faces}
+
+
+def _face_pairs(below: Tuple[np.ndarray, np.ndarray], above: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """Distinct pairs of components with the same label value facing each other across a chunk face."""
+    (below_ids, below_values), (above_ids, above_values) = below, above
+    touching = (below_ids >= 0) & (above_ids >= 0) & (below_values == above_values)
+    if not touching.any():
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.unique(np.stack([below_ids[touching], above_ids[touching]], axis=1), axis=0)
+
+
+def count_instances(
+    array: Any,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[int, np.ndarray]:
+    """Find the connected components (6-connectivity) of each label value of a segmentation array.
+
+    Args:
+        array: The zarr array of the segmentation (z, y, x).
+        max_workers: Maximum number of threads labeling chunks (default: executor default).
+        progress: Callback receiving the number of chunks labeled and the total (optional).
+
+    Returns:
+        Size in voxels of every instance, per label value.
+    """
+    grid = [math.ceil(n / c) for n, c in zip(array.shape, array.chunks)]
+    indices = list(itertools.product(*(range(n) for n in grid)))
+
+    union_find = UnionFind()
+    values: List[np.ndarray] = []
+    sizes: List[np.ndarray] = []
+    # Upper faces of labeled chunks, with global component IDs (-1 for background), until the next chunk is labeled
+    pending: Dict[Tuple[Tuple[int, ...], int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        window = 2 * workers
+        futures: Dict[int, concurrent.futures.Future] = {}
+        for position, index in enumerate(indices):
+            # Chunks are submitted ahead of the one being merged, at most `window` at a time
+            for ahead in range(position, min(position + window, len(indices))):
+                if ahead not in futures:
+                    futures[ahead] = executor.submit(_read_and_label, array, indices[ahead])
+            result = futures.pop(position).result()
+
+            # Component i of the chunk has global ID offset + i - 1
+            offset = len(union_find.parent)
+            union_find.add(len(result["values"]))
+            values.append(result["values"])
+            sizes.append(result["sizes"])
+
+            for axis, ((low_ids, low_values), (high_ids, high_values)) in result["faces"].items():
+                if index[axis] > 0:
+                    below = tuple(i - 1 if a == axis else i for a, i in enumerate(index))
+                    low = (np.where(low_ids > 0, low_ids.astype(np.int64) + offset - 1, -1), low_values)
+                    for a, b in _face_pairs(pending.pop((below, axis)), low).tolist():
+                        union_find.union(a, b)
+                if index[axis] + 1 < grid[axis]:
+                    high = (np.where(high_ids > 0, high_ids.astype(np.int64) + offset - 1, -1), high_values)
+                    pending[(index, axis)] = high
+
+            if progress is not None:
+                progress(position + 1, len(indices))
+
+    if not values:
+        return {}
+    roots = union_find.roots()
+    all_values = np.concatenate(values)
+    instance_sizes = np.bincount(roots, weights=np.concatenate(sizes), minlength=len(roots)).astype(np.int64)
+
+    is_root = roots == np.arange(len(roots))
+    return {
+        value: np.sort(instance_sizes[is_root & (all_values == value)])[::-1]
+        for value in np.unique(all_values).tolist()
+    }
+
+
+def count_instances_cached(
+    store: Any,
+    level: str = "0",
+    refresh: bool = False,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[Dict[int, np.ndarray], bool]:
+    """Instance sizes of a segmentation store, labeling it again only if the store changed.
+
+    Returns:
+        Tuple of the instance sizes per label value and whether they were computed (False if cached).
+    """
+    import zarr
+
+    fingerprint = store_fingerprint(store, level)
+    with _instance_lock:
+        cached = _instance_cache.get(store.path)
+    if cached is not None and cached[0] == fingerprint and not refresh:
+        return cached[1], False
+
+    instances = count_instances(zarr.open(store, mode="r")[level], max_workers=max_workers, progress=progress)
+    with _instance_lock:
+        _instance_cache[store.path] = (fingerprint, instances)
+    return instances, True
+
+
+def size_histogram(sizes: np.ndarray) -> List[Dict[str, int]]:
+    """Histogram of instance sizes in voxels, with bins doubling in size ([1, 2), [2, 4), [4, 8), ...)."""
+    if len(sizes) == 0:
+        return []
+    bins = np.floor(np.log2(sizes)).astype(np.int64)
+    counts = np.bincount(bins)
+    return [
+        {"min_voxels": 2**b, "max_voxels": 2 ** (b + 1) - 1, "count": int(count)}
+        for b, count in enumerate(counts.tolist())
+        if count
+    ]
+
+
+def summarize_instances(
+    instances: Dict[int, np.ndarray],
+    voxel_size: float,
+    label_names: Dict[int, str],
+    min_size: int = 1,
+    max_sizes: int = 10,
+) -> List[Dict[str, Any]]:
+    """Per label value instance counts, size statistics and size histogram.
+
+    Args:
+        instances: Instance sizes in voxels per label value (see `count_instances`).
+        voxel_size: Voxel size of the segmentation in angstrom.
+        label_names: Name of each label value.
+        min_size: Instances smaller than this many voxels are ignored.
+        max_sizes: Number of largest instance sizes to list.
+
+    Returns:
+        One entry per label value.
+    """
+    voxel_volume = float(voxel_size) ** 3
+    labels = []
+    for value, all_sizes in sorted(instances.items()):
+        sizes = all_sizes[all_sizes >= min_size]
+        entry: Dict[str, Any] = {
+            "label": value,
+            "name": label_names.get(value),
+            "instances": int(len(sizes)),
+            "ignored_instances": int(len(all_sizes) - len(sizes)),
+            "voxels": int(sizes.sum()),
+            "volume_angstrom3": float(sizes.sum()) * voxel_volume,
+        }
+        if len(sizes):
+            entry.update(
+                {
+                    "min_voxels": int(sizes.min()),
+                    "median_voxels": float(np.median(sizes)),
+                    "mean_voxels": float(sizes.mean()),
+                    "max_voxels": int(sizes.max()),
+                    "largest_voxels": sizes[:max_sizes].tolist(),
+                    "size_histogram": size_histogram(sizes),
+                },
+            )
+        labels.append(entry)
+    return labels
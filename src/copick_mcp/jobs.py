@@ -0,0 +1,452 @@
+"""Background job subsystem for expensive project-wide queries.
+
+Jobs are submitted by kind and parameters, run on a bounded pool of worker threads in priority order, and their
+results are kept in a local on-disk store from which they can be retrieved page by page. Submitting a job identical
+to a queued, running or finished one returns the existing job instead of computing it again. Jobs reading a project
+are only identical while the project's configuration file and list of runs are unchanged; changes of the data within
+runs are not detected, resubmit with `force` to recompute. Finished jobs are forgotten, and their stored results
+deleted, once they are older than the retention time.
+
+Environment variables:
+    COPICK_MCP_JOB_WORKERS: Number of worker threads running jobs (default 2).
+    COPICK_MCP_JOB_RETENTION_HOURS: Hours finished jobs and their results are kept (default 168).
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from copick_mcp.paths import atomic_write_bytes, get_cache_dir
+from copick_mcp.records import dumps, loads
+
+# Registry of job kinds: name -> callable(manager, params, progress) -> JSON-serializable result dictionary.
+# If the result contains an "items" list, it is paged by `JobManager.result`.
+JOB_KINDS: Dict[str, Callable[..., Dict[str, Any]]] = {}
+
+# Job states of finished jobs
+_FINISHED = ("succeeded", "failed", "cancelled")
+
+# Minimum number of seconds between two passes pruning expired jobs
+_PRUNE_INTERVAL = 60.0
+
+
+class JobCancelledError(Exception):
+    """Raised inside a running job when it was cancelled."""
+
+
+def register_job_kind(name: str) -> Callable[[Callable[..., Dict[str, Any]]], Callable[..., Dict[str, Any]]]:
+    """Register a job kind under a name usable with `JobManager.submit`.
+
+    Args:
+        name: Name of the job kind.
+
+    Returns:
+        Decorator registering the function.
+    """
+
+    def decorator(fn: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        JOB_KINDS[name] = fn
+        return fn
+
+    return decorator
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+@dataclass
+class Job:
+    """State of a submitted job.
+
+    Attributes:
+        job_id: Identifier derived from the job kind and parameters.
+        kind: Name of the job kind.
+        params: Parameters of the job.
+        priority: Priority of the job (higher runs first).
+        status: One of "queued", "running", "succeeded", "failed" or "cancelled".
+        progress: Amount of work done so far.
+        total: Total amount of work, if known.
+        message: Latest progress message.
+        error: Error message of a failed job.
+        submitted_at: Time the job was submitted.
+        started_at: Time the job started running.
+        finished_at: Time the job finished.
+    """
+
+    job_id: str
+    kind: str
+    params: Dict[str, Any]
+    priority: int = 0
+    status: str = "queued"
+    progress: float = 0
+    total: Optional[float] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable representation of the job state."""
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.progress,
+            "total": self.total,
+            "message": self.message,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobProgress:
+    """Progress reporter for a running job, interchangeable with `copick_mcp.progress.ProgressReporter`."""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def update(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        self.check_cancelled()
+        self.job.progress = progress
+        if total is not None:
+            self.job.total = total
+        if message is not None:
+            self.job.message = message
+
+    def check_cancelled(self) -> None:
+        if self.job.cancel_event.is_set():
+            raise JobCancelledError(f"Job {self.job.job_id} was cancelled")
+
+
+def job_id_for(kind: str, params: Dict[str, Any], fingerprint: Optional[str] = None) -> str:
+    """Derive the identifier of a job from its kind, parameters and the fingerprint of the data it reads (if any)."""
+    key: Dict[str, Any] = {"kind": kind, "params": params}
+    if fingerprint is not None:
+        key["fingerprint"] = fingerprint
+    canonical = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class JobManager:
+    """Queue, run and store background jobs.
+
+    Attributes:
+        get_root: Callable returning a (cached) copick root for a configuration path.
+        max_workers: Number of worker threads running jobs.
+        store_dir: Directory of the on-disk result store.
+        retention: Seconds finished jobs and their stored results are kept.
+    """
+
+    def __init__(
+        self,
+        get_root: Callable[[str], Any],
+        max_workers: Optional[int] = None,
+        store_dir: Optional[Path] = None,
+    ):
+        self.get_root = get_root
+        self.max_workers = max_workers or int(os.getenv("COPICK_MCP_JOB_WORKERS", "2"))
+        self.store_dir = Path(store_dir) if store_dir is not None else get_cache_dir("jobs")
+        self.retention = float(os.getenv("COPICK_MCP_JOB_RETENTION_HOURS", "168")) * 3600
+
+        self._jobs: Dict[str, Job] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._queue: "queue.PriorityQueue[Tuple[int, int, str]]" = queue.PriorityQueue()
+        self._counter = itertools.count()
+        # Reentrant, so that submissions can hold it across the lookup of an existing job and the insertion
+        self._lock = threading.RLock()
+        self._workers: List[threading.Thread] = []
+        self._last_prune = float("-inf")
+
+    # ------------------------------------------------------------------
+    # Result store
+    # ------------------------------------------------------------------
+
+    def _store_path(self, job_id: str) -> Path:
+        return self.store_dir / f"{job_id}.json"
+
+    def _load_stored(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._store_path(job_id), "rb") as f:
+                return loads(f.read())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _get_job(self, job_id: str) -> Optional[Job]:
+        """Get a job from memory, or restore a finished job from the on-disk store."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        stored = self._load_stored(job_id)
+        if stored is None:
+            return None
+
+        state = stored["job"]
+        job = Job(**{k: v for k, v in state.items() if k in Job.__dataclass_fields__})
+        with self._lock:
+            self._jobs.setdefault(job_id, job)
+            self._results.setdefault(job_id, stored["result"])
+            return self._jobs[job_id]
+
+    def _fingerprint(self, params: Dict[str, Any]) -> Optional[str]:
+        """Fingerprint of the configuration and runs a job reads, so that jobs are not deduplicated across changes.
+
+        Only the configuration file and the run names are covered, which is cheap enough to compute on submission:
+        fingerprinting the contents of every run would list all of them before the job is even queued.
+        """
+        config_path = params.get("config_path")
+        if config_path is None:
+            return None
+        from copick_mcp.fingerprint import config_fingerprint
+
+        run_names = params.get("run_names")
+        if run_names is None:
+            run_names = [run.name for run in self.get_root(config_path).runs]
+        digest = hashlib.sha1(config_fingerprint(config_path).encode())
+        digest.update("\0".join(sorted(run_names)).encode())
+        return digest.hexdigest()
+
+    def _prune(self) -> None:
+        """Forget finished jobs and delete stored results older than the retention time."""
+        now = time.time()
+        with self._lock:
+            if time.monotonic() - self._last_prune < _PRUNE_INTERVAL:
+                return
+            self._last_prune = time.monotonic()
+            cutoff = (datetime.now() - timedelta(seconds=self.retention)).isoformat(timespec="seconds")
+            for job_id, job in list(self._jobs.items()):
+                if job.status in _FINISHED and job.finished_at is not None and job.finished_at < cutoff:
+                    del self._jobs[job_id]
+                    self._results.pop(job_id, None)
+
+        for path in self.store_dir.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime > self.retention:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"copick-mcp-job-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = _now()
+        try:
+            result = JOB_KINDS[job.kind](self, dict(job.params), JobProgress(job))
+            job.status = "succeeded"
+            job.finished_at = _now()
+            with self._lock:
+                # Each submission is a new Job, so an attempt superseded by a forced resubmission while it was
+                # running must not overwrite the result of the current attempt.
+                if self._jobs.get(job.job_id) is not job:
+                    return
+                self._results[job.job_id] = result
+                atomic_write_bytes(
+                    self._store_path(job.job_id),
+                    dumps({"job": job.to_dict(), "result": result}),
+                )
+        except JobCancelledError:
+            job.status = "cancelled"
+            job.finished_at = _now()
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = _now()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, params: Dict[str, Any], priority: int = 0, force: bool = False) -> Tuple[Job, bool]:
+        """Submit a job, or return an identical existing one.
+
+        Args:
+            kind: Name of a registered job kind.
+            params: Parameters of the job.
+            priority: Priority of the job (higher runs first).
+            force: Recompute even if an identical job is queued, running or finished.
+
+        Returns:
+            Tuple of the job and whether an existing job was returned instead of submitting a new one.
+
+        Raises:
+            ValueError: If the job kind is unknown.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'. Available kinds: {', '.join(sorted(JOB_KINDS))}")
+
+        self._prune()
+        job_id = job_id_for(kind, params, self._fingerprint(params))
+        with self._lock:
+            existing = self._get_job(job_id)
+            if existing is not None and not force and existing.status in ("queued", "running", "succeeded"):
+                if existing.status == "queued" and priority > existing.priority:
+                    # Re-queue with the higher priority; the stale queue entry is skipped by the workers.
+                    existing.priority = priority
+                    self._queue.put((-priority, next(self._counter), job_id))
+                return existing, True
+
+            if existing is not None and existing.status == "running":
+                existing.cancel_event.set()
+
+            job = Job(job_id=job_id, kind=kind, params=params, priority=priority)
+            self._jobs[job_id] = job
+            self._results.pop(job_id, None)
+            self._queue.put((-priority, next(self._counter), job_id))
+        self._ensure_workers()
+
+        return job, False
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job, or None if it is unknown."""
+        job = self._get_job(job_id)
+        return job.to_dict() if job is not None else None
+
+    def result(self, job_id: str, offset: int = 0, limit: int = 100) -> Optional[Dict[str, Any]]:
+        """Get a page of the result of a finished job.
+
+        Args:
+            job_id: Identifier of the job.
+            offset: Index of the first result item to return.
+            limit: Maximum number of result items to return.
+
+        Returns:
+            The result (with its "items" list, if any, restricted to the requested page), or None if the job is
+            unknown or has not succeeded.
+        """
+        job = self._get_job(job_id)
+        if job is None or job.status != "succeeded":
+            return None
+
+        with self._lock:
+            result = self._results.get(job_id)
+        if result is None:
+            stored = self._load_stored(job_id)
+            if stored is None:
+                return None
+            result = stored["result"]
+
+        page = dict(result)
+        items = result.get("items")
+        if isinstance(items, list):
+            page["items"] = items[offset : offset + limit]
+            page["total_items"] = len(items)
+            page["offset"] = offset
+            page["next_offset"] = offset + limit if offset + limit < len(items) else None
+
+        return page
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job.
+
+        Returns:
+            True if the job was queued or running, False otherwise.
+        """
+        job = self._get_job(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return False
+
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = _now()
+        return True
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """List the states of all jobs known to this server process."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in sorted(jobs, key=lambda j: j.submitted_at, reverse=True)]
+
+
+# ============================================================================
+# Job kinds
+# ============================================================================
+
+
+@register_job_kind("project_summary")
+def _project_summary_job(manager: JobManager, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """Project-wide totals (see `copick_mcp.project_summary.get_project_summary`)."""
+    from copick_mcp.project_summary import get_project_summary
+
+    root = manager.get_root(params["config_path"])
+    if params.get("refresh_runs"):
+        root.refresh()
+
+    options = {name: params[name] for name in ("count_points", "max_workers", "max_missing_runs") if name in params}
+    return get_project_summary(root, params["config_path"], progress=progress, **options)
+
+
+@register_job_kind("copick_command")
+def _copick_command_job(manager: JobManager, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """copick CLI command sharded by run (see `copick_mcp.cli_execution.run_copick_command`)."""
+    from copick_mcp.cli_execution import run_copick_command
+
+    return run_copick_command(get_root=manager.get_root, progress=progress, **params)
+
+
+def _run_operation_job(operation: str) -> Callable[..., Dict[str, Any]]:
+    """Build a job kind running a per-run operation of `copick_mcp.parallel` on the process pool."""
+
+    def job(manager: JobManager, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+        from copick_mcp.parallel import RunJob, iter_run_jobs
+
+        config_path = params.pop("config_path")
+        run_names = params.pop("run_names", None)
+        max_workers = params.pop("max_workers", None)
+        if run_names is None:
+            run_names = [run.name for run in manager.get_root(config_path).runs]
+
+        jobs = [RunJob(config_path, run_name, operation, params) for run_name in run_names]
+
+        items = []
+        errors = {}
+        for result in iter_run_jobs(jobs, max_workers=max_workers, progress=progress):
+            if not result["success"]:
+                errors[result["run_name"]] = result["error"]
+            elif result["result"]:
+                items.append({"run_name": result["run_name"], "results": result["result"]})
+
+        items.sort(key=lambda item: item["run_name"])
+        return {"items": items, "errors": errors, "runs_processed": len(jobs)}
+
+    job.__doc__ = f"Per-run '{operation}' analysis of all (or the given) runs."
+    return job
+
+
+for _operation in ("pick_statistics", "pick_qc", "segmentation_volumes"):
+    register_job_kind(_operation)(_run_operation_job(_operation))
@@ -1,11 +1,18 @@
 """Copick MCP Server - FastMCP server providing data exploration and CLI introspection tools."""
 
+import functools
+import inspect
 import logging
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
-import copick
-from fastmcp import FastMCP
+import copick  # noqa: F401 (installs the log handler redirected below)
+from fastmcp import Context, FastMCP
+
+from copick_mcp.memo import Memoizer
+from copick_mcp.names import lookup_run, not_found_response, object_not_found, run_not_found
+from copick_mcp.profiling import Profiler, ProfilingMiddleware
+from copick_mcp.tracing import TraceRecorder, TracingMiddleware, default_trace_path
 
 # Fix: `import copick` installs a RichHandler on the root logger that writes to
 # stdout (via copick.util.log.get_logger). This corrupts the MCP stdio JSON-RPC
@@ -70,198 +77,436 @@ def get_copick_root_from_file(config_path: str):
     """
     global _copick_cache
     if config_path not in _copick_cache:
-        _copick_cache[config_path] = copick.from_file(config_path)
+        from copick_mcp.chunk_cache import install_chunk_cache
+        from copick_mcp.portal import open_root
+
+        root = open_root(config_path)
+        install_chunk_cache(root)
+        _copick_cache[config_path] = root
     return _copick_cache[config_path]
 
 
+# Memoization of tool results, keyed on arguments and project content fingerprints
+memo = Memoizer(get_root=get_copick_root_from_file)
+
+# Optional recording of all tool calls to a JSONL trace (COPICK_MCP_TRACE)
+_trace_path = default_trace_path()
+if _trace_path is not None:
+    mcp.add_middleware(TracingMiddleware(TraceRecorder(_trace_path)))
+    logger.info(f"Recording tool calls to {_trace_path}")
+
+# Opt-in profiling of tool calls (COPICK_MCP_PROFILE or the set_profiling tool)
+profiler = Profiler()
+mcp.add_middleware(ProfilingMiddleware(profiler))
+
+
 # ============================================================================
 # Data Exploration Tools (Read-Only)
 # ============================================================================
 
 
 @mcp.tool()
-def list_runs(config_path: str) -> Dict[str, Any]:
+def list_runs(
+    config_path: str,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+) -> Dict[str, Any]:
     """List all runs in a Copick project.
 
     Args:
         config_path: Path to the Copick configuration file.
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of runs or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {"tool": "list_runs", "config_path": config_path}
+
         root = get_copick_root_from_file(config_path)
         runs = root.runs
 
+        table = RecordTable(("name",), layout=layout)
         if not runs:
-            return {"success": True, "runs": [], "message": "No runs found in the Copick project"}
+            return {
+                "success": True,
+                **render_listing({"runs": table}, layout, if_none_match, since_etag, scope),
+                "message": "No runs found in the Copick project",
+            }
 
-        run_list = [{"name": run.name} for run in runs]
+        for run in runs:
+            table.append(run.name)
 
-        return {"success": True, "runs": run_list, "count": len(run_list)}
+        return {
+            "success": True,
+            **render_listing({"runs": table}, layout, if_none_match, since_etag, scope),
+            "count": len(table),
+        }
     except Exception as e:
         logger.exception(f"Failed to list runs: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def get_run_details(config_path: str, run_name: str) -> Dict[str, Any]:
+async def find_names(
+    config_path: str,
+    kind: str,
+    query: str,
+    mode: str = "fuzzy",
+    limit: int = 10,
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Find run, object, user, session, segmentation or tomogram type names by prefix or similarity.
+
+    Use this instead of listing all runs when a name is not known exactly. Fuzzy matches are case-insensitive and
+    ranked by edit distance, e.g. "ts_01" finds "TS-01". Run and object names are indexed in memory. Other names are
+    collected from the runs' artifacts, walking only runs that changed since the last walk.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        kind: Kind of name: "run", "object", "user_id", "session_id", "segmentation" or "tomo_type".
+        query: Name, part of a name or prefix to look up.
+        mode: "fuzzy" (closest names) or "prefix" (names starting with the query, case-insensitive) (optional).
+        limit: Maximum number of names to return (optional, default 10).
+        max_workers: Maximum number of threads walking runs, for kinds other than run and object (optional).
+
+    Returns:
+        Dictionary containing whether the query is an existing name and the matching names or error message.
+    """
+    try:
+        from copick_mcp.names import NAME_KINDS, NameIndex, artifact_names, get_name_index
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.project_summary import collect_run_summaries
+
+        if kind not in NAME_KINDS:
+            return {"success": False, "error": f"Unknown kind '{kind}'. Available kinds: {', '.join(NAME_KINDS)}"}
+        if mode not in ("fuzzy", "prefix"):
+            return {"success": False, "error": f"Unknown mode '{mode}', expected 'fuzzy' or 'prefix'"}
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            if kind == "run":
+                return get_name_index(root).runs()
+            if kind == "object":
+                return get_name_index(root).objects()
+            partials, _ = collect_run_summaries(
+                root,
+                config_path,
+                count_points=False,
+                max_workers=max_workers,
+                progress=progress,
+            )
+            return NameIndex(artifact_names(partials, kind))
+
+        index = await run_in_thread(ctx, collect)
+        matches = index.complete(query, limit) if mode == "prefix" else index.suggest(query, limit)
+        return {
+            "success": True,
+            "kind": kind,
+            "query": query,
+            "exact": query in index,
+            "matches": matches,
+            "total_names": len(index),
+        }
+    except Exception as e:
+        logger.exception(f"Failed to find names: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+@memo.cached(scope="run")
+async def get_run_details(
+    config_path: str,
+    run_name: str,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
     """Get detailed information about a specific run.
 
+    Reports progress while pick files are loaded and stops promptly when the call is cancelled. Pick sets loaded
+    before a cancellation or timeout are kept, so retrying the call continues where it left off.
+
     Args:
         config_path: Path to the Copick configuration file.
         run_name: Name of the run to get details for.
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing detailed run information or error message.
     """
     try:
-        root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        from copick_mcp.fingerprint import run_fingerprint
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.records import RecordTable, check_layout, render_listing
+        from copick_mcp.resumable import partial_results
 
-        if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {"tool": "get_run_details", "config_path": config_path, "run_name": run_name}
 
-        # Get voxel spacings
-        voxel_spacings = [{"voxel_size": vs.voxel_size} for vs in run.voxel_spacings]
+        check_layout(layout)
 
-        # Get picks information
-        picks_list = []
-        for pick in run.picks:
-            num_points = len(pick.points) if pick.meta.points else 0
-            picks_list.append(
-                {
-                    "object_name": pick.pickable_object_name,
-                    "user_id": pick.user_id,
-                    "session_id": pick.session_id,
-                    "num_points": num_points,
-                },
-            )
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            run = lookup_run(root, run_name)
 
-        # Get mesh information
-        meshes_list = []
-        for mesh in run.meshes:
-            meshes_list.append(
-                {"object_name": mesh.pickable_object_name, "user_id": mesh.user_id, "session_id": mesh.session_id},
-            )
+            if not run:
+                return not_found_response(run_not_found(root, run_name))
 
-        # Get segmentation information
-        segmentations_list = []
-        for seg in run.segmentations:
-            segmentations_list.append(
-                {
-                    "name": seg.name,
-                    "user_id": seg.user_id,
-                    "session_id": seg.session_id,
-                    "is_multilabel": seg.is_multilabel,
-                    "voxel_size": seg.voxel_size,
-                },
+            key = partial_results.key(
+                "get_run_details",
+                config_path=config_path,
+                run_name=run_name,
+                fingerprint=run_fingerprint(run),
+            )
+            loaded = partial_results.get(key)
+
+            # Get voxel spacings
+            voxel_spacings = RecordTable(("voxel_size",), layout=layout)
+            for vs in run.voxel_spacings:
+                voxel_spacings.append(vs.voxel_size)
+
+            # Get picks information (loading pick files is the expensive part)
+            picks = run.picks
+            picks_table = RecordTable(("object_name", "user_id", "session_id", "num_points"), layout=layout)
+            for i, pick in enumerate(picks):
+                progress.update(i, len(picks), f"Loaded {i}/{len(picks)} pick sets")
+
+                unit = f"{pick.pickable_object_name}/{pick.user_id}/{pick.session_id}"
+                if unit not in loaded:
+                    loaded[unit] = len(pick.points or [])
+                picks_table.append(pick.pickable_object_name, pick.user_id, pick.session_id, loaded[unit])
+            progress.update(len(picks), len(picks), f"Loaded {len(picks)}/{len(picks)} pick sets")
+
+            # Get mesh information
+            meshes_table = RecordTable(("object_name", "user_id", "session_id"), layout=layout)
+            for mesh in run.meshes:
+                meshes_table.append(mesh.pickable_object_name, mesh.user_id, mesh.session_id)
+
+            # Get segmentation information
+            segmentations_table = RecordTable(
+                ("name", "user_id", "session_id", "is_multilabel", "voxel_size"),
+                layout=layout,
             )
+            for seg in run.segmentations:
+                segmentations_table.append(seg.name, seg.user_id, seg.session_id, seg.is_multilabel, seg.voxel_size)
 
-        return {
-            "success": True,
-            "run_name": run.name,
-            "voxel_spacings": voxel_spacings,
-            "picks": picks_list,
-            "meshes": meshes_list,
-            "segmentations": segmentations_list,
-        }
+            # Completed, nothing left to resume
+            partial_results.discard(key)
+
+            tables = {
+                "voxel_spacings": voxel_spacings,
+                "picks": picks_table,
+                "meshes": meshes_table,
+                "segmentations": segmentations_table,
+            }
+            return {
+                "success": True,
+                "run_name": run.name,
+                **render_listing(tables, layout, if_none_match, since_etag, scope),
+            }
+
+        return await run_in_thread(ctx, collect)
     except Exception as e:
         logger.exception(f"Failed to get run details: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def list_objects(config_path: str) -> Dict[str, Any]:
+@memo.cached(scope="config")
+def list_objects(
+    config_path: str,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+) -> Dict[str, Any]:
     """List all pickable objects in a Copick project.
 
     Args:
         config_path: Path to the Copick configuration file.
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of pickable objects or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {"tool": "list_objects", "config_path": config_path}
+
         root = get_copick_root_from_file(config_path)
         objects = root.pickable_objects
 
+        table = RecordTable(
+            ("name", "is_particle", "label", "color", "radius", "pdb_id", "emdb_id", "identifier"),
+            optional=("radius", "pdb_id", "emdb_id", "identifier"),
+            key=("name",),
+            layout=layout,
+        )
         if not objects:
-            return {"success": True, "objects": [], "message": "No pickable objects found"}
-
-        objects_list = []
-        for obj in objects:
-            obj_dict = {
-                "name": obj.name,
-                "is_particle": obj.is_particle,
-                "label": obj.label,
-                "color": obj.color if obj.color else None,
+            return {
+                "success": True,
+                **render_listing({"objects": table}, layout, if_none_match, since_etag, scope),
+                "message": "No pickable objects found",
             }
-            if obj.radius:
-                obj_dict["radius"] = obj.radius
-            if obj.pdb_id:
-                obj_dict["pdb_id"] = obj.pdb_id
-            if obj.emdb_id:
-                obj_dict["emdb_id"] = obj.emdb_id
-            if obj.identifier:
-                obj_dict["identifier"] = obj.identifier
 
-            objects_list.append(obj_dict)
+        for obj in objects:
+            table.append(
+                obj.name,
+                obj.is_particle,
+                obj.label,
+                obj.color if obj.color else None,
+                obj.radius or None,
+                obj.pdb_id or None,
+                obj.emdb_id or None,
+                obj.identifier or None,
+            )
 
-        return {"success": True, "objects": objects_list, "count": len(objects_list)}
+        return {
+            "success": True,
+            **render_listing({"objects": table}, layout, if_none_match, since_etag, scope),
+            "count": len(table),
+        }
     except Exception as e:
         logger.exception(f"Failed to list objects: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def list_tomograms(config_path: str, run_name: str, voxel_spacing: float) -> Dict[str, Any]:
+@memo.cached(scope="run")
+def list_tomograms(
+    config_path: str,
+    run_name: str,
+    voxel_spacing: float,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+) -> Dict[str, Any]:
     """List all tomograms for a specific run and voxel spacing.
 
     Args:
         config_path: Path to the Copick configuration file.
         run_name: Name of the run.
         voxel_spacing: Voxel spacing to filter by.
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of tomograms or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {
+            "tool": "list_tomograms",
+            "config_path": config_path,
+            "run_name": run_name,
+            "voxel_spacing": voxel_spacing,
+        }
+
         root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        run = lookup_run(root, run_name)
 
         if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+            return not_found_response(run_not_found(root, run_name))
 
         vs = run.get_voxel_spacing(voxel_spacing)
         if not vs:
             return {"success": False, "error": f"Voxel spacing '{voxel_spacing}' not found in run '{run_name}'"}
 
         tomograms = vs.tomograms
+        table = RecordTable(("tomo_type", "features"), key=("tomo_type",), layout=layout)
         if not tomograms:
             return {
                 "success": True,
-                "tomograms": [],
+                **render_listing({"tomograms": table}, layout, if_none_match, since_etag, scope),
                 "message": f"No tomograms found for run '{run_name}' with voxel spacing '{voxel_spacing}'",
             }
 
-        tomograms_list = []
         for tomo in tomograms:
-            features = [{"feature_type": feature.feature_type} for feature in tomo.features]
-            tomograms_list.append({"tomo_type": tomo.tomo_type, "features": features})
+            table.append(tomo.tomo_type, [{"feature_type": feature.feature_type} for feature in tomo.features])
 
-        return {"success": True, "run_name": run_name, "voxel_spacing": voxel_spacing, "tomograms": tomograms_list}
+        return {
+            "success": True,
+            "run_name": run_name,
+            "voxel_spacing": voxel_spacing,
+            **render_listing({"tomograms": table}, layout, if_none_match, since_etag, scope),
+        }
     except Exception as e:
         logger.exception(f"Failed to list tomograms: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
+def describe_tomograms(
+    config_path: str,
+    run_name: str,
+    voxel_spacing: Optional[float] = None,
+    tomo_type: Optional[str] = None,
+    include_bytes: bool = True,
+) -> Dict[str, Any]:
+    """Describe the pyramid levels of the tomograms of a run without opening the data arrays.
+
+    Only the OME-Zarr `.zattrs`/`.zarray` metadata is read, in parallel across tomograms, and descriptions are cached
+    per store until one of its levels changes. On-disk sizes come with the time they were measured, since chunks
+    rewritten in place are not noticed.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        run_name: Name of the run.
+        voxel_spacing: Voxel spacing to filter by (optional).
+        tomo_type: Tomogram type to filter by (optional).
+        include_bytes: Whether to report the on-disk size of each level (optional, requires listing chunk files).
+
+    Returns:
+        Dictionary containing per-level shape, dtype, chunks, compressor and sizes of each tomogram or error message.
+    """
+    try:
+        from copick_mcp.volumes import describe_tomograms as describe
+
+        root = get_copick_root_from_file(config_path)
+        run = lookup_run(root, run_name)
+
+        if not run:
+            return not_found_response(run_not_found(root, run_name))
+
+        tomograms = describe(run, voxel_spacing=voxel_spacing, tomo_type=tomo_type, include_bytes=include_bytes)
+        return {"success": True, "run_name": run_name, "tomograms": tomograms, "count": len(tomograms)}
+    except Exception as e:
+        logger.exception(f"Failed to describe tomograms: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+@memo.cached(scope="run")
 def list_picks(
     config_path: str,
     run_name: str,
     object_name: Optional[str] = None,
     user_id: Optional[str] = None,
     session_id: Optional[str] = None,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List picks for a specific run, optionally filtered by object name, user ID, and session ID.
 
@@ -271,18 +516,40 @@ def list_picks(
         object_name: Name of the object to filter by (optional).
         user_id: User ID to filter by (optional).
         session_id: Session ID to filter by (optional).
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of picks or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {
+            "tool": "list_picks",
+            "config_path": config_path,
+            "run_name": run_name,
+            "object_name": object_name,
+            "user_id": user_id,
+            "session_id": session_id,
+        }
+
         root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        run = lookup_run(root, run_name)
 
         if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+            return not_found_response(run_not_found(root, run_name))
 
         picks = run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id)
+        table = RecordTable(
+            ("object_name", "user_id", "session_id", "num_points", "sample_points"),
+            optional=("sample_points",),
+            key=("object_name", "user_id", "session_id"),
+            layout=layout,
+        )
 
         if not picks:
             filters = []
@@ -293,34 +560,38 @@ def list_picks(
             if session_id:
                 filters.append(f"session '{session_id}'")
             filter_str = ", ".join(filters) if filters else ""
-            return {"success": True, "picks": [], "message": f"No picks found for run '{run_name}'{filter_str}"}
+            return {
+                "success": True,
+                **render_listing({"picks": table}, layout, if_none_match, since_etag, scope),
+                "message": f"No picks found for run '{run_name}'{filter_str}",
+            }
 
-        picks_list = []
         for pick in picks:
             num_points = len(pick.points) if pick.meta.points else 0
-            pick_dict = {
-                "object_name": pick.pickable_object_name,
-                "user_id": pick.user_id,
-                "session_id": pick.session_id,
-                "num_points": num_points,
-            }
 
             # Include first few points if available
+            sample_points = None
             if num_points > 0:
-                sample_points = []
-                for point in pick.points[:3]:  # First 3 points
-                    sample_points.append({"x": point.location.x, "y": point.location.y, "z": point.location.z})
-                pick_dict["sample_points"] = sample_points
+                sample_points = [
+                    {"x": point.location.x, "y": point.location.y, "z": point.location.z}
+                    for point in pick.points[:3]  # First 3 points
+                ]
 
-            picks_list.append(pick_dict)
+            table.append(pick.pickable_object_name, pick.user_id, pick.session_id, num_points, sample_points)
 
-        return {"success": True, "run_name": run_name, "picks": picks_list, "count": len(picks_list)}
+        return {
+            "success": True,
+            "run_name": run_name,
+            **render_listing({"picks": table}, layout, if_none_match, since_etag, scope),
+            "count": len(table),
+        }
     except Exception as e:
         logger.exception(f"Failed to list picks: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
+@memo.cached(scope="run")
 def list_segmentations(
     config_path: str,
     run_name: str,
@@ -329,6 +600,9 @@ def list_segmentations(
     user_id: Optional[str] = None,
     session_id: Optional[str] = None,
     is_multilabel: Optional[bool] = None,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List segmentations for a specific run, optionally filtered by various parameters.
 
@@ -340,16 +614,34 @@ def list_segmentations(
         user_id: User ID to filter by (optional).
         session_id: Session ID to filter by (optional).
         is_multilabel: Filter by multilabel status (optional).
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of segmentations or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {
+            "tool": "list_segmentations",
+            "config_path": config_path,
+            "run_name": run_name,
+            "voxel_size": voxel_size,
+            "name": name,
+            "user_id": user_id,
+            "session_id": session_id,
+            "is_multilabel": is_multilabel,
+        }
+
         root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        run = lookup_run(root, run_name)
 
         if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+            return not_found_response(run_not_found(root, run_name))
 
         segmentations = run.get_segmentations(
             voxel_size=voxel_size,
@@ -358,6 +650,7 @@ def list_segmentations(
             session_id=session_id,
             is_multilabel=is_multilabel,
         )
+        table = RecordTable(("name", "user_id", "session_id", "is_multilabel", "voxel_size"), layout=layout)
 
         if not segmentations:
             filters = []
@@ -374,27 +667,18 @@ def list_segmentations(
             filter_str = ", ".join(filters) if filters else ""
             return {
                 "success": True,
-                "segmentations": [],
+                **render_listing({"segmentations": table}, layout, if_none_match, since_etag, scope),
                 "message": f"No segmentations found for run '{run_name}'{filter_str}",
             }
 
-        segmentations_list = []
         for seg in segmentations:
-            segmentations_list.append(
-                {
-                    "name": seg.name,
-                    "user_id": seg.user_id,
-                    "session_id": seg.session_id,
-                    "is_multilabel": seg.is_multilabel,
-                    "voxel_size": seg.voxel_size,
-                },
-            )
+            table.append(seg.name, seg.user_id, seg.session_id, seg.is_multilabel, seg.voxel_size)
 
         return {
             "success": True,
             "run_name": run_name,
-            "segmentations": segmentations_list,
-            "count": len(segmentations_list),
+            **render_listing({"segmentations": table}, layout, if_none_match, since_etag, scope),
+            "count": len(table),
         }
     except Exception as e:
         logger.exception(f"Failed to list segmentations: {str(e)}")
@@ -402,45 +686,73 @@ def list_segmentations(
 
 
 @mcp.tool()
-def list_voxel_spacings(config_path: str, run_name: str) -> Dict[str, Any]:
+@memo.cached(scope="run")
+def list_voxel_spacings(
+    config_path: str,
+    run_name: str,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+) -> Dict[str, Any]:
     """List all voxel spacings for a specific run.
 
     Args:
         config_path: Path to the Copick configuration file.
         run_name: Name of the run.
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of voxel spacings or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {"tool": "list_voxel_spacings", "config_path": config_path, "run_name": run_name}
+
         root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        run = lookup_run(root, run_name)
 
         if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+            return not_found_response(run_not_found(root, run_name))
 
         voxel_spacings = run.voxel_spacings
+        table = RecordTable(("voxel_size", "tomogram_count"), layout=layout)
         if not voxel_spacings:
-            return {"success": True, "voxel_spacings": [], "message": f"No voxel spacings found for run '{run_name}'"}
+            return {
+                "success": True,
+                **render_listing({"voxel_spacings": table}, layout, if_none_match, since_etag, scope),
+                "message": f"No voxel spacings found for run '{run_name}'",
+            }
 
-        voxel_spacings_list = []
         for vs in voxel_spacings:
             tomo_count = len(vs.tomograms) if hasattr(vs, "tomograms") else 0
-            voxel_spacings_list.append({"voxel_size": vs.voxel_size, "tomogram_count": tomo_count})
+            table.append(vs.voxel_size, tomo_count)
 
-        return {"success": True, "run_name": run_name, "voxel_spacings": voxel_spacings_list}
+        return {
+            "success": True,
+            "run_name": run_name,
+            **render_listing({"voxel_spacings": table}, layout, if_none_match, since_etag, scope),
+        }
     except Exception as e:
         logger.exception(f"Failed to list voxel spacings: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
+@memo.cached(scope="run")
 def list_meshes(
     config_path: str,
     run_name: str,
     object_name: Optional[str] = None,
     user_id: Optional[str] = None,
     session_id: Optional[str] = None,
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List meshes for a specific run, optionally filtered by object name, user ID, and session ID.
 
@@ -450,18 +762,35 @@ def list_meshes(
         object_name: Name of the object to filter by (optional).
         user_id: User ID to filter by (optional).
         session_id: Session ID to filter by (optional).
+        layout: Layout of the listed entries, "records" (one object per entry) or "columns" (one list per field,
+            more compact for large listings) (optional).
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned (optional).
+        since_etag: ETag of a previous result. Only entries added and removed since then are returned (optional).
 
     Returns:
         Dictionary containing list of meshes or error message.
     """
     try:
+        from copick_mcp.records import RecordTable, render_listing
+
+        # Tool and arguments the ETag of the listing is scoped to
+        scope = {
+            "tool": "list_meshes",
+            "config_path": config_path,
+            "run_name": run_name,
+            "object_name": object_name,
+            "user_id": user_id,
+            "session_id": session_id,
+        }
+
         root = get_copick_root_from_file(config_path)
-        run = root.get_run(run_name)
+        run = lookup_run(root, run_name)
 
         if not run:
-            return {"success": False, "error": f"Run '{run_name}' not found"}
+            return not_found_response(run_not_found(root, run_name))
 
         meshes = run.get_meshes(object_name=object_name, user_id=user_id, session_id=session_id)
+        table = RecordTable(("object_name", "user_id", "session_id"), layout=layout)
 
         if not meshes:
             filters = []
@@ -472,15 +801,21 @@ def list_meshes(
             if session_id:
                 filters.append(f"session '{session_id}'")
             filter_str = ", ".join(filters) if filters else ""
-            return {"success": True, "meshes": [], "message": f"No meshes found for run '{run_name}'{filter_str}"}
+            return {
+                "success": True,
+                **render_listing({"meshes": table}, layout, if_none_match, since_etag, scope),
+                "message": f"No meshes found for run '{run_name}'{filter_str}",
+            }
 
-        meshes_list = []
         for mesh in meshes:
-            meshes_list.append(
-                {"object_name": mesh.pickable_object_name, "user_id": mesh.user_id, "session_id": mesh.session_id},
-            )
+            table.append(mesh.pickable_object_name, mesh.user_id, mesh.session_id)
 
-        return {"success": True, "run_name": run_name, "meshes": meshes_list, "count": len(meshes_list)}
+        return {
+            "success": True,
+            "run_name": run_name,
+            **render_listing({"meshes": table}, layout, if_none_match, since_etag, scope),
+            "count": len(table),
+        }
     except Exception as e:
         logger.exception(f"Failed to list meshes: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -522,6 +857,107 @@ def get_project_info(config_path: str) -> Dict[str, Any]:
 
 
 @mcp.tool()
+async def get_project_summary(
+    config_path: str,
+    count_points: bool = True,
+    refresh_runs: bool = False,
+    max_workers: Optional[int] = None,
+    max_missing_runs: int = 50,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Get project-wide totals aggregated over all runs.
+
+    Reports picks per object and user, meshes per object and user, segmentations per name, tomogram types per voxel
+    spacing (keyed like copick's directories, e.g. "10.000") and the runs missing each artifact. Runs are walked in
+    parallel and per-run results are cached, so repeated calls (including retries after a cancellation) only recompute
+    runs whose contents changed.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        count_points: Whether to load pick files to count the number of points (default: True).
+        refresh_runs: Re-query the list of runs before aggregating, to pick up newly added runs (default: False).
+        max_workers: Maximum number of parallel workers for the per-run walk (optional).
+        max_missing_runs: Maximum number of run names listed per missing artifact (default: 50).
+
+    Returns:
+        Dictionary containing the aggregated project summary or error message.
+    """
+    try:
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.project_summary import get_project_summary as summarize_project
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            if refresh_runs:
+                root.refresh()
+
+            return summarize_project(
+                root,
+                config_path,
+                count_points=count_points,
+                max_workers=max_workers,
+                max_missing_runs=max_missing_runs,
+                progress=progress,
+            )
+
+        summary = await run_in_thread(ctx, collect)
+
+        return {"success": True, "summary": summary}
+    except Exception as e:
+        logger.exception(f"Failed to get project summary: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+async def get_storage_report(
+    config_path: str,
+    refresh: bool = False,
+    max_workers: Optional[int] = None,
+    max_runs: int = 50,
+    max_warnings: int = 50,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Report how many bytes and files the runs of a project occupy, per artifact type and voxel spacing.
+
+    Voxel spacings are keyed like copick's directories (e.g. "10.000"). The static and overlay directories of all runs
+    are walked in parallel. Per-run results are cached and only runs whose contents changed are walked again on later
+    calls. Zarr stores with very many or very small chunk files, which are slow to list, copy and read, are flagged.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        refresh: Walk all runs again instead of reusing cached results (optional).
+        max_workers: Maximum number of threads used for the walk (optional).
+        max_runs: Maximum number of runs listed individually, largest first (optional, default 50).
+        max_warnings: Maximum number of chunking warnings listed (optional, default 50).
+
+    Returns:
+        Dictionary containing the storage report or error message.
+    """
+    try:
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.storage import get_storage_report as report
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            return report(
+                root,
+                config_path,
+                refresh=refresh,
+                max_workers=max_workers,
+                max_runs=max_runs,
+                max_warnings=max_warnings,
+                progress=progress,
+            )
+
+        storage = await run_in_thread(ctx, collect)
+        return {"success": True, "storage": storage}
+    except Exception as e:
+        logger.exception(f"Failed to get storage report: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+@memo.cached(scope="config")
 def get_json_config(config_path: str) -> Dict[str, Any]:
     """Get the JSON configuration of a Copick project.
 
@@ -544,62 +980,1263 @@ def get_json_config(config_path: str) -> Dict[str, Any]:
 
 
 # ============================================================================
-# CLI Introspection Tools
+# Analysis Tools
 # ============================================================================
 
 
 @mcp.tool()
-def list_copick_cli_commands() -> Dict[str, Any]:
-    """List all available copick CLI commands hierarchically.
+async def get_pick_statistics(
+    config_path: str,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    run_names: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Compute pick statistics (point counts, extents, nearest-neighbor distances) across runs.
+
+    The per-run analysis is sharded across a pool of worker processes. Progress is reported as runs complete.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        run_names: Names of the runs to analyze (optional, defaults to all runs).
+        max_workers: Maximum number of worker processes (optional, defaults to the number of CPU cores).
 
     Returns:
-        Dictionary containing complete command tree with groups and subcommands.
+        Dictionary containing per-run pick statistics or error message.
     """
     try:
-        from copick_mcp.cli_introspection import get_all_cli_commands
-
-        commands = get_all_cli_commands()
-        return {"success": True, "commands": commands}
+        from copick_mcp.parallel import RunJob, iter_run_jobs
+        from copick_mcp.progress import run_in_thread
+
+        def collect(progress=None):
+            names = run_names
+            if names is None:
+                names = [run.name for run in get_copick_root_from_file(config_path).runs]
+
+            params = {"object_name": object_name, "user_id": user_id, "session_id": session_id}
+            jobs = [RunJob(config_path, run_name, "pick_statistics", params) for run_name in names]
+            return list(iter_run_jobs(jobs, max_workers=max_workers, progress=progress))
+
+        results = await run_in_thread(ctx, collect)
+
+        runs = {}
+        errors = {}
+        total_points = 0
+        for result in sorted(results, key=lambda r: r["run_name"]):
+            if not result["success"]:
+                errors[result["run_name"]] = result["error"]
+                continue
+            if result["result"]:
+                runs[result["run_name"]] = result["result"]
+                total_points += sum(stats["num_points"] for stats in result["result"])
+
+        response = {
+            "success": True,
+            "runs": runs,
+            "runs_with_picks": len(runs),
+            "runs_processed": len(results),
+            "total_points": total_points,
+        }
+        if errors:
+            response["errors"] = errors
+        return response
     except Exception as e:
-        logger.exception(f"Failed to list CLI commands: {str(e)}")
+        logger.exception(f"Failed to get pick statistics: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def get_copick_cli_command_info(command_path: str) -> Dict[str, Any]:
-    """Get full details for a specific copick CLI command.
+async def sample_picks(
+    config_path: str,
+    sample_size: int = 200,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    seed: Optional[int] = None,
+    stratify_by: Optional[str] = None,
+    run_names: Optional[List[str]] = None,
+    layout: str = "records",
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Draw a random sample of picks across all runs, e.g. 200 particles of an object for spot-checking.
+
+    Every pick file is read once by a pool of worker processes. The sample is uniform without replacement and is
+    reproducible: the same seed returns the same sample. With stratification, each stratum (e.g. each run or user)
+    gets its own sample of `sample_size` points. Progress is reported as runs complete.
 
     Args:
-        command_path: Path to the command (e.g., "convert.picks2seg" for subcommands or "add" for main commands).
+        config_path: Path to the Copick configuration file.
+        sample_size: Number of points to sample (per stratum if stratified) (optional, default 200).
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        seed: Random seed (optional, a random seed is drawn and returned if not given).
+        stratify_by: Sample each "run", "user_id", "session_id" or "object_name" separately (optional).
+        run_names: Names of the runs to sample from (optional, defaults to all runs).
+        layout: Layout of the sampled picks, "records" or "columns" (optional).
+        max_workers: Maximum number of worker processes (optional, defaults to the number of CPU cores).
 
     Returns:
-        Dictionary containing command details including parameters, help text, and examples.
+        Dictionary containing the sampled picks with their run, object, user and session or error message.
     """
     try:
-        from copick_mcp.cli_introspection import get_command_info
+        import secrets
+
+        from copick_mcp.parallel import RunJob, iter_run_jobs
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.records import RecordTable, check_layout
+        from copick_mcp.sampling import STRATA, merge_samples
+
+        check_layout(layout)
+        if sample_size < 1:
+            return {"success": False, "error": "sample_size must be at least 1"}
+        if stratify_by is not None and stratify_by not in STRATA:
+            return {"success": False, "error": f"Unknown stratify_by '{stratify_by}'. Use one of: {', '.join(STRATA)}"}
+        used_seed = seed if seed is not None else secrets.randbits(32)
+
+        def collect(progress=None):
+            names = run_names
+            if names is None:
+                names = [run.name for run in get_copick_root_from_file(config_path).runs]
+
+            params = {
+                "sample_size": sample_size,
+                "seed": used_seed,
+                "object_name": object_name,
+                "user_id": user_id,
+                "session_id": session_id,
+                "stratify_by": stratify_by,
+            }
+            jobs = [RunJob(config_path, run_name, "sample_picks", params) for run_name in names]
+            return list(iter_run_jobs(jobs, max_workers=max_workers, progress=progress))
 
-        return get_command_info(command_path)
+        results = await run_in_thread(ctx, collect)
+
+        errors = {result["run_name"]: result["error"] for result in results if not result["success"]}
+        merged = merge_samples((result["result"] for result in results if result["success"]), sample_size)
+
+        fields = ("run_name", "object_name", "user_id", "session_id", "point_index", "x", "y", "z")
+        table = RecordTable(
+            (("stratum",) if stratify_by else ()) + fields + ("score", "instance_id"),
+            optional=("score", "instance_id"),
+            layout=layout,
+        )
+        for stratum, entries in merged["samples"].items():
+            for entry in entries:
+                values = [entry[field] for field in fields[:5]] + entry["location"]
+                table.append(*(([stratum] if stratify_by else []) + values + [entry["score"], entry["instance_id"]]))
+
+        response = {
+            "success": True,
+            "seed": used_seed,
+            "picks": table.render(layout),
+            "sampled": len(table),
+            "total_points": sum(merged["counts"].values()),
+            "runs_processed": len(results),
+        }
+        if stratify_by:
+            response["strata"] = {
+                stratum: {"points": count, "sampled": len(merged["samples"].get(stratum, []))}
+                for stratum, count in merged["counts"].items()
+            }
+        if errors:
+            response["errors"] = errors
+        return response
     except Exception as e:
-        logger.exception(f"Failed to get CLI command info: {str(e)}")
+        logger.exception(f"Failed to sample picks: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def validate_copick_cli_command(command_string: str) -> Dict[str, Any]:
-    """Validate a copick CLI command string using Click's native parsing.
+async def get_pick_density(
+    config_path: str,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    run_names: Optional[List[str]] = None,
+    bins: Union[int, List[int]] = 16,
+    bin_size: Optional[float] = None,
+    pooled: bool = False,
+    output: str = "projections",
+    top_bins: int = 5,
+    voxel_spacing: Optional[float] = None,
+    segmentation_name: Optional[str] = None,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: str = "0",
+    exist_ok: bool = False,
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Map where picks lie within tomograms by binning their coordinates into a coarse 3D grid, per run or pooled.
+
+    Useful to find under-annotated regions or clustering artifacts. The grid spans each run's tomogram (or its
+    picks, for runs without a tomogram). Pooled maps bin coordinates normalized by each run's tomogram extent, so all
+    runs share one grid. Runs are binned by a pool of worker processes and progress is reported as runs complete.
 
     Args:
-        command_string: Full CLI command string (e.g., "copick convert picks2seg --config /path/to/config.json ...").
+        config_path: Path to the Copick configuration file.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        run_names: Names of the runs to map (optional, defaults to all runs).
+        bins: Number of bins along every axis, or along x, y and z (optional, default 16).
+        bin_size: Edge length of the bins in angstrom, instead of a number of bins (optional, not with pooled).
+        pooled: Return one map of all runs in normalized coordinates instead of one map per run (optional).
+        output: "projections" (counts summed along z, y and x, as (y, x), (z, x) and (z, y) arrays), "grid" (the
+            full (z, y, x) counts) or "stats" (only statistics and densest bins) (optional, default "projections").
+        top_bins: Number of densest bins to list (optional, default 5).
+        voxel_spacing: Voxel spacing of the tomogram defining the extent of each run (optional, defaults to the
+            smallest voxel spacing with a tomogram).
+        segmentation_name: If given, write each run's map as a multilabel segmentation with this name, whose voxels
+            are the bins and whose values are the counts (optional, requires bin_size, not with pooled).
+        seg_user_id: User ID of the written segmentations (optional, defaults to the user ID of the config).
+        seg_session_id: Session ID of the written segmentations (optional, default "0").
+        exist_ok: Replace existing segmentations with the same name, user and session instead of failing (optional).
+        max_workers: Maximum number of worker processes (optional, defaults to the number of CPU cores).
 
     Returns:
-        Dictionary containing validation status, error messages, and suggestions.
+        Dictionary containing the density map(s) with occupancy statistics and densest bins or error message.
     """
     try:
-        from copick_mcp.cli_introspection import validate_copick_cli_command as validate_cmd
+        import numpy as np
+
+        from copick_mcp.density import DENSITY_OUTPUTS, grid_shape, summarize_density
+        from copick_mcp.parallel import RunJob, iter_run_jobs
+        from copick_mcp.progress import run_in_thread
+
+        if output not in DENSITY_OUTPUTS:
+            return {"success": False, "error": f"Unknown output '{output}'. Use one of: {', '.join(DENSITY_OUTPUTS)}"}
+        if pooled and bin_size is not None:
+            return {"success": False, "error": "bin_size cannot be used with pooled maps, use bins instead"}
+        if segmentation_name is not None and (pooled or bin_size is None):
+            return {"success": False, "error": "Writing segmentations requires bin_size and per-run maps"}
+        grid_shape(bins, bin_size, np.ones(3))
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            names = run_names
+            if names is None:
+                names = [run.name for run in root.runs]
+
+            segmentation = None
+            if segmentation_name is not None:
+                segmentation = {
+                    "name": segmentation_name,
+                    "user_id": seg_user_id or root.config.user_id,
+                    "session_id": seg_session_id,
+                    "exist_ok": exist_ok,
+                }
+            params = {
+                "bins": bins,
+                "bin_size": bin_size,
+                "normalized": pooled,
+                "object_name": object_name,
+                "user_id": user_id,
+                "session_id": session_id,
+                "voxel_spacing": voxel_spacing,
+                "segmentation": segmentation,
+            }
+            jobs = [RunJob(config_path, run_name, "pick_density", params) for run_name in names]
+            return list(iter_run_jobs(jobs, max_workers=max_workers, progress=progress))
 
-        return validate_cmd(command_string)
+        results = await run_in_thread(ctx, collect)
+
+        errors = {result["run_name"]: result["error"] for result in results if not result["success"]}
+        maps = {
+            result["run_name"]: result["result"]
+            for result in sorted(results, key=lambda r: r["run_name"])
+            if result["success"]
+        }
+
+        response: Dict[str, Any] = {"success": True, "runs_processed": len(results)}
+        if pooled:
+            counts = sum(density["counts"] for density in maps.values())
+            if not maps:
+                counts = np.zeros(grid_shape(bins)[::-1], dtype=np.int64)
+            response["pooled"] = {
+                "coordinates": "normalized",
+                "runs_with_picks": sum(1 for density in maps.values() if density["points"]),
+                "outside_points": sum(density["outside"] for density in maps.values()),
+                **summarize_density(counts, [1.0, 1.0, 1.0], output=output, top_bins=top_bins),
+            }
+        else:
+            runs = {}
+            for name, density in maps.items():
+                if not density["points"] and "segmentation" not in density:
+                    continue
+                entry = {
+                    "extent": density["extent"],
+                    "extent_source": density["extent_source"],
+                    "outside_points": density["outside"],
+                    **summarize_density(density["counts"], density["upper"], output=output, top_bins=top_bins),
+                }
+                if "segmentation" in density:
+                    entry["segmentation"] = density["segmentation"]
+                runs[name] = entry
+            response["runs"] = runs
+            response["runs_with_picks"] = sum(1 for density in maps.values() if density["points"])
+        response["total_points"] = sum(density["points"] for density in maps.values())
+        if errors:
+            response["errors"] = errors
+        return response
     except Exception as e:
-        logger.exception(f"Failed to validate CLI command: {str(e)}")
+        logger.exception(f"Failed to get pick density: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def query_picks_spatial(
+    config_path: str,
+    run_name: str,
+    mode: str,
+    center: Optional[List[float]] = None,
+    radius: Optional[float] = None,
+    k: Optional[int] = None,
+    min_corner: Optional[List[float]] = None,
+    max_corner: Optional[List[float]] = None,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    max_results: int = 1000,
+) -> Dict[str, Any]:
+    """Find picks within a radius of a location, nearest to a location, or inside a box.
+
+    Coordinates are in angstrom. KD-trees over the pick sets are built on first use and cached until the pick files
+    change, so repeated queries against the same run are fast.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        run_name: Name of the run to query.
+        mode: "radius" (picks within `radius` of `center`), "knn" (the `k` picks nearest to `center`) or "box"
+            (picks between `min_corner` and `max_corner`).
+        center: Query location [x, y, z] (radius and knn modes).
+        radius: Query radius (radius mode).
+        k: Number of nearest picks (knn mode).
+        min_corner: Lower corner [x, y, z] of the box (box mode).
+        max_corner: Upper corner [x, y, z] of the box (box mode).
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        max_results: Maximum number of matches to return (optional, default 1000).
+
+    Returns:
+        Dictionary containing the matching picks or error message.
+    """
+    try:
+        from copick_mcp.spatial import query_picks_spatial as query
+
+        root = get_copick_root_from_file(config_path)
+        run = lookup_run(root, run_name)
+
+        if not run:
+            return not_found_response(run_not_found(root, run_name))
+
+        result = query(
+            run,
+            mode,
+            center=center,
+            radius=radius,
+            k=k,
+            min_corner=min_corner,
+            max_corner=max_corner,
+            object_name=object_name,
+            user_id=user_id,
+            session_id=session_id,
+            max_results=max_results,
+        )
+        return {"success": True, "run_name": run_name, "mode": mode, **result}
+    except Exception as e:
+        logger.exception(f"Failed to query picks: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def picks_in_segmentation(
+    config_path: str,
+    run_name: str,
+    segmentation_name: str,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    return_point_labels: bool = False,
+) -> Dict[str, Any]:
+    """Count how many picks fall inside each label of a segmentation (e.g. particles on a membrane).
+
+    Only the segmentation chunks containing picks are read, so this scales to large pick sets without loading the
+    full mask.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        run_name: Name of the run.
+        segmentation_name: Name of the segmentation.
+        seg_user_id: User ID of the segmentation (optional, required if several segmentations match).
+        seg_session_id: Session ID of the segmentation (optional, required if several segmentations match).
+        voxel_size: Voxel size of the segmentation (optional, required if several segmentations match).
+        object_name: Name of the picked object to filter by (optional).
+        user_id: User ID of the picks to filter by (optional).
+        session_id: Session ID of the picks to filter by (optional).
+        return_point_labels: Whether to return the segmentation label at every point (optional, -1 if outside).
+
+    Returns:
+        Dictionary containing per-pick-set hit counts per label or error message.
+    """
+    try:
+        from copick_mcp.spatial import picks_in_segmentation as count_hits
+
+        root = get_copick_root_from_file(config_path)
+        run = lookup_run(root, run_name)
+
+        if not run:
+            return not_found_response(run_not_found(root, run_name))
+
+        result = count_hits(
+            run,
+            segmentation_name,
+            seg_user_id=seg_user_id,
+            seg_session_id=seg_session_id,
+            voxel_size=voxel_size,
+            object_name=object_name,
+            user_id=user_id,
+            session_id=session_id,
+            return_point_labels=return_point_labels,
+        )
+        return {"success": True, "run_name": run_name, **result}
+    except Exception as e:
+        logger.exception(f"Failed to count picks in segmentation: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+async def count_segmentation_instances(
+    config_path: str,
+    run_name: str,
+    segmentation_name: str,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+    min_size: int = 1,
+    max_sizes: int = 10,
+    refresh: bool = False,
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Count the instances (connected components) of each label of a segmentation and their size distribution.
+
+    Voxels with the same label sharing a face belong to the same instance (e.g. one membrane or organelle). Chunks
+    are labeled in parallel with bounded memory and merged across chunk faces. Results are cached per segmentation
+    and reused until it changes. Progress is reported as chunks are labeled.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        run_name: Name of the run.
+        segmentation_name: Name of the segmentation.
+        seg_user_id: User ID of the segmentation (optional, required if several segmentations match).
+        seg_session_id: Session ID of the segmentation (optional, required if several segmentations match).
+        voxel_size: Voxel size of the segmentation (optional, required if several segmentations match).
+        min_size: Ignore instances smaller than this many voxels, e.g. noise specks (optional, default 1).
+        max_sizes: Number of largest instance sizes to list per label (optional, default 10).
+        refresh: Label the segmentation again even if cached results are available (optional).
+        max_workers: Maximum number of threads labeling chunks (optional).
+
+    Returns:
+        Dictionary containing per-label instance counts, size statistics and size histograms or error message.
+    """
+    try:
+        from copick_mcp.instances import count_instances_cached, summarize_instances
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.spatial import select_segmentation
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            run = lookup_run(root, run_name)
+            if not run:
+                raise run_not_found(root, run_name)
+
+            seg = select_segmentation(run, segmentation_name, seg_user_id, seg_session_id, voxel_size)
+            instances, computed = count_instances_cached(
+                seg.zarr(),
+                refresh=refresh,
+                max_workers=max_workers,
+                progress=progress.update if progress is not None else None,
+            )
+            # Binary segmentations are named after their object, multilabel ones use the object labels of the project.
+            label_names = {1: seg.name}
+            if seg.is_multilabel:
+                label_names = {obj.label: obj.name for obj in root.pickable_objects}
+            labels = summarize_instances(instances, seg.voxel_size, label_names, min_size=min_size, max_sizes=max_sizes)
+            return seg, labels, computed
+
+        seg, labels, computed = await run_in_thread(ctx, collect)
+        return {
+            "success": True,
+            "run_name": run_name,
+            "segmentation": {
+                "name": seg.name,
+                "user_id": seg.user_id,
+                "session_id": seg.session_id,
+                "voxel_size": seg.voxel_size,
+                "is_multilabel": seg.is_multilabel,
+            },
+            "cached": not computed,
+            "labels": labels,
+            "total_instances": sum(label["instances"] for label in labels),
+        }
+    except Exception as e:
+        logger.exception(f"Failed to count segmentation instances: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+async def get_tomogram_thumbnail(
+    config_path: str,
+    run_name: str,
+    voxel_size: float,
+    tomo_type: str,
+    views: Optional[List[str]] = None,
+    max_size: int = 256,
+    segmentation_name: Optional[str] = None,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: Optional[str] = None,
+    overlay_picks: bool = False,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    include_data: bool = True,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Get low-resolution PNG thumbnails of a tomogram: central slices and mean-intensity projections along each axis.
+
+    Thumbnails are computed from the coarsest pyramid level, optionally with segmentation labels and picks drawn in
+    the color of their object. They are cached on disk and reused until the tomogram, segmentation or picks change,
+    so repeated requests return almost instantly.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        run_name: Name of the run.
+        voxel_size: Voxel size of the tomogram.
+        tomo_type: Type of the tomogram (e.g. "wbp").
+        views: Views to render (optional, default all): "slice_z", "slice_y", "slice_x" (central slices) and
+            "mean_z", "mean_y", "mean_x" (projections). Views along z are (y, x) images, views along y and x are
+            (z, x) and (z, y) images.
+        max_size: Maximum width and height of the thumbnails in pixels (optional, default 256).
+        segmentation_name: Name of a segmentation to overlay (optional).
+        seg_user_id: User ID of the segmentation (optional, required if several segmentations match).
+        seg_session_id: Session ID of the segmentation (optional, required if several segmentations match).
+        overlay_picks: Whether to draw picks (optional, in slices only picks within their object's radius).
+        object_name: Name of the object of the picks to draw (optional).
+        user_id: User ID of the picks to draw (optional).
+        session_id: Session ID of the picks to draw (optional).
+        include_data: Whether to return the PNGs base64-encoded, in addition to their paths (optional).
+
+    Returns:
+        Dictionary containing the path, size and (optionally) data of each thumbnail or error message.
+    """
+    try:
+        import base64
+
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.thumbnails import tomogram_thumbnails
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            run = lookup_run(root, run_name)
+            if not run:
+                raise run_not_found(root, run_name)
+
+            result = tomogram_thumbnails(
+                run,
+                voxel_size,
+                tomo_type,
+                views=views,
+                max_size=max_size,
+                segmentation_name=segmentation_name,
+                seg_user_id=seg_user_id,
+                seg_session_id=seg_session_id,
+                overlay_picks=overlay_picks,
+                object_name=object_name,
+                user_id=user_id,
+                session_id=session_id,
+                progress=progress.update if progress is not None else None,
+            )
+            if include_data:
+                for thumbnail in result["views"].values():
+                    with open(thumbnail["path"], "rb") as f:
+                        thumbnail["png_base64"] = base64.b64encode(f.read()).decode("ascii")
+            return result
+
+        result = await run_in_thread(ctx, collect)
+        return {"success": True, "run_name": run_name, "voxel_size": voxel_size, "tomo_type": tomo_type, **result}
+    except Exception as e:
+        logger.exception(f"Failed to get tomogram thumbnail: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# Data Writing Tools
+# ============================================================================
+
+
+@mcp.tool()
+async def add_picks_bulk(
+    config_path: str,
+    object_name: str,
+    session_id: str,
+    user_id: Optional[str] = None,
+    points: Optional[Dict[str, List[Any]]] = None,
+    path: Optional[str] = None,
+    run_name: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+    exist_ok: bool = False,
+    max_workers: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Write picks for many runs at once from coordinate arrays.
+
+    Points are given as columns, inline or in an NPY/Parquet file: "run_name", "x", "y", "z" (angstrom), and
+    optionally "score", "instance_id" and "transform" (4x4 matrix per point). Each run's pick file is written in
+    parallel and atomically. Nothing is written if a name, run or column is invalid, or (without `exist_ok`) if
+    picks with the same object, user and session already exist in any of the runs. Progress is reported as runs are
+    written.
+
+    Args:
+        config_path: Path to the Copick configuration file.
+        object_name: Name of the pickable object (must exist in the config, no underscores).
+        session_id: Session ID of the picks (no underscores).
+        user_id: User ID of the picks (optional, defaults to the user ID of the config, no underscores).
+        points: Columns of the points, e.g. {"run_name": [...], "x": [...], "y": [...], "z": [...]} (optional).
+        path: Path to an NPY or Parquet file with the columns, instead of points (optional).
+        run_name: Run of all points, if there is no run_name column (optional).
+        voxel_size: If given, coordinates are voxel indices at this voxel size and are converted to angstrom
+            (optional).
+        exist_ok: Replace existing picks with the same object, user and session instead of failing (optional).
+        max_workers: Maximum number of worker processes (optional, defaults to the number of CPU cores).
+
+    Returns:
+        Dictionary containing the number of points written per run or error message.
+    """
+    try:
+        from copick_mcp.bulk_picks import check_name, existing_pick_runs, group_by_run, load_points, register_picks
+        from copick_mcp.names import get_name_index
+        from copick_mcp.parallel import RunJob, iter_run_jobs
+        from copick_mcp.progress import run_in_thread
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            uid = user_id if user_id is not None else root.config.user_id
+            if uid is None:
+                raise ValueError("user_id must be given or set in the config")
+            check_name(object_name, "object_name")
+            check_name(session_id, "session_id")
+            check_name(uid, "user_id")
+            if root.get_object(object_name) is None:
+                raise object_not_found(root, object_name)
+
+            groups = group_by_run(load_points(points, path, run_name, voxel_size))
+            run_index = get_name_index(root).runs()
+            missing = sorted(name for name in groups if name not in run_index)
+            if missing:
+                described = []
+                for name in missing[:10]:
+                    suggestions = run_index.suggest(name, limit=1)
+                    described.append(f"{name} (did you mean {suggestions[0]}?)" if suggestions else name)
+                raise ValueError(f"{len(missing)} runs not found: {', '.join(described)}")
+
+            if not exist_ok:
+                # Check all runs before writing any, so that the upload is not applied to some runs only
+                existing = existing_pick_runs([lookup_run(root, name) for name in groups], object_name, uid, session_id)
+                if existing:
+                    raise ValueError(
+                        f"Picks for {object_name} by {uid} already exist in session {session_id} in {len(existing)} "
+                        f"runs: {', '.join(existing[:10])} (use exist_ok to replace them)",
+                    )
+
+            common = {"object_name": object_name, "user_id": uid, "session_id": session_id, "exist_ok": exist_ok}
+            jobs = [RunJob(config_path, name, "write_picks", {**common, **arrays}) for name, arrays in groups.items()]
+            results = list(iter_run_jobs(jobs, max_workers=max_workers, progress=progress))
+
+            # Pick files were written by worker processes, update the pick objects cached by this process
+            for result in results:
+                if result["success"]:
+                    register_picks(lookup_run(root, result["run_name"]), object_name, uid, session_id)
+            return uid, results
+
+        uid, results = await run_in_thread(ctx, collect)
+
+        runs = {}
+        errors = {}
+        replaced = 0
+        for result in sorted(results, key=lambda r: r["run_name"]):
+            if not result["success"]:
+                errors[result["run_name"]] = result["error"]
+                continue
+            runs[result["run_name"]] = result["result"]["num_points"]
+            replaced += result["result"]["replaced"]
+
+        response = {
+            "success": True,
+            "object_name": object_name,
+            "user_id": uid,
+            "session_id": session_id,
+            "runs": runs,
+            "runs_written": len(runs),
+            "runs_replaced": replaced,
+            "points_written": sum(runs.values()),
+        }
+        if errors:
+            response["errors"] = errors
+        return response
+    except Exception as e:
+        logger.exception(f"Failed to add picks: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# Federated Queries
+# ============================================================================
+
+# Tools that can be run on several projects at once
+FEDERATED_TOOLS = {
+    fn.__name__: fn
+    for fn in (
+        list_runs,
+        get_run_details,
+        list_objects,
+        list_tomograms,
+        describe_tomograms,
+        list_picks,
+        list_segmentations,
+        list_voxel_spacings,
+        list_meshes,
+        get_project_info,
+        get_project_summary,
+        get_storage_report,
+        get_pick_statistics,
+    )
+}
+
+
+@mcp.tool()
+async def federated_query(
+    tool: str,
+    config_paths: Optional[List[str]] = None,
+    group: Optional[str] = None,
+    arguments: Optional[Dict[str, Any]] = None,
+    layout: str = "records",
+    max_concurrency: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Run a listing or statistics tool on several Copick projects and merge the results.
+
+    Projects are processed concurrently and share the server's cache of opened projects. Entries of listed tables
+    (e.g. "runs", "picks") are merged into one table with a "config_path" column, numeric fields are summed in
+    "totals", and all other fields are reported per project. Progress is reported as projects complete.
+
+    Args:
+        tool: Name of the tool to run, one of list_runs, get_run_details, list_objects, list_tomograms,
+            describe_tomograms, list_picks, list_segmentations, list_voxel_spacings, list_meshes, get_project_info,
+            get_project_summary, get_storage_report, get_pick_statistics.
+        config_paths: Paths to the Copick configuration files (optional if a group is given).
+        group: Name of a project group defined in the COPICK_MCP_PROJECT_GROUPS file (optional).
+        arguments: Arguments of the tool other than config_path, e.g. {"run_name": "TS_001"} (optional).
+        layout: Layout of the merged tables, "records" or "columns" (optional).
+        max_concurrency: Maximum number of projects processed at once (optional, defaults to all).
+
+    Returns:
+        Dictionary containing the merged results with per-project provenance or error message.
+    """
+    try:
+        import anyio
+        import anyio.to_thread
+
+        from copick_mcp.federation import RESERVED_ARGUMENTS, merge_results, resolve_projects
+        from copick_mcp.profiling import profile_in_thread
+        from copick_mcp.records import check_layout
+
+        if tool not in FEDERATED_TOOLS:
+            raise ValueError(f"Tool '{tool}' cannot be federated. Valid tools: {', '.join(FEDERATED_TOOLS)}")
+        check_layout(layout)
+        arguments = dict(arguments or {})
+        reserved = sorted(set(arguments) & set(RESERVED_ARGUMENTS))
+        if reserved:
+            raise ValueError(f"Arguments not supported in federated queries: {', '.join(reserved)}")
+
+        fn = FEDERATED_TOOLS[tool]
+        if "layout" in inspect.signature(fn).parameters:
+            # Merged from records, the requested layout applies to the merged tables
+            arguments["layout"] = "records"
+
+        projects = await anyio.to_thread.run_sync(resolve_projects, config_paths, group)
+        results: Dict[str, Dict[str, Any]] = {}
+        limiter = anyio.CapacityLimiter(max_concurrency or len(projects))
+
+        async def run(config_path: str) -> None:
+            async with limiter:
+                try:
+                    if inspect.iscoroutinefunction(fn):
+                        result = await fn(config_path, **arguments)
+                    else:
+                        call = functools.partial(fn, config_path, **arguments)
+                        result = await anyio.to_thread.run_sync(profile_in_thread(call))
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+            results[config_path] = result
+            if ctx is not None:
+                await ctx.report_progress(len(results), len(projects), f"{len(results)}/{len(projects)} projects")
+
+        async with anyio.create_task_group() as tg:
+            for config_path in projects:
+                tg.start_soon(run, config_path)
+
+        merged = merge_results({config_path: results[config_path] for config_path in projects}, layout)
+        return {"success": True, "tool": tool, "config_paths": projects, **merged}
+    except Exception as e:
+        logger.exception(f"Failed to run federated query: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def list_project_groups() -> Dict[str, Any]:
+    """List the project groups usable in federated queries.
+
+    Groups are defined in the JSON file given by the COPICK_MCP_PROJECT_GROUPS environment variable, mapping group
+    names to lists of configuration file paths.
+
+    Returns:
+        Dictionary containing the configuration files of each group or error message.
+    """
+    try:
+        from copick_mcp.federation import load_project_groups
+
+        groups = load_project_groups()
+        return {"success": True, "groups": groups, "count": len(groups)}
+    except Exception as e:
+        logger.exception(f"Failed to list project groups: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# Background Jobs
+# ============================================================================
+
+# Lazily created background job manager
+_job_manager: Any = None
+
+
+def get_job_manager():
+    """Get or initialize the background job manager.
+
+    Returns:
+        The `JobManager` instance of this server.
+    """
+    global _job_manager
+    if _job_manager is None:
+        from copick_mcp.jobs import JobManager
+
+        _job_manager = JobManager(get_root=get_copick_root_from_file)
+    return _job_manager
+
+
+@mcp.tool()
+def submit_job(kind: str, params: Dict[str, Any], priority: int = 0, force: bool = False) -> Dict[str, Any]:
+    """Submit an expensive project-wide query to run in the background.
+
+    Available kinds are "project_summary", "pick_statistics", "pick_qc" and "segmentation_volumes", which require
+    `config_path` in `params`; the remaining parameters match the corresponding tool or per-run analysis (e.g.
+    `object_name`, `user_id`, `session_id`, `run_names`, `max_workers`). The "copick_command" kind takes the
+    parameters of `execute_copick_command` instead. Submitting a job identical to a queued, running or finished one
+    returns the existing job, as long as the project's configuration file and list of runs are unchanged; use `force`
+    to recompute after the data within runs changed.
+
+    Args:
+        kind: Kind of job to run.
+        params: Parameters of the job.
+        priority: Priority of the job, higher runs first (optional, default 0).
+        force: Recompute even if an identical job already exists (optional).
+
+    Returns:
+        Dictionary containing the job handle and state or error message.
+    """
+    try:
+        job, deduplicated = get_job_manager().submit(kind, params, priority=priority, force=force)
+        return {"success": True, "job_id": job.job_id, "status": job.status, "deduplicated": deduplicated}
+    except Exception as e:
+        logger.exception(f"Failed to submit job: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def get_job_status(job_id: str) -> Dict[str, Any]:
+    """Get the state and progress of a background job.
+
+    Args:
+        job_id: Identifier returned by `submit_job`.
+
+    Returns:
+        Dictionary containing the job state or error message.
+    """
+    try:
+        status = get_job_manager().status(job_id)
+        if status is None:
+            return {"success": False, "error": f"Job {job_id} not found"}
+        return {"success": True, "job": status}
+    except Exception as e:
+        logger.exception(f"Failed to get job status: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def get_job_result(job_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """Get the result of a finished background job, one page of result items at a time.
+
+    Args:
+        job_id: Identifier returned by `submit_job`.
+        offset: Index of the first result item to return (optional, default 0).
+        limit: Maximum number of result items to return (optional, default 100).
+
+    Returns:
+        Dictionary containing the (paged) job result or error message.
+    """
+    try:
+        manager = get_job_manager()
+        status = manager.status(job_id)
+        if status is None:
+            return {"success": False, "error": f"Job {job_id} not found"}
+        if status["status"] != "succeeded":
+            return {"success": False, "error": f"Job {job_id} is {status['status']}", "job": status}
+
+        result = manager.result(job_id, offset=offset, limit=limit)
+        if result is None:
+            return {"success": False, "error": f"Result of job {job_id} is no longer available"}
+        return {"success": True, "job_id": job_id, "result": result}
+    except Exception as e:
+        logger.exception(f"Failed to get job result: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running background job.
+
+    Args:
+        job_id: Identifier returned by `submit_job`.
+
+    Returns:
+        Dictionary indicating whether the job was cancelled or error message.
+    """
+    try:
+        manager = get_job_manager()
+        cancelled = manager.cancel(job_id)
+        status = manager.status(job_id)
+        if status is None:
+            return {"success": False, "error": f"Job {job_id} not found"}
+        return {"success": True, "cancelled": cancelled, "job": status}
+    except Exception as e:
+        logger.exception(f"Failed to cancel job: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def list_jobs() -> Dict[str, Any]:
+    """List the background jobs submitted to this server.
+
+    Returns:
+        Dictionary containing the states of all jobs or error message.
+    """
+    try:
+        jobs = get_job_manager().list_jobs()
+        return {"success": True, "jobs": jobs, "count": len(jobs)}
+    except Exception as e:
+        logger.exception(f"Failed to list jobs: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# Server Caches
+# ============================================================================
+
+
+@mcp.tool()
+def get_cache_stats(clear_chunk_cache: bool = False, clear_result_cache: bool = False) -> Dict[str, Any]:
+    """Get statistics of the server's caches.
+
+    Reports the local chunk cache for remote static stores, the tool result cache, the KD-tree cache used by
+    spatial pick queries and the pooled portal connections.
+
+    Args:
+        clear_chunk_cache: Delete all files of the local chunk cache before reporting (optional).
+        clear_result_cache: Drop all memoized tool results before reporting, e.g. after zarr chunks were overwritten
+            in place, which run fingerprints do not detect (optional).
+
+    Returns:
+        Dictionary containing cache statistics or error message.
+    """
+    try:
+        from copick_mcp.chunk_cache import get_chunk_cache
+        from copick_mcp.connections import connection_stats
+        from copick_mcp.spatial import kdtree_cache
+
+        chunk_cache = get_chunk_cache()
+        if chunk_cache is not None and clear_chunk_cache:
+            chunk_cache.clear()
+        if clear_result_cache:
+            memo.clear()
+
+        return {
+            "success": True,
+            "chunk_cache": chunk_cache.stats() if chunk_cache is not None else {"enabled": False},
+            "result_cache": memo.stats(),
+            "kdtree_cache": kdtree_cache.stats(),
+            "connections": connection_stats(),
+        }
+    except Exception as e:
+        logger.exception(f"Failed to get cache stats: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+async def refresh_portal_metadata(
+    config_path: str,
+    full: bool = False,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Refresh the local metadata snapshot of a CryoET Data Portal project.
+
+    Portal projects start from a local snapshot of their run, tomogram and annotation metadata. By default the
+    metadata is only fetched again if runs were added, modified or removed since the snapshot was written.
+
+    Args:
+        config_path: Path to the copick configuration file of a portal project.
+        full: Fetch the metadata again even if no run changed (optional).
+
+    Returns:
+        Dictionary containing the added, updated and removed run IDs or error message.
+    """
+    try:
+        from copick_mcp.portal import refresh_portal_metadata as refresh
+        from copick_mcp.progress import run_in_thread
+
+        def collect(progress=None):
+            root = get_copick_root_from_file(config_path)
+            return refresh(root, full=full)
+
+        result = await run_in_thread(ctx, collect)
+        # Memoized results may describe the previous metadata
+        memo.clear()
+
+        return {"success": True, **result}
+    except Exception as e:
+        logger.exception(f"Failed to refresh portal metadata: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# Diagnostics
+# ============================================================================
+
+
+@mcp.tool()
+def set_profiling(
+    enabled: bool,
+    threshold_ms: Optional[float] = None,
+    keep: Optional[int] = None,
+    memory: Optional[bool] = None,
+    clear: bool = False,
+) -> Dict[str, Any]:
+    """Enable or disable profiling of tool calls.
+
+    While enabled, tool calls run under cProfile, and calls slower than the threshold are kept in the slow call log
+    (see get_slow_calls). Profiling slows down all tool calls, enable it only to diagnose performance problems.
+
+    Args:
+        enabled: Whether to profile tool calls.
+        threshold_ms: Minimum duration in milliseconds of calls kept in the slow call log (optional).
+        keep: Number of slowest calls kept (optional).
+        memory: Also track allocations with tracemalloc, which is much slower (optional).
+        clear: Forget the calls kept so far (optional).
+
+    Returns:
+        Dictionary containing the profiling settings or error message.
+    """
+    try:
+        settings = profiler.configure(enabled=enabled, threshold_ms=threshold_ms, keep=keep, memory=memory)
+        result = {"success": True, **settings}
+        if clear:
+            result["cleared"] = profiler.clear()
+        return result
+    except Exception as e:
+        logger.exception(f"Failed to set profiling: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def get_slow_calls(limit: Optional[int] = None, top: int = 20, sort: str = "cumulative") -> Dict[str, Any]:
+    """Get the slowest tool calls recorded while profiling was enabled.
+
+    Each call includes its arguments, duration, the most expensive functions of its profile and the path of the
+    profile dump, which can be loaded with pstats or snakeviz.
+
+    Args:
+        limit: Maximum number of calls, slowest first (optional).
+        top: Number of most expensive functions reported per call.
+        sort: Order of the functions: "cumulative" (including callees) or "tottime" (function itself).
+
+    Returns:
+        Dictionary containing the slow calls and profiling settings or error message.
+    """
+    try:
+        calls = profiler.slow_calls(limit=limit, top=top, sort=sort)
+        return {"success": True, "profiling": profiler.settings(), "calls": calls, "count": len(calls)}
+    except Exception as e:
+        logger.exception(f"Failed to get slow calls: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# CLI Introspection Tools
+# ============================================================================
+
+
+@mcp.tool()
+async def list_copick_cli_commands(ctx: Optional[Context] = None) -> Dict[str, Any]:
+    """List all available copick CLI commands hierarchically.
+
+    Plugin discovery reports progress per command group. Groups discovered before a cancellation are kept, so a
+    retry only loads the remaining groups.
+
+    Returns:
+        Dictionary containing complete command tree with groups and subcommands.
+    """
+    try:
+        from copick_mcp.cli_introspection import get_all_cli_commands
+        from copick_mcp.progress import run_in_thread
+        from copick_mcp.resumable import partial_results
+
+        key = partial_results.key("list_copick_cli_commands")
+        commands = await run_in_thread(ctx, get_all_cli_commands, partial=partial_results.get(key))
+        partial_results.discard(key)
+        return {"success": True, "commands": commands}
+    except Exception as e:
+        logger.exception(f"Failed to list CLI commands: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def get_copick_cli_command_info(command_path: str) -> Dict[str, Any]:
+    """Get full details for a specific copick CLI command.
+
+    Args:
+        command_path: Path to the command (e.g., "convert.picks2seg" for subcommands or "add" for main commands).
+
+    Returns:
+        Dictionary containing command details including parameters, help text, and examples.
+    """
+    try:
+        from copick_mcp.cli_introspection import get_command_info
+
+        return get_command_info(command_path)
+    except Exception as e:
+        logger.exception(f"Failed to get CLI command info: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+def validate_copick_cli_command(command_string: str) -> Dict[str, Any]:
+    """Validate a copick CLI command string using Click's native parsing.
+
+    Args:
+        command_string: Full CLI command string (e.g., "copick convert picks2seg --config /path/to/config.json ...").
+
+    Returns:
+        Dictionary containing validation status, error messages, and suggestions.
+    """
+    try:
+        from copick_mcp.cli_introspection import validate_copick_cli_command as validate_cmd
+
+        return validate_cmd(command_string)
+    except Exception as e:
+        logger.exception(f"Failed to validate CLI command: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool()
+async def execute_copick_command(
+    command_string: str,
+    run_names: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    runs_per_shard: Optional[int] = None,
+    resume: bool = True,
+    shard_timeout: Optional[float] = None,
+    tail_lines: int = 20,
+    dry_run: bool = False,
+    background: bool = False,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Execute a copick CLI command on this machine, sharded by run across parallel processes.
+
+    The runs of the command (given by its --run-names option, `run_names`, or all runs of its --config) are split
+    into shards, and each shard runs as a separate `copick` process with its own --run-names, so CPU-bound `process`
+    and `convert` commands use all cores. The stdout and stderr of every shard are captured. Executing the same
+    command again resumes it: shards that succeeded are skipped, failed, timed out or cancelled ones run again.
+    Cancelling the call terminates the running shards. Progress is reported as shards finish.
+
+    Args:
+        command_string: Full CLI command string, validated first (e.g. "copick convert picks2seg --config ...").
+        run_names: Runs to execute the command on (optional, overrides the runs of the command string).
+        max_workers: Maximum number of shards running at once (optional, defaults to the number of CPU cores).
+        runs_per_shard: Number of runs per shard (optional, defaults to about four shards per worker).
+        resume: Skip shards that succeeded in a previous execution of the same command (optional, default True).
+        shard_timeout: Seconds after which a shard is terminated (optional).
+        tail_lines: Number of last lines of stdout and stderr returned per shard (optional, default 20).
+        dry_run: Only return the shards and their command lines without executing them (optional).
+        background: Run as a background job and return its ID, to follow with `get_job_status`, `get_job_result`
+            and `cancel_job` (optional).
+
+    Returns:
+        Dictionary containing the status, return code, duration and output of each shard, the runs of unsuccessful
+        shards and aggregate timings (or the job ID if run in the background) or error message.
+    """
+    try:
+        from copick_mcp.cli_execution import run_copick_command
+        from copick_mcp.jobs import job_id_for
+        from copick_mcp.progress import run_in_thread
+
+        options = {
+            "max_workers": max_workers,
+            "runs_per_shard": runs_per_shard,
+            "resume": resume,
+            "shard_timeout": shard_timeout,
+            "tail_lines": tail_lines,
+            "dry_run": dry_run,
+        }
+        if background and not dry_run:
+            params = {"command_string": command_string, "run_names": run_names, **options}
+            # A queued or running job of the same command is returned, a finished one is resumed by a new job
+            manager = get_job_manager()
+            existing = manager.status(job_id_for("copick_command", params))
+            active = existing is not None and existing["status"] in ("queued", "running")
+            job, _ = manager.submit("copick_command", params, force=not active)
+            return {"success": True, "job_id": job.job_id, "status": job.status}
+
+        result = await run_in_thread(
+            ctx,
+            run_copick_command,
+            command_string,
+            get_copick_root_from_file,
+            run_names=run_names,
+            **options,
+        )
+        return {"success": not result.get("failed_runs"), **result}
+    except Exception as e:
+        logger.exception(f"Failed to execute CLI command: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
@@ -0,0 +1,256 @@
+"""Memoization of tool results keyed on tool arguments and project content fingerprints.
+
+Results are kept encoded as JSON in a bounded in-memory LRU and, optionally, in an on-disk tier below the local
+cache directory that is shared by all server processes. Every hit decodes a fresh copy, so callers cannot modify
+memoized results. Cache keys include a fingerprint of the configuration file and, for
+run-scoped tools, of the run's directories, so changes to the project are picked up on the next call.
+
+Environment variables:
+    COPICK_MCP_MEMO_SIZE: Number of results kept in memory (default 256, 0 disables memoization).
+    COPICK_MCP_MEMO_DISK: Set to "1" to enable the on-disk tier.
+    COPICK_MCP_MEMO_DISK_MB: Maximum size of the on-disk tier in MB (default 512), least recently used results are
+        evicted beyond it.
+    COPICK_MCP_MEMO_DISABLE: Comma-separated tool names that are never memoized ("*" for all tools).
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import anyio.to_thread
+
+from copick_mcp.fingerprint import config_fingerprint, run_fingerprint
+from copick_mcp.names import lookup_run
+from copick_mcp.paths import atomic_write_bytes, get_cache_dir, limit_cache_dir, touch
+from copick_mcp.records import dumps, loads
+
+_SCOPES = ("config", "run")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class Memoizer:
+    """Memoize tool results.
+
+    Use `cached` as a decorator between `@mcp.tool()` and the tool function. Only successful results
+    (`{"success": True, ...}`) are memoized.
+
+    Attributes:
+        get_root: Callable returning a (cached) copick root for a configuration path.
+        max_entries: Maximum number of results kept in memory.
+        disk: Whether the on-disk tier is enabled.
+        disk_max_bytes: Maximum size of the on-disk tier.
+        disabled: Names of tools that are never memoized.
+    """
+
+    def __init__(
+        self,
+        get_root: Callable[[str], Any],
+        max_entries: Optional[int] = None,
+        disk: Optional[bool] = None,
+    ):
+        self.get_root = get_root
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("COPICK_MCP_MEMO_SIZE", "256"))
+        self.disk = disk if disk is not None else _env_flag("COPICK_MCP_MEMO_DISK")
+        self.disk_max_bytes = int(float(os.getenv("COPICK_MCP_MEMO_DISK_MB", "512")) * 1024**2)
+        self.disabled = {name.strip() for name in os.getenv("COPICK_MCP_MEMO_DISABLE", "").split(",") if name.strip()}
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._run_fingerprints: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_enabled(self, tool: str) -> bool:
+        """Whether results of a tool are memoized."""
+        return self.max_entries > 0 and "*" not in self.disabled and tool not in self.disabled
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _fingerprint(self, scope: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """Fingerprint the project content a tool result depends on, or None if it cannot be determined."""
+        config_path = arguments.get("config_path")
+        if not config_path:
+            return None
+        fingerprint = config_fingerprint(config_path)
+
+        if scope == "run":
+            run = lookup_run(self.get_root(config_path), arguments["run_name"])
+            if run is None:
+                return None
+
+            run_fp = run_fingerprint(run)
+            key = (config_path, run.name)
+            with self._lock:
+                previous = self._run_fingerprints.get(key)
+                self._run_fingerprints[key] = run_fp
+            # Contents changed since the run objects were cached, make sure copick re-queries them.
+            if previous is not None and previous != run_fp:
+                run.refresh()
+
+            fingerprint = f"{fingerprint}:{run_fp}"
+
+        return fingerprint
+
+    @staticmethod
+    def _key(tool: str, arguments: Dict[str, Any], fingerprint: str) -> str:
+        payload = {"tool": tool, "arguments": arguments, "fingerprint": fingerprint}
+        canonical = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return loads(data)
+
+        if not self.disk:
+            return None
+        path = get_cache_dir("memo") / f"{key}.json"
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            result = loads(data)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+
+        self._put_memory(key, data)
+        return result
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _put(self, key: str, result: Dict[str, Any], disk: bool) -> None:
+        data = dumps(result)
+        self._put_memory(key, data)
+        if self.disk and disk:
+            atomic_write_bytes(get_cache_dir("memo") / f"{key}.json", data)
+            limit_cache_dir("memo", self.disk_max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and number of results held in memory."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk": self.disk,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        """Drop all memoized results, in memory and (if enabled) on disk."""
+        with self._lock:
+            self._entries.clear()
+
+        if not self.disk:
+            return
+        for path in get_cache_dir("memo").glob("*.json"):
+            # Files may already have been removed by another server process
+            path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Decorator
+    # ------------------------------------------------------------------
+
+    def _lookup(self, tool: str, scope: str, arguments: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Return the cache key (None if the call cannot be memoized) and the memoized result (if any)."""
+        try:
+            fingerprint = self._fingerprint(scope, arguments)
+        except Exception:
+            # E.g. missing configuration file; let the tool report the error.
+            return None, None
+        if fingerprint is None:
+            return None, None
+
+        key = self._key(tool, arguments, fingerprint)
+        result = self._get(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return key, result
+
+    def _store(self, key: Optional[str], result: Any, disk: bool) -> None:
+        if key is not None and isinstance(result, dict) and result.get("success"):
+            self._put(key, result, disk)
+
+    def cached(self, scope: str = "config", disk: bool = True) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator memoizing a (sync or async) tool function.
+
+        Args:
+            scope: "config" if the result only depends on the configuration file, "run" if it also depends on the
+                contents of the run given by the `run_name` argument.
+            disk: Whether results of this tool may be stored in the on-disk tier.
+
+        Returns:
+            Decorator wrapping the tool function.
+        """
+        if scope not in _SCOPES:
+            raise ValueError(f"Invalid memoization scope '{scope}'. Valid scopes: {', '.join(_SCOPES)}")
+
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            tool = fn.__name__
+            signature = inspect.signature(fn)
+
+            def arguments_of(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                # The FastMCP context does not influence the result.
+                return {name: value for name, value in bound.arguments.items() if name != "ctx"}
+
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    if not self.is_enabled(tool):
+                        return await fn(*args, **kwargs)
+
+                    arguments = arguments_of(args, kwargs)
+                    key, result = await anyio.to_thread.run_sync(self._lookup, tool, scope, arguments)
+                    if result is not None:
+                        return result
+
+                    result = await fn(*args, **kwargs)
+                    await anyio.to_thread.run_sync(self._store, key, result, disk)
+                    return result
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.is_enabled(tool):
+                    return fn(*args, **kwargs)
+
+                arguments = arguments_of(args, kwargs)
+                key, result = self._lookup(tool, scope, arguments)
+                if result is not None:
+                    return result
+
+                result = fn(*args, **kwargs)
+                self._store(key, result, disk)
+                return result
+
+            return wrapper
+
+        return decorator
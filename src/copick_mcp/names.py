@@ -0,0 +1,221 @@
+"""Exact, prefix and fuzzy lookup of run and entity names.
+
+Agents often guess names slightly wrong (e.g. "TS_001" for "TS-001"). Each cached copick root gets an index of its
+run and object names: exact lookups are dictionary lookups, prefix completions use binary search over the sorted
+names, and fuzzy suggestions shortlist candidates sharing character trigrams with the query before ranking them by
+edit distance. "Not found" errors carry the closest names, so a wrong guess can be corrected without listing all
+runs.
+"""
+
+import bisect
+import collections
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Kinds of names that can be looked up. Names other than runs and objects are collected from the runs' artifacts.
+NAME_KINDS = ("run", "object", "user_id", "session_id", "segmentation", "tomo_type")
+
+# Number of candidates sharing the most trigrams with the query that are ranked by edit distance
+_SHORTLIST = 50
+
+
+def _trigrams(name: str) -> List[str]:
+    padded = f"^{name.lower()}$"
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Edit distance between two strings (insertions, deletions, substitutions and swaps of adjacent characters)."""
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        before, previous = previous, current
+    return previous[-1]
+
+
+class NameIndex:
+    """Index of a set of names for exact, prefix and fuzzy lookups.
+
+    Attributes:
+        names: The indexed names, sorted.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(set(names))
+        self._set = set(self.names)
+        # Case-insensitive prefix search
+        self._folded = sorted((name.lower(), name) for name in self.names)
+        self._folded_keys = [folded for folded, _ in self._folded]
+        self._grams: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            for gram in set(_trigrams(name)):
+                self._grams.setdefault(gram, []).append(i)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._set
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Names starting with a prefix (case-insensitive), in sorted order."""
+        folded = prefix.lower()
+        start = bisect.bisect_left(self._folded_keys, folded)
+        matches = []
+        for key, name in self._folded[start:]:
+            if not key.startswith(folded) or len(matches) >= limit:
+                break
+            matches.append(name)
+        return matches
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        """Names closest to a query, best first.
+
+        Candidates are the names starting with the query and the names sharing the most trigrams with it (all names
+        of small sets). They are ranked by case-insensitive edit distance, and candidates differing in more than half
+        of the query's characters are dropped unless they start with the query.
+        """
+        shared = collections.Counter(i for gram in set(_trigrams(query)) for i in self._grams.get(gram, ()))
+        if len(self.names) <= _SHORTLIST:
+            candidates = {name: shared.get(i, 0) for i, name in enumerate(self.names)}
+        else:
+            candidates = {self.names[i]: count for i, count in shared.most_common(_SHORTLIST)}
+        prefixed = set(self.complete(query, limit))
+        for name in prefixed:
+            candidates.setdefault(name, 0)
+
+        folded = query.lower()
+        max_distance = max(2, len(query) // 2)
+        ranked: List[Tuple[int, int, str]] = []
+        for name, count in candidates.items():
+            distance = edit_distance(folded, name.lower())
+            if distance <= max_distance or name in prefixed:
+                ranked.append((distance, -count, name))
+        return [name for _, _, name in sorted(ranked)[:limit]]
+
+
+class NameNotFoundError(ValueError):
+    """A name that does not exist, with the closest existing names.
+
+    Attributes:
+        kind: What was looked up (e.g. "Run").
+        name: The name that was not found.
+        suggestions: The closest existing names, best first.
+    """
+
+    def __init__(self, kind: str, name: str, suggestions: List[str], context: str = ""):
+        self.kind = kind
+        self.name = name
+        self.suggestions = suggestions
+        message = f"{kind} '{name}' not found{context}"
+        if suggestions:
+            message += f". Did you mean: {', '.join(suggestions)}?"
+        super().__init__(message)
+
+
+class RootNameIndex:
+    """Name indexes of a copick root, rebuilt when its runs or objects change."""
+
+    def __init__(self, root: Any):
+        self.root = root
+        self._runs: Optional[Tuple[Tuple[int, int], Dict[str, Any], NameIndex]] = None
+        self._objects: Optional[Tuple[Tuple[str, ...], NameIndex]] = None
+        self._lock = threading.Lock()
+
+    def _run_entry(self) -> Tuple[Dict[str, Any], NameIndex]:
+        runs = self.root.runs
+        # copick replaces the run list when it is refreshed and appends to it when runs are added
+        key = (id(runs), len(runs))
+        with self._lock:
+            if self._runs is None or self._runs[0] != key:
+                by_name = {run.name: run for run in runs}
+                self._runs = (key, by_name, NameIndex(by_name))
+            return self._runs[1], self._runs[2]
+
+    def get_run(self, name: str) -> Optional[Any]:
+        """The run with a given name, or None."""
+        by_name, _ = self._run_entry()
+        return by_name.get(name)
+
+    def runs(self) -> NameIndex:
+        """Index of the run names."""
+        return self._run_entry()[1]
+
+    def objects(self) -> NameIndex:
+        """Index of the pickable object names."""
+        names = tuple(obj.name for obj in self.root.pickable_objects)
+        with self._lock:
+            if self._objects is None or self._objects[0] != names:
+                self._objects = (names, NameIndex(names))
+            return self._objects[1]
+
+
+def get_name_index(root: Any) -> RootNameIndex:
+    """The name index of a copick root, created if needed."""
+    index = getattr(root, "_copick_mcp_names", None)
+    if index is None:
+        index = RootNameIndex(root)
+        root._copick_mcp_names = index
+    return index
+
+
+def lookup_run(root: Any, name: str) -> Optional[Any]:
+    """The run of a copick root with a given name, or None.
+
+    Runs are looked up in the root's name index, a dictionary built when the runs are first listed and rebuilt when
+    copick's run list changes. Once copick has listed the runs, its own `get_run` scans all of them for every lookup.
+
+    Args:
+        root: The copick root.
+        name: Name of the run.
+    """
+    return get_name_index(root).get_run(name)
+
+
+def run_not_found(root: Any, run_name: str, limit: int = 5) -> NameNotFoundError:
+    """Error for a run that does not exist, suggesting the closest run names."""
+    return NameNotFoundError("Run", run_name, get_name_index(root).runs().suggest(run_name, limit))
+
+
+def object_not_found(root: Any, object_name: str, limit: int = 5) -> NameNotFoundError:
+    """Error for a pickable object that does not exist, suggesting the closest object names."""
+    suggestions = get_name_index(root).objects().suggest(object_name, limit)
+    return NameNotFoundError("Object", object_name, suggestions, " in the config")
+
+
+def not_found_response(error: NameNotFoundError) -> Dict[str, Any]:
+    """Tool error response for a name that does not exist."""
+    return {"success": False, "error": str(error), "suggestions": error.suggestions}
+
+
+def artifact_names(partials: Dict[str, Dict[str, Any]], kind: str) -> List[str]:
+    """Distinct names of a kind used by the artifacts of a project.
+
+    Args:
+        partials: Partial summary of each run (see `project_summary.summarize_run`).
+        kind: "user_id", "session_id", "segmentation" or "tomo_type".
+
+    Returns:
+        The names.
+    """
+    names = set()
+    for partial in partials.values():
+        if kind in ("user_id", "session_id"):
+            position = 1 if kind == "user_id" else 2
+            for entries in (partial["picks"], partial["meshes"], partial["segmentations"]):
+                names.update(entry[position] for entry in entries if entry[position] is not None)
+        elif kind == "segmentation":
+            names.update(entry[0] for entry in partial["segmentations"])
+        elif kind == "tomo_type":
+            for tomo_types in partial["tomograms"].values():
+                names.update(tomo_types)
+        else:
+            raise ValueError(f"Unknown kind '{kind}'. Available kinds: {', '.join(NAME_KINDS)}")
+    return sorted(names)
@@ -0,0 +1,495 @@
+"""Process-pool execution engine for CPU-bound per-run analysis.
+
+Per-run work is described by picklable `RunJob` descriptors and executed by named operations registered with
+`register_operation`. Worker processes keep their own cache of copick roots, so a configuration file is parsed once
+per worker rather than once per task. Results are streamed back in chunks while limiting the number of chunks in
+flight, so the server never queues more work than it can consume.
+"""
+
+import atexit
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from copick_mcp.names import lookup_run
+
+# Registry of per-run operations: name -> callable(run, **params) -> JSON-serializable result
+OPERATIONS: Dict[str, Callable[..., Any]] = {}
+
+# Worker-local copick root cache (one per worker process)
+_worker_roots: Dict[str, Any] = {}
+
+# Shared process pool, kept alive between tool calls so worker-local roots are reused
+_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RunJob:
+    """Picklable description of a unit of per-run work.
+
+    Attributes:
+        config_path: Path to the copick configuration file.
+        run_name: Name of the run to process.
+        operation: Name of the registered operation to execute.
+        params: Keyword arguments passed to the operation.
+    """
+
+    config_path: str
+    run_name: str
+    operation: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def register_operation(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Register a per-run operation under a name usable in `RunJob.operation`.
+
+    Operations must be defined at module level in a module imported by `copick_mcp.parallel`, so that worker
+    processes can resolve them.
+
+    Args:
+        name: Name of the operation.
+
+    Returns:
+        Decorator registering the function.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        OPERATIONS[name] = fn
+        return fn
+
+    return decorator
+
+
+def default_max_workers() -> int:
+    """Size of the shared process pool.
+
+    Defaults to the number of CPU cores available to this process and can be overridden with the
+    `COPICK_MCP_MAX_WORKERS` environment variable.
+    """
+    if os.getenv("COPICK_MCP_MAX_WORKERS"):
+        return max(1, int(os.environ["COPICK_MCP_MAX_WORKERS"]))
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def _init_worker() -> None:
+    """Point the worker's stdout at stderr, so copick log output cannot corrupt the MCP stdio transport."""
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+
+def _get_worker_root(config_path: str) -> Any:
+    if config_path not in _worker_roots:
+        from copick_mcp.chunk_cache import install_chunk_cache
+        from copick_mcp.portal import open_root
+
+        root = open_root(config_path)
+        install_chunk_cache(root)
+        _worker_roots[config_path] = root
+    return _worker_roots[config_path]
+
+
+def execute_job(job: RunJob) -> Dict[str, Any]:
+    """Execute a single job in the current process.
+
+    Args:
+        job: The job to execute.
+
+    Returns:
+        Dictionary with the run name and either the operation result or an error message.
+    """
+    try:
+        operation = OPERATIONS.get(job.operation)
+        if operation is None:
+            return {"run_name": job.run_name, "success": False, "error": f"Unknown operation '{job.operation}'"}
+
+        root = _get_worker_root(job.config_path)
+        run = lookup_run(root, job.run_name)
+        if run is None:
+            return {"run_name": job.run_name, "success": False, "error": f"Run '{job.run_name}' not found"}
+
+        return {"run_name": job.run_name, "success": True, "result": operation(run, **job.params)}
+    except Exception as e:
+        return {"run_name": job.run_name, "success": False, "error": str(e)}
+
+
+def _execute_chunk(jobs: List[RunJob]) -> List[Dict[str, Any]]:
+    return [execute_job(job) for job in jobs]
+
+
+def _get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn instead of fork: the server process runs an event loop and worker threads that must not be
+            # duplicated into the children.
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=default_max_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Shut down the shared process pool (if running)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _chunked(jobs: List[RunJob], chunk_size: int) -> Iterator[List[RunJob]]:
+    for start in range(0, len(jobs), chunk_size):
+        yield jobs[start : start + chunk_size]
+
+
+def iter_run_jobs(
+    jobs: Iterable[RunJob],
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    progress: Any = None,
+) -> Iterator[Dict[str, Any]]:
+    """Execute jobs on the shared process pool and stream their results as they complete.
+
+    The pool is shared between calls; `max_workers` bounds how many of its processes this call occupies at once.
+    With a single worker, jobs are executed in the calling process instead.
+
+    Args:
+        jobs: Jobs to execute.
+        max_workers: Maximum number of worker processes used by this call (default: pool size).
+        chunk_size: Number of jobs sent to a worker at once (default: chosen from the number of jobs and workers).
+        max_pending: Maximum number of chunks in flight (default: `max_workers`).
+        progress: Optional `ProgressReporter` receiving the number of completed jobs.
+
+    Yields:
+        Per-job result dictionaries (see `execute_job`), in completion order.
+    """
+    jobs = list(jobs)
+    total = len(jobs)
+    max_workers = min(max_workers or default_max_workers(), default_max_workers())
+    chunk_size = chunk_size or max(1, min(16, total // (max_workers * 4)))
+    max_pending = max_pending or max_workers
+
+    done = 0
+    if progress is not None:
+        progress.update(done, total)
+
+    if max_workers == 1:
+        for job in jobs:
+            yield execute_job(job)
+            done += 1
+            if progress is not None:
+                progress.update(done, total)
+        return
+
+    pool = _get_pool()
+    chunks = _chunked(jobs, chunk_size)
+    pending = set()
+
+    try:
+        # Prime the pool, then submit a new chunk for every completed one (backpressure).
+        for chunk in chunks:
+            pending.add(pool.submit(_execute_chunk, chunk))
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            completed, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in completed:
+                results = future.result()
+                for result in results:
+                    yield result
+                done += len(results)
+                if progress is not None:
+                    progress.update(done, total)
+
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.add(pool.submit(_execute_chunk, next_chunk))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+# ============================================================================
+# Operations
+# ============================================================================
+
+
+@register_operation("pick_statistics")
+def pick_statistics(
+    run: Any,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Compute point count, extent and nearest-neighbor distance statistics for the picks of a run.
+
+    Args:
+        run: The copick run.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+
+    Returns:
+        List of per-pick-set statistics.
+    """
+    from scipy.spatial import cKDTree
+
+    stats = []
+    for pick in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id):
+        points, _ = pick.numpy()
+        entry = {
+            "object_name": pick.pickable_object_name,
+            "user_id": pick.user_id,
+            "session_id": pick.session_id,
+            "num_points": int(len(points)),
+        }
+
+        if len(points) > 0:
+            entry["centroid"] = points.mean(axis=0).tolist()
+            entry["min"] = points.min(axis=0).tolist()
+            entry["max"] = points.max(axis=0).tolist()
+
+        if len(points) > 1:
+            distances, _ = cKDTree(points).query(points, k=2)
+            nn = distances[:, 1]
+            entry["nearest_neighbor_distance"] = {
+                "min": float(nn.min()),
+                "mean": float(nn.mean()),
+                "median": float(np.median(nn)),
+                "max": float(nn.max()),
+            }
+
+        stats.append(entry)
+
+    return stats
+
+
+@register_operation("segmentation_volumes")
+def segmentation_volumes(
+    run: Any,
+    name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+    is_multilabel: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """Count the voxels and volume per label for the segmentations of a run.
+
+    Segmentations are read in slabs of one chunk along z, so memory use is bounded by the slab size rather than the
+    volume size.
+
+    Args:
+        run: The copick run.
+        name: Name of the segmentation to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        voxel_size: Voxel size to filter by (optional).
+        is_multilabel: Filter by multilabel status (optional).
+
+    Returns:
+        List of per-segmentation label statistics.
+    """
+    import zarr
+
+    stats = []
+    segmentations = run.get_segmentations(
+        voxel_size=voxel_size,
+        name=name,
+        user_id=user_id,
+        session_id=session_id,
+        is_multilabel=is_multilabel,
+    )
+    for seg in segmentations:
+        array = zarr.open(seg.zarr(), mode="r")["0"]
+        slab = array.chunks[0]
+
+        counts: Dict[int, int] = {}
+        for z0 in range(0, array.shape[0], slab):
+            labels, label_counts = np.unique(array[z0 : z0 + slab], return_counts=True)
+            for label, count in zip(labels.tolist(), label_counts.tolist()):
+                counts[label] = counts.get(label, 0) + count
+
+        voxel_volume = float(seg.voxel_size) ** 3
+        labels = [
+            {"label": label, "voxels": count, "volume_angstrom3": count * voxel_volume}
+            for label, count in sorted(counts.items())
+            if label != 0
+        ]
+        stats.append(
+            {
+                "name": seg.name,
+                "user_id": seg.user_id,
+                "session_id": seg.session_id,
+                "voxel_size": seg.voxel_size,
+                "is_multilabel": seg.is_multilabel,
+                "shape": list(array.shape),
+                "labels": labels,
+            },
+        )
+
+    return stats
+
+
+@register_operation("pick_qc")
+def pick_qc(
+    run: Any,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    min_distance: Optional[float] = None,
+    voxel_spacing: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Check the picks of a run for non-finite coordinates, near-duplicate points and points outside the tomogram.
+
+    Args:
+        run: The copick run.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        min_distance: Distance in angstrom below which two points count as duplicates (optional, defaults to half the
+            object radius, or 1 angstrom for objects without a radius).
+        voxel_spacing: Voxel spacing of the tomogram used for the bounds check (optional, defaults to the smallest
+            voxel spacing of the run).
+
+    Returns:
+        List of per-pick-set QC results.
+    """
+    from scipy.spatial import cKDTree
+
+    from copick_mcp.density import run_extent
+
+    extent = run_extent(run, voxel_spacing)
+
+    results = []
+    for pick in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id):
+        points, _ = pick.numpy()
+        finite = np.all(np.isfinite(points), axis=1)
+
+        distance = min_distance
+        if distance is None:
+            obj = run.root.get_object(pick.pickable_object_name)
+            distance = obj.radius / 2 if obj is not None and obj.radius else 1.0
+
+        duplicates = 0
+        if finite.sum() > 1:
+            duplicates = len(cKDTree(points[finite]).query_pairs(distance))
+
+        entry = {
+            "object_name": pick.pickable_object_name,
+            "user_id": pick.user_id,
+            "session_id": pick.session_id,
+            "num_points": int(len(points)),
+            "non_finite_points": int((~finite).sum()),
+            "duplicate_pairs": int(duplicates),
+            "duplicate_distance": float(distance),
+        }
+        if extent is not None:
+            inside = np.all((points >= 0) & (points <= extent), axis=1)
+            entry["out_of_bounds_points"] = int((finite & ~inside).sum())
+
+        entry["ok"] = entry["non_finite_points"] == 0 and duplicates == 0 and entry.get("out_of_bounds_points", 0) == 0
+        results.append(entry)
+
+    return results
+
+
+@register_operation("write_picks")
+def write_picks(
+    run: Any,
+    object_name: str,
+    user_id: str,
+    session_id: str,
+    positions: np.ndarray,
+    transforms: Optional[np.ndarray] = None,
+    instance_ids: Optional[np.ndarray] = None,
+    scores: Optional[np.ndarray] = None,
+    exist_ok: bool = False,
+) -> Dict[str, Any]:
+    """Write the pick file of a run from coordinate arrays (see `copick_mcp.bulk_picks.write_run_picks`)."""
+    from copick_mcp.bulk_picks import write_run_picks
+
+    return write_run_picks(
+        run,
+        object_name,
+        user_id,
+        session_id,
+        positions,
+        transforms=transforms,
+        instance_ids=instance_ids,
+        scores=scores,
+        exist_ok=exist_ok,
+    )
+
+
+@register_operation("sample_picks")
+def sample_picks(
+    run: Any,
+    sample_size: int,
+    seed: int,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    stratify_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Sample the picks of a run (see `copick_mcp.sampling.sample_run_picks`)."""
+    from copick_mcp.sampling import sample_run_picks
+
+    return sample_run_picks(
+        run,
+        sample_size,
+        seed,
+        object_name=object_name,
+        user_id=user_id,
+        session_id=session_id,
+        stratify_by=stratify_by,
+    )
+
+
+@register_operation("pick_density")
+def pick_density(
+    run: Any,
+    bins: Union[int, List[int]] = 16,
+    bin_size: Optional[float] = None,
+    normalized: bool = False,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    voxel_spacing: Optional[float] = None,
+    segmentation: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Bin the picks of a run into a 3D grid (see `copick_mcp.density.run_density`).
+
+    If `segmentation` is given (name, user_id, session_id and exist_ok), the map is also written as a segmentation
+    with the bin size as voxel size (see `copick_mcp.density.write_density_segmentation`).
+    """
+    from copick_mcp.density import run_density, write_density_segmentation
+
+    result = run_density(
+        run,
+        bins=bins,
+        bin_size=bin_size,
+        normalized=normalized,
+        object_name=object_name,
+        user_id=user_id,
+        session_id=session_id,
+        voxel_spacing=voxel_spacing,
+    )
+    if segmentation is not None:
+        result["segmentation"] = write_density_segmentation(run, result["counts"], bin_size, **segmentation)
+    return result
@@ -0,0 +1,203 @@
+"""Local filesystem locations and helpers used by the server's on-disk stores."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple
+
+
+def _read_umask() -> int:
+    """Read the umask of the process, without changing it where the platform allows."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    # Setting the umask to read it races with threads creating files, which is why it is only done once, on import
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Permissions of new files, as if created with open()
+FILE_MODE = 0o666 & ~_read_umask()
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """Get (and create) a directory below the server's local cache directory.
+
+    The cache directory defaults to `$XDG_CACHE_HOME/copick-mcp` (or `~/.cache/copick-mcp`) and can be overridden
+    with the `COPICK_MCP_CACHE_DIR` environment variable.
+
+    Args:
+        *parts: Path components below the cache directory.
+
+    Returns:
+        Path to the directory.
+    """
+    base = os.getenv("COPICK_MCP_CACHE_DIR")
+    if not base:
+        base = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache"), "copick-mcp")
+
+    path = Path(base, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: Path, data: bytes, mode: Optional[int] = None) -> None:
+    """Write a file atomically by writing to a temporary file in the same directory and renaming it.
+
+    Concurrent readers (including other server processes) either see the previous or the new contents, never a
+    partially written file. The contents are flushed to disk before the rename, so that a crash cannot leave an
+    empty or truncated file behind.
+
+    Args:
+        path: Destination path.
+        data: Contents to write.
+        mode: Permission bits of the written file (default: as if created with open(), see `FILE_MODE`).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates files readable and writable by the owner only
+        os.chmod(tmp_path, FILE_MODE if mode is None else mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _scan_entries(directory: Path, by_subdirectory: bool) -> List[Tuple[Path, int, float]]:
+    """List the entries of a directory with their size and time of last use (latest modification time)."""
+    entries = []
+    if by_subdirectory:
+        for sub in directory.iterdir():
+            if not sub.is_dir() or sub.name.startswith("."):
+                continue
+            size, used = 0, 0.0
+            for dirpath, _, filenames in os.walk(sub):
+                for name in filenames:
+                    try:
+                        stat = os.stat(os.path.join(dirpath, name))
+                    except OSError:
+                        continue
+                    size += stat.st_size
+                    used = max(used, stat.st_mtime)
+            entries.append((sub, size, used))
+        return entries
+
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            if name.startswith("."):
+                continue
+            path = Path(dirpath, name)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict_lru(
+    directory: Path,
+    max_bytes: int,
+    target: float = 0.9,
+    by_subdirectory: bool = False,
+    keep: Collection[Path] = (),
+) -> int:
+    """Delete the least recently used entries of a directory once their total size exceeds a maximum.
+
+    Entries are files (hidden files excluded), or the sub-directories of the directory with `by_subdirectory`. The
+    last use of an entry is its latest modification time, so readers mark entries they use with `os.utime`. Eviction
+    is skipped while another process is evicting the same directory.
+
+    Args:
+        directory: The directory.
+        max_bytes: Maximum total size of the entries.
+        target: Fraction of the maximum size eviction shrinks the entries to.
+        by_subdirectory: Evict whole sub-directories instead of single files.
+        keep: Entries that are never evicted (e.g. in use).
+
+    Returns:
+        Number of deleted entries.
+    """
+    from filelock import FileLock, Timeout
+
+    directory = Path(directory)
+    evicted = 0
+    try:
+        # Another process evicting at the same time would only delete more than necessary, skip instead.
+        with FileLock(str(directory / ".evict.lock"), timeout=0):
+            entries = _scan_entries(directory, by_subdirectory)
+            total = sum(size for _, size, _ in entries)
+            if total <= max_bytes:
+                return 0
+
+            keep = {Path(path) for path in keep}
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total <= max_bytes * target:
+                    break
+                if path in keep:
+                    continue
+                try:
+                    if by_subdirectory:
+                        shutil.rmtree(path)
+                    else:
+                        os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+    except Timeout:
+        pass
+    return evicted
+
+
+# Minimum number of seconds between two evictions of a directory by `limit_cache_dir`
+_EVICTION_INTERVAL = 60.0
+_last_eviction: Dict[str, float] = {}
+_eviction_lock = threading.Lock()
+
+
+def limit_cache_dir(name: str, max_bytes: int, by_subdirectory: bool = False, keep: Collection[Path] = ()) -> int:
+    """Bound the size of a directory below the cache directory (see `evict_lru`), at most once a minute.
+
+    Args:
+        name: Name of the directory below the cache directory.
+        max_bytes: Maximum total size of its entries, 0 or less for no limit.
+        by_subdirectory: Evict whole sub-directories instead of single files.
+        keep: Entries that are never evicted (e.g. in use).
+
+    Returns:
+        Number of deleted entries.
+    """
+    if max_bytes <= 0:
+        return 0
+    with _eviction_lock:
+        now = time.monotonic()
+        if now - _last_eviction.get(name, float("-inf")) < _EVICTION_INTERVAL:
+            return 0
+        _last_eviction[name] = now
+    return evict_lru(get_cache_dir(name), max_bytes, by_subdirectory=by_subdirectory, keep=keep)
+
+
+def touch(*paths: Path) -> None:
+    """Mark cached files as recently used for `evict_lru`, ignoring files removed in the meantime."""
+    for path in paths:
+        try:
+            os.utime(path)
+        except OSError:
+            continue
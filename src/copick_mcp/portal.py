@@ -0,0 +1,251 @@
+"""Bulk prefetch of CryoET Data Portal metadata with a local snapshot that is refreshed by deltas.
+
+When a portal project is opened, copick fetches the run, tomogram and annotation metadata of all configured datasets
+in a few batched portal queries and persists the results as a snapshot (see `copick.util.portal_cache`). By default
+the snapshot expires after a day, and everything is then fetched again.
+
+Projects opened by the server always start from the snapshot, whatever its age, so they open without querying the
+portal (even offline). A snapshot older than the refresh interval is then revalidated: the runs of the datasets and
+the annotations and tomograms modified since the snapshot was written are listed (through the shared portal client
+of `copick_mcp.connections`), and the metadata is only fetched again, with copick's own queries, if runs were added,
+removed or modified. Otherwise the snapshot is marked fresh as is.
+
+Environment variables:
+    COPICK_MCP_PORTAL_REFRESH_HOURS: Snapshot age after which opening a project refreshes it (default 24, 0
+        disables automatic refreshes).
+"""
+
+import functools
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import copick
+
+from copick_mcp.connections import portal_client
+
+logger = logging.getLogger("copick-mcp")
+
+
+def is_portal_root(root: Any) -> bool:
+    """Whether a copick root is backed by the CryoET Data Portal."""
+    return getattr(root.config, "config_type", None) == "cryoet_data_portal"
+
+
+def open_root(config_path: str) -> Any:
+    """Open a copick project, starting portal projects from their metadata snapshot.
+
+    Args:
+        config_path: Path to the copick configuration file.
+
+    Returns:
+        The copick root.
+    """
+    with open(config_path, "r") as f:
+        data = json.load(f)
+    if data.get("config_type") != "cryoet_data_portal":
+        return copick.from_file(config_path)
+
+    if not has_snapshot_support():
+        logger.warning(
+            "The installed copick lacks the portal snapshot internals copick-mcp builds on, opening "
+            f"{config_path} without snapshot refreshes and connection pooling",
+        )
+        return copick.from_file(config_path)
+
+    from copick.impl.cryoet_data_portal import CopickConfigCDP, CopickRootCDP
+
+    config = CopickConfigCDP(**data)
+    # Accept a snapshot of any age, it is refreshed below. Without a snapshot, all metadata is fetched in bulk.
+    config.portal_cache_ttl_seconds = 0
+    root = CopickRootCDP(config)
+
+    max_age_hours = float(os.getenv("COPICK_MCP_PORTAL_REFRESH_HOURS", "24"))
+    created = snapshot_created(root)
+    if max_age_hours > 0 and created is not None:
+        age = datetime.now(timezone.utc) - created
+        if age > timedelta(hours=max_age_hours):
+            try:
+                refresh_portal_metadata(root)
+            except Exception as e:
+                # Offline or portal unavailable, keep working from the snapshot.
+                logger.warning(f"Could not refresh portal metadata snapshot of {config_path}: {str(e)}")
+
+    return root
+
+
+@functools.lru_cache(maxsize=None)
+def has_snapshot_support() -> bool:
+    """Whether the installed copick has the private portal snapshot internals this module builds on (copick 1.27+)."""
+    try:
+        from copick.impl import cryoet_data_portal as impl
+        from copick.util import portal_cache
+    except ImportError:
+        return False
+
+    return (
+        hasattr(impl, "_retry_portal_call")
+        and hasattr(impl.CopickRootCDP, "_ensure_annotation_cache")
+        and "portal_cache_ttl_seconds" in impl.CopickConfigCDP.model_fields
+        and all(
+            hasattr(portal_cache, name)
+            for name in (
+                "SCHEMA_VERSION",
+                "fingerprint_for_config",
+                "get_or_fetch",
+                "resolve_locations",
+                "settings_from_config",
+            )
+        )
+    )
+
+
+# ============================================================================
+# Snapshot
+# ============================================================================
+
+
+def _read_snapshot(root: Any) -> Tuple[Optional[datetime], Optional[Dict[str, List[Dict[str, Any]]]]]:
+    """Read the metadata snapshot of a portal root, ignoring its age."""
+    from copick.util import portal_cache
+
+    settings = portal_cache.settings_from_config(root.config)
+    fingerprint = portal_cache.fingerprint_for_config(root.config)
+    for location in portal_cache.resolve_locations(fingerprint, settings, root.fs_overlay, root.root_overlay):
+        try:
+            with location.fs.open(location.path, "r") as f:
+                doc = json.load(f)
+        except Exception:
+            continue
+        if doc.get("schema_version") != portal_cache.SCHEMA_VERSION or doc.get("fingerprint") != fingerprint:
+            continue
+        try:
+            created = datetime.fromisoformat(doc["created"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        if isinstance(doc.get("data"), dict):
+            return created, doc["data"]
+    return None, None
+
+
+def snapshot_created(root: Any) -> Optional[datetime]:
+    """Time the metadata snapshot of a portal root was written, or None if there is no snapshot."""
+    return _read_snapshot(root)[0]
+
+
+def _fetch_snapshot(root: Any) -> None:
+    """Fetch all metadata with copick's queries, persist it as the snapshot and make the root use it."""
+    root._ensure_annotation_cache(force=True)
+    root.refresh()
+
+
+def _touch_snapshot(root: Any, data: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Rewrite an unchanged snapshot, so that it is considered fresh again."""
+    from copick.util import portal_cache
+
+    portal_cache.get_or_fetch(
+        fingerprint=portal_cache.fingerprint_for_config(root.config),
+        dataset_ids=root.dataset_ids,
+        settings=portal_cache.settings_from_config(root.config),
+        fetch_fn=lambda: data,
+        fs_overlay=root.fs_overlay,
+        root_overlay=root.root_overlay,
+        force=True,
+    )
+
+
+# ============================================================================
+# Delta refresh
+# ============================================================================
+
+
+def _dataset_runs(root: Any, client: Any) -> List[Any]:
+    """All runs of the configured datasets."""
+    import cryoet_data_portal as cdp
+    from copick.impl.cryoet_data_portal import _retry_portal_call
+
+    return _retry_portal_call(cdp.Run.find, client, [cdp.Run.dataset_id._in(root.dataset_ids)])
+
+
+def _modified_runs(root: Any, client: Any, since: datetime) -> Set[int]:
+    """IDs of runs whose annotations or tomograms were modified on or after a date."""
+    import cryoet_data_portal as cdp
+    from copick.impl.cryoet_data_portal import _retry_portal_call
+
+    # Modification dates are days, include the previous day to be safe across time zones.
+    day = (since - timedelta(days=1)).date().isoformat()
+    annotations = _retry_portal_call(
+        cdp.Annotation.find,
+        client,
+        [
+            cdp.Annotation.run.dataset_id._in(root.dataset_ids),
+            cdp.Annotation.object_id._in(list(root.go_map.keys())),
+            cdp.Annotation.last_modified_date >= day,
+        ],
+    )
+    tomograms = _retry_portal_call(
+        cdp.Tomogram.find,
+        client,
+        [
+            cdp.Tomogram.run.dataset_id._in(root.dataset_ids),
+            cdp.Tomogram.last_modified_date >= day,
+        ],
+    )
+    return {record.run_id for record in annotations} | {record.run_id for record in tomograms}
+
+
+def refresh_portal_metadata(root: Any, full: bool = False) -> Dict[str, Any]:
+    """Refresh the metadata snapshot of a portal root from the portal.
+
+    A delta refresh lists the runs of the configured datasets and the annotations and tomograms modified since the
+    snapshot was written, and only fetches the metadata again if runs were added, removed or modified. Annotations
+    deleted from an otherwise unchanged run are only noticed by a full refresh.
+
+    The metadata is fetched with copick's own batched queries (`CopickRootCDP._fetch_portal_data`), which cover all
+    runs of the datasets: copick offers no way to restrict them to the changed runs.
+
+    Args:
+        root: The copick root of a portal project.
+        full: Fetch the metadata again even if no run changed.
+
+    Returns:
+        Dictionary with the kind of refresh, the IDs of added, updated and removed runs and whether the metadata
+        was fetched again.
+    """
+    if not is_portal_root(root):
+        raise ValueError("Portal metadata can only be refreshed for CryoET Data Portal projects")
+    if not has_snapshot_support():
+        raise ValueError("Refreshing portal metadata snapshots requires copick 1.27 or newer")
+
+    created, snapshot = _read_snapshot(root)
+    client = portal_client()
+    current = {run.id for run in _dataset_runs(root, client)}
+
+    if full or snapshot is None:
+        _fetch_snapshot(root)
+        return {"mode": "full", "runs": len(current), "fetched": True}
+
+    known = {record["id"] for record in snapshot.get("runs", [])}
+    added = current - known
+    removed = known - current
+    updated = (_modified_runs(root, client, created) & current) - added
+
+    fetched = bool(added or removed or updated)
+    if fetched:
+        _fetch_snapshot(root)
+    else:
+        _touch_snapshot(root, snapshot)
+
+    return {
+        "mode": "delta",
+        "runs": len(current),
+        "added": sorted(added),
+        "updated": sorted(updated),
+        "removed": sorted(removed),
+        "since": created.isoformat(),
+        "fetched": fetched,
+    }
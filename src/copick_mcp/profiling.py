@@ -0,0 +1,428 @@
+"""Opt-in profiling of tool calls with a log of the slowest calls.
+
+While profiling is enabled, every tool call runs under cProfile: the event loop thread (async tool bodies and result
+serialization, CPU time) and the worker threads running blocking tool bodies (sync tools and `run_in_thread`, wall-clock
+time) each get their own profiler, and their statistics are merged when the call completes. Sync tools are wrapped with
+`profile_in_thread` by the middleware the first time they are profiled. Calls slower than the threshold are logged, and
+the slowest calls are kept with their arguments and merged profile. Their profiles are also dumped to
+`<cache dir>/profiles/*.prof` files for `pstats`, snakeviz and similar tools.
+
+Allocation tracking with tracemalloc is a separate option, as it slows down every allocation in the process. It
+reports the peak traced memory during the call and the source lines that allocated the most memory.
+
+Only one call profiles the event loop thread at a time; calls overlapping with it only profile their worker threads.
+On Python 3.12 and later, cProfile is built on `sys.monitoring` and a single profiler can be active per process, which
+sees all threads: the call profiling the event loop measures wall-clock time across all threads, and calls
+overlapping with it are not profiled. Profiling never fails a tool call, if a profiler cannot be enabled the call runs
+unprofiled. Peak memory is process-wide, so it includes allocations of concurrent calls.
+
+Environment variables:
+    COPICK_MCP_PROFILE: Set to "1" to enable profiling at startup.
+    COPICK_MCP_PROFILE_THRESHOLD_MS: Minimum duration of calls kept in the slow call log (default 500).
+    COPICK_MCP_PROFILE_KEEP: Number of slowest calls kept (default 20).
+    COPICK_MCP_PROFILE_MEMORY: Set to "1" to also track allocations with tracemalloc.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import functools
+import heapq
+import inspect
+import itertools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware
+
+from copick_mcp.paths import get_cache_dir
+
+logger = logging.getLogger("copick-mcp")
+
+SORT_KEYS = ("cumulative", "tottime")
+
+# Tools managing the profiler are never profiled themselves
+_UNPROFILED_TOOLS = {"set_profiling", "get_slow_calls"}
+
+# Maximum length of the representation of an argument value in the slow call log
+_MAX_ARGUMENT_LENGTH = 200
+
+
+# Since Python 3.12, cProfile profiles all threads and only one profiler can be enabled at a time
+_PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+# Threads with an enabled profiler, a second one would silently replace it before Python 3.12
+_profiled_threads: set = set()
+_profiled_threads_lock = threading.Lock()
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class CallProfile:
+    """Profiles collected for one tool call, one per thread that ran part of the call."""
+
+    def __init__(self) -> None:
+        self.profiles: List[cProfile.Profile] = []
+        self.threads = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def thread_profile(self, cpu_time: bool = False) -> Iterator[None]:
+        """Profile the current thread while the block runs, measuring wall-clock time or the thread's CPU time."""
+        thread = threading.get_ident()
+        with _profiled_threads_lock:
+            if thread in _profiled_threads:
+                # Sync tools run in the event loop thread by older FastMCP versions, which is already profiled
+                profile = None
+            else:
+                profile = cProfile.Profile(time.thread_time) if cpu_time else cProfile.Profile()
+                _profiled_threads.add(thread)
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiler is active (Python 3.12+ or a profiler outside the server), run unprofiled
+                logger.debug(f"Could not enable profiler: {str(e)}")
+                with _profiled_threads_lock:
+                    _profiled_threads.discard(thread)
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with _profiled_threads_lock:
+                    _profiled_threads.discard(thread)
+                with self._lock:
+                    self.profiles.append(profile)
+                    self.threads += 1
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Merged statistics of all threads, or None if nothing was profiled."""
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+# Profile of the tool call running in the current context (propagated to worker threads by anyio)
+_current_call: contextvars.ContextVar[Optional[CallProfile]] = contextvars.ContextVar("copick_mcp_call", default=None)
+
+
+def profile_in_thread(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a function run in a worker thread so it is profiled if the calling tool call is."""
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call = _current_call.get()
+        if call is None or _PROCESS_WIDE_PROFILER:
+            # With a process-wide profiler, the profiler of the call (if any) already sees this thread
+            return fn(*args, **kwargs)
+        with call.thread_profile():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _format_argument(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > _MAX_ARGUMENT_LENGTH:
+        text = f"{text[:_MAX_ARGUMENT_LENGTH]}... ({len(text)} characters)"
+    return text
+
+
+def _function_name(func: Tuple[str, int, str]) -> str:
+    return pstats.func_std_string(func)
+
+
+def top_functions(stats: pstats.Stats, sort: str = "cumulative", limit: int = 20) -> List[Dict[str, Any]]:
+    """Most expensive functions of a profile, with the callers they spent the most time in.
+
+    Args:
+        stats: The profile statistics.
+        sort: "cumulative" (time including callees) or "tottime" (time in the function itself).
+        limit: Maximum number of functions.
+
+    Returns:
+        One dictionary per function, most expensive first.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Invalid sort key '{sort}'. Valid keys: {', '.join(SORT_KEYS)}")
+    index = 3 if sort == "cumulative" else 2
+
+    # Skip the profiler's own frames
+    entries = [
+        (func, entry) for func, entry in stats.stats.items() if not func[0].endswith(("profiling.py", "cProfile.py"))
+    ]
+    entries.sort(key=lambda item: item[1][index], reverse=True)
+
+    functions = []
+    for func, (primitive_calls, calls, total, cumulative, callers) in entries[:limit]:
+        # Caller entries are (primitive calls, calls, total, cumulative) spent in `func` when called from the caller
+        top_callers = sorted(callers.items(), key=lambda item: item[1][-1], reverse=True)[:3]
+        functions.append(
+            {
+                "function": _function_name(func),
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "total_ms": round(total * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+                "callers": [_function_name(caller) for caller, _ in top_callers],
+            },
+        )
+    return functions
+
+
+class Profiler:
+    """Profile tool calls and keep the slowest ones.
+
+    Attributes:
+        enabled: Whether tool calls are profiled.
+        threshold_ms: Minimum duration of calls kept in the slow call log.
+        keep: Number of slowest calls kept.
+        memory: Whether allocations are tracked with tracemalloc.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        threshold_ms: Optional[float] = None,
+        keep: Optional[int] = None,
+        memory: Optional[bool] = None,
+    ):
+        self.enabled = False
+        self.threshold_ms = 500.0
+        self.keep = 20
+        self.memory = False
+
+        # Min-heap of (duration, sequence number, call record), the fastest kept call is evicted first
+        self._calls: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._loop_profiled = False
+        self._started_tracemalloc = False
+
+        self.configure(
+            enabled=enabled if enabled is not None else _env_flag("COPICK_MCP_PROFILE"),
+            threshold_ms=(
+                threshold_ms if threshold_ms is not None else float(os.getenv("COPICK_MCP_PROFILE_THRESHOLD_MS", "500"))
+            ),
+            keep=keep if keep is not None else int(os.getenv("COPICK_MCP_PROFILE_KEEP", "20")),
+            memory=memory if memory is not None else _env_flag("COPICK_MCP_PROFILE_MEMORY"),
+        )
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        threshold_ms: Optional[float] = None,
+        keep: Optional[int] = None,
+        memory: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """Change the profiling settings, None leaves a setting unchanged.
+
+        Returns:
+            The current settings.
+        """
+        if threshold_ms is not None and threshold_ms < 0:
+            raise ValueError("threshold_ms must not be negative")
+        if keep is not None and keep < 1:
+            raise ValueError("keep must be at least 1")
+
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if threshold_ms is not None:
+                self.threshold_ms = float(threshold_ms)
+            if keep is not None:
+                self.keep = keep
+                while len(self._calls) > self.keep:
+                    self._evict(heapq.heappop(self._calls)[2])
+            if memory is not None:
+                self.memory = memory
+
+            # Only stop tracemalloc if it was started here
+            tracing = self.enabled and self.memory
+            if tracing and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            elif not tracing and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        return self.settings()
+
+    def settings(self) -> Dict[str, Any]:
+        """The current profiling settings."""
+        return {"enabled": self.enabled, "threshold_ms": self.threshold_ms, "keep": self.keep, "memory": self.memory}
+
+    def should_profile(self, tool: str) -> bool:
+        return self.enabled and tool not in _UNPROFILED_TOOLS
+
+    @contextlib.contextmanager
+    def profile_call(self, tool: str, arguments: Dict[str, Any]) -> Iterator[None]:
+        """Profile a tool call running in the current task, and keep it if it is slow."""
+        call = CallProfile()
+        token = _current_call.set(call)
+
+        with self._lock:
+            profile_loop = not self._loop_profiled
+            self._loop_profiled = True
+
+        tracing = self.memory and tracemalloc.is_tracing()
+        memory_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        snapshot_before = tracemalloc.take_snapshot() if tracing else None
+        if tracing:
+            tracemalloc.reset_peak()
+
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        error = None
+        try:
+            # The event loop mostly waits for worker threads and I/O, only its CPU time is of interest. A process-wide
+            # profiler also sees the worker threads, so it measures wall-clock time.
+            cpu_time = not _PROCESS_WIDE_PROFILER
+            with call.thread_profile(cpu_time=cpu_time) if profile_loop else contextlib.nullcontext():
+                yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if profile_loop:
+                with self._lock:
+                    self._loop_profiled = False
+            _current_call.reset(token)
+
+            if duration_ms >= self.threshold_ms:
+                record: Dict[str, Any] = {
+                    "tool": tool,
+                    "arguments": {name: _format_argument(value) for name, value in arguments.items()},
+                    "started": started.isoformat(),
+                    "duration_ms": round(duration_ms, 3),
+                    "profiled_threads": call.threads,
+                }
+                if error is not None:
+                    record["error"] = error
+                if tracing and tracemalloc.is_tracing():
+                    record["memory"] = self._memory_report(memory_before, snapshot_before)
+                self._keep(record, call.stats())
+
+    @staticmethod
+    def _memory_report(memory_before: int, snapshot_before: Optional[tracemalloc.Snapshot]) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        report: Dict[str, Any] = {
+            "peak_mb": round((peak - memory_before) / 1024**2, 3),
+            "retained_mb": round((current - memory_before) / 1024**2, 3),
+        }
+        if snapshot_before is not None:
+            differences = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")
+            report["top_allocations"] = [
+                {"line": str(difference.traceback), "size_mb": round(difference.size_diff / 1024**2, 3)}
+                for difference in differences[:10]
+                if difference.size_diff > 0
+            ]
+        return report
+
+    def _keep(self, record: Dict[str, Any], stats: Optional[pstats.Stats]) -> None:
+        logger.warning(f"Slow tool call {record['tool']} took {record['duration_ms']:.0f} ms")
+
+        sequence = next(self._sequence)
+        record["id"] = f"{record['started'][:19].replace(':', '')}-{sequence}"
+        record["_stats"] = stats
+        if stats is not None:
+            try:
+                path = get_cache_dir("profiles") / f"{record['id']}-{record['tool']}.prof"
+                stats.dump_stats(str(path))
+                record["profile_path"] = str(path)
+            except OSError as e:
+                logger.warning(f"Could not write profile of {record['tool']}: {str(e)}")
+
+        with self._lock:
+            heapq.heappush(self._calls, (record["duration_ms"], sequence, record))
+            while len(self._calls) > self.keep:
+                self._evict(heapq.heappop(self._calls)[2])
+
+    @staticmethod
+    def _evict(record: Dict[str, Any]) -> None:
+        if "profile_path" in record:
+            with contextlib.suppress(OSError):
+                os.remove(record["profile_path"])
+
+    def slow_calls(self, limit: Optional[int] = None, top: int = 20, sort: str = "cumulative") -> List[Dict[str, Any]]:
+        """The slowest calls kept, slowest first.
+
+        Args:
+            limit: Maximum number of calls (default: all kept calls).
+            top: Number of most expensive functions reported per call.
+            sort: Order of the functions, "cumulative" or "tottime".
+
+        Returns:
+            One dictionary per call.
+        """
+        with self._lock:
+            records = [record for _, _, record in sorted(self._calls, key=lambda item: item[:2], reverse=True)]
+
+        calls = []
+        for record in records[:limit]:
+            call = {key: value for key, value in record.items() if key != "_stats"}
+            if record["_stats"] is not None:
+                call["top_functions"] = top_functions(record["_stats"], sort=sort, limit=top)
+            calls.append(call)
+        return calls
+
+    def clear(self) -> int:
+        """Forget all kept calls and delete their profile dumps, returns the number of calls removed."""
+        with self._lock:
+            calls, self._calls = self._calls, []
+        for _, _, record in calls:
+            self._evict(record)
+        return len(calls)
+
+
+class ProfilingMiddleware(Middleware):
+    """FastMCP middleware profiling tool calls while the profiler is enabled."""
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    @staticmethod
+    async def _profile_sync_tool(context, name: str) -> None:
+        """Wrap the body of a sync tool so the worker thread FastMCP runs it in is profiled (once per tool)."""
+        server = getattr(context.fastmcp_context, "fastmcp", None)
+        if server is None:
+            return
+        try:
+            tool = await server.get_tool(name)
+        except Exception as e:
+            logger.debug(f"Could not look up tool {name}: {str(e)}")
+            return
+        fn = getattr(tool, "fn", None)
+        if fn is None or getattr(fn, "_profiled", False) or inspect.iscoroutinefunction(fn):
+            return
+        wrapped = profile_in_thread(fn)
+        wrapped._profiled = True
+        tool.fn = wrapped
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        if not self.profiler.should_profile(tool):
+            return await call_next(context)
+
+        await self._profile_sync_tool(context, tool)
+        with self.profiler.profile_call(tool, context.message.arguments or {}):
+            return await call_next(context)
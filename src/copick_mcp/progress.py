@@ -0,0 +1,86 @@
+"""Bridge between blocking tool bodies running in worker threads and MCP progress notifications."""
+
+import contextlib
+import functools
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+
+from copick_mcp.profiling import profile_in_thread
+
+
+class ProgressReporter:
+    """Thread-safe progress reporter forwarding updates to a FastMCP context.
+
+    Updates are rate-limited so that tight loops over thousands of runs do not flood the client with notifications.
+    The final update (progress == total) is always sent. Every update also checks whether the client cancelled the
+    tool call, so blocking work stops at the next unit of progress instead of running to completion.
+
+    Attributes:
+        ctx: The FastMCP context of the tool call, or None to disable notifications.
+        total: The total amount of work, if known.
+        min_interval: Minimum number of seconds between two notifications.
+    """
+
+    def __init__(self, ctx: Any = None, total: Optional[float] = None, min_interval: float = 0.25):
+        self.ctx = ctx
+        self.total = total
+        self.min_interval = min_interval
+        self._last_sent = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Report progress from a worker thread.
+
+        Args:
+            progress: Amount of work done so far.
+            total: Total amount of work (optional, defaults to the total given at construction).
+            message: Human-readable progress message (optional).
+        """
+        self.check_cancelled()
+
+        if total is not None:
+            self.total = total
+
+        if self.ctx is None:
+            return
+
+        now = time.monotonic()
+        is_final = self.total is not None and progress >= self.total
+        with self._lock:
+            if not is_final and now - self._last_sent < self.min_interval:
+                return
+            self._last_sent = now
+
+        # Outside of a worker thread spawned by anyio (e.g. called directly) there is nothing to notify.
+        with contextlib.suppress(RuntimeError):
+            anyio.from_thread.run(self.ctx.report_progress, progress, self.total, message)
+
+    def check_cancelled(self) -> None:
+        """Raise the backend's cancellation exception if the tool call running this thread was cancelled."""
+        # Outside of a worker thread spawned by anyio there is no host task that could be cancelled.
+        with contextlib.suppress(RuntimeError):
+            anyio.from_thread.check_cancelled()
+
+
+async def run_in_thread(ctx: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function in a worker thread, passing it a `ProgressReporter` bound to `ctx`.
+
+    If the tool call is cancelled, the cancellation is raised inside the worker thread at the next progress update
+    (or explicit `check_cancelled` call), and then propagated to the caller.
+
+    Args:
+        ctx: The FastMCP context of the tool call (may be None).
+        fn: Blocking function accepting a `progress` keyword argument.
+        *args: Positional arguments for `fn`.
+        **kwargs: Keyword arguments for `fn`.
+
+    Returns:
+        The return value of `fn`.
+    """
+    reporter = ProgressReporter(ctx)
+    return await anyio.to_thread.run_sync(profile_in_thread(functools.partial(fn, *args, progress=reporter, **kwargs)))
@@ -0,0 +1,231 @@
+"""Project-wide aggregate statistics computed with a parallel per-run walk."""
+
+import concurrent.futures
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from copick_mcp.fingerprint import run_fingerprint
+from copick_mcp.storage import voxel_spacing_key
+
+# Per-run partial summaries: config_path -> run_name -> (fingerprint, partial summary)
+_run_summary_cache: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+_run_summary_lock = threading.Lock()
+
+
+def summarize_run(run: Any, count_points: bool = True) -> Dict[str, Any]:
+    """Collect the artifacts present in a single run.
+
+    Args:
+        run: The copick run to summarize.
+        count_points: Whether to load pick files to count their points.
+
+    Returns:
+        Dictionary with the picks, meshes, segmentations and tomograms of the run.
+    """
+    picks = []
+    for pick in run.picks:
+        num_points = len(pick.points or []) if count_points else None
+        picks.append([pick.pickable_object_name, pick.user_id, pick.session_id, num_points])
+
+    meshes = [[mesh.pickable_object_name, mesh.user_id, mesh.session_id] for mesh in run.meshes]
+
+    segmentations = [
+        [seg.name, seg.user_id, seg.session_id, seg.voxel_size, seg.is_multilabel] for seg in run.segmentations
+    ]
+
+    tomograms = {}
+    for vs in run.voxel_spacings:
+        # Keyed like copick's VoxelSpacing directories (e.g. "10.000"), as in the storage report
+        tomograms[voxel_spacing_key(vs.voxel_size)] = sorted(tomo.tomo_type for tomo in vs.tomograms)
+
+    return {"picks": picks, "meshes": meshes, "segmentations": segmentations, "tomograms": tomograms}
+
+
+def _summarize_cached(
+    config_path: str,
+    run: Any,
+    count_points: bool,
+) -> Tuple[str, Dict[str, Any], bool]:
+    """Return the partial summary for a run, recomputing it only if the run's fingerprint changed."""
+    fingerprint = run_fingerprint(run)
+    key = f"{fingerprint}:{int(count_points)}"
+
+    with _run_summary_lock:
+        cached = _run_summary_cache.get(config_path, {}).get(run.name)
+    # A summary with point counts also serves calls that do not need them
+    if cached is not None and cached[0] in (key, f"{fingerprint}:1"):
+        return run.name, cached[1], False
+
+    # Contents changed since the run objects were cached, make sure copick re-queries them.
+    if cached is not None:
+        run.refresh()
+
+    partial = summarize_run(run, count_points=count_points)
+    with _run_summary_lock:
+        _run_summary_cache.setdefault(config_path, {})[run.name] = (key, partial)
+
+    return run.name, partial, True
+
+
+def _truncate(names: List[str], limit: int) -> Dict[str, Any]:
+    names = sorted(names)
+    return {"count": len(names), "runs": names[:limit], "truncated": len(names) > limit}
+
+
+def aggregate_run_summaries(
+    partials: Dict[str, Dict[str, Any]],
+    object_names: List[str],
+    max_missing_runs: int = 50,
+) -> Dict[str, Any]:
+    """Merge per-run partial summaries into project-wide totals.
+
+    Args:
+        partials: Mapping of run name to partial summary (see `summarize_run`).
+        object_names: Names of the pickable objects defined in the project.
+        max_missing_runs: Maximum number of run names listed per missing artifact.
+
+    Returns:
+        Dictionary of project-wide totals and runs missing each artifact type.
+    """
+    picks: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    meshes: Dict[str, Dict[str, int]] = {}
+    segmentations: Dict[str, Dict[str, Any]] = {}
+    tomograms: Dict[str, Dict[str, int]] = {}
+
+    runs_with_picks: Dict[str, set] = {name: set() for name in object_names}
+    runs_with_segmentation: Dict[str, set] = {}
+    runs_without_tomograms = []
+
+    for run_name, partial in partials.items():
+        for object_name, user_id, _session_id, num_points in partial["picks"]:
+            entry = picks.setdefault(object_name, {}).setdefault(user_id, {"pick_sets": 0, "points": 0, "runs": set()})
+            entry["pick_sets"] += 1
+            entry["points"] = None if num_points is None or entry["points"] is None else entry["points"] + num_points
+            entry["runs"].add(run_name)
+            runs_with_picks.setdefault(object_name, set()).add(run_name)
+
+        for object_name, user_id, _session_id in partial["meshes"]:
+            per_user = meshes.setdefault(object_name, {})
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+
+        for name, _user_id, _session_id, voxel_size, _is_multilabel in partial["segmentations"]:
+            entry = segmentations.setdefault(name, {"count": 0, "runs": set(), "voxel_sizes": set()})
+            entry["count"] += 1
+            entry["runs"].add(run_name)
+            entry["voxel_sizes"].add(voxel_size)
+            runs_with_segmentation.setdefault(name, set()).add(run_name)
+
+        if not any(partial["tomograms"].values()):
+            runs_without_tomograms.append(run_name)
+        for voxel_size, tomo_types in partial["tomograms"].items():
+            per_type = tomograms.setdefault(voxel_size, {})
+            for tomo_type in tomo_types:
+                per_type[tomo_type] = per_type.get(tomo_type, 0) + 1
+
+    # Sets are not JSON serializable, convert them to counts/sorted lists
+    for per_user in picks.values():
+        for entry in per_user.values():
+            entry["runs"] = len(entry["runs"])
+    for entry in segmentations.values():
+        entry["runs"] = len(entry["runs"])
+        entry["voxel_sizes"] = sorted(entry["voxel_sizes"])
+
+    all_runs = set(partials)
+    runs_missing = {
+        "tomograms": _truncate(runs_without_tomograms, max_missing_runs),
+        "picks": {
+            name: _truncate(list(all_runs - runs), max_missing_runs) for name, runs in sorted(runs_with_picks.items())
+        },
+        "segmentations": {
+            name: _truncate(list(all_runs - runs), max_missing_runs)
+            for name, runs in sorted(runs_with_segmentation.items())
+        },
+    }
+
+    return {
+        "picks": picks,
+        "meshes": meshes,
+        "segmentations": segmentations,
+        "tomograms": tomograms,
+        "runs_missing": runs_missing,
+    }
+
+
+def collect_run_summaries(
+    root: Any,
+    config_path: str,
+    count_points: bool = True,
+    max_workers: Optional[int] = None,
+    progress: Any = None,
+) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Get the partial summaries of all runs, walking runs in parallel.
+
+    Partial summaries are cached by run fingerprint, so only runs whose contents changed are walked again.
+
+    Args:
+        root: The copick root of the project.
+        config_path: Path to the copick configuration file (used as cache key).
+        count_points: Whether to load pick files to count their points.
+        max_workers: Maximum number of threads used for the per-run walk (default: executor default).
+        progress: Optional `ProgressReporter` receiving the number of runs summarized.
+
+    Returns:
+        Tuple of the partial summary of each run (see `summarize_run`) and the number of runs walked again.
+    """
+    runs = root.runs
+
+    partials: Dict[str, Dict[str, Any]] = {}
+    recomputed = 0
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_summarize_cached, config_path, run, count_points) for run in runs]
+        for future in concurrent.futures.as_completed(futures):
+            run_name, partial, was_recomputed = future.result()
+            partials[run_name] = partial
+            recomputed += int(was_recomputed)
+            if progress is not None:
+                progress.update(len(partials), len(runs), f"Summarized {len(partials)}/{len(runs)} runs")
+    finally:
+        # On cancellation, drop runs that have not started yet. Finished runs stay cached for the next call.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    # Drop cached partials of runs that no longer exist
+    with _run_summary_lock:
+        cached_runs = _run_summary_cache.get(config_path, {})
+        for run_name in set(cached_runs) - set(partials):
+            del cached_runs[run_name]
+
+    return partials, recomputed
+
+
+def get_project_summary(
+    root: Any,
+    config_path: str,
+    count_points: bool = True,
+    max_workers: Optional[int] = None,
+    max_missing_runs: int = 50,
+    progress: Any = None,
+) -> Dict[str, Any]:
+    """Compute project-wide totals by walking all runs in parallel.
+
+    Per-run partial results are cached by run fingerprint, so later calls only recompute runs whose contents changed.
+
+    Args:
+        root: The copick root of the project.
+        config_path: Path to the copick configuration file (used as cache key).
+        count_points: Whether to load pick files to count their points.
+        max_workers: Maximum number of threads used for the per-run walk (default: executor default).
+        max_missing_runs: Maximum number of run names listed per missing artifact.
+        progress: Optional `ProgressReporter` receiving the number of runs summarized.
+
+    Returns:
+        Dictionary containing the aggregated project summary.
+    """
+    object_names = [obj.name for obj in root.pickable_objects]
+    partials, recomputed = collect_run_summaries(root, config_path, count_points, max_workers, progress)
+
+    summary = aggregate_run_summaries(partials, object_names, max_missing_runs=max_missing_runs)
+    summary["total_runs"] = len(partials)
+    summary["cache"] = {"runs_recomputed": recomputed, "runs_cached": len(partials) - recomputed}
+
+    return summary
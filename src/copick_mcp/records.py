@@ -0,0 +1,268 @@
+"""Compact columnar tables for the entries returned by listing tools, and the JSON encoder used for cached results.
+
+Listing tools collect their entries in a `RecordTable`, created for the layout of the result. In the default
+"records" layout the table holds the usual list of dicts and is serialized exactly like that list. In the "columns"
+layout it holds one tuple per entry and is rendered as one list per field, which allocates and serializes a handful
+of lists instead of one dict per entry and is several times faster for runs with thousands of entities (see
+`benchmarks/bench_listings.py`).
+
+Listings are sorted by their key fields and versioned by an ETag, a hash of the tool, its arguments and the listed
+entries. Clients pass the ETag of a previous result as `if_none_match` to get a short "unchanged" answer, or as
+`since_etag` to get only the entries added and removed since then. The entries of recent ETags are kept in memory
+for these diffs, up to an approximate size limit.
+
+Results written to disk (memoized results, job results) are encoded with orjson if it is installed, and with the
+standard library json module otherwise. Tool results returned to clients are serialized by FastMCP, not by orjson.
+
+Environment variables:
+    COPICK_MCP_LISTING_CACHE_MB: Approximate memory used by the listing versions kept for diffs (default 64).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+LAYOUTS = ("records", "columns")
+
+
+def check_layout(layout: str) -> None:
+    """Raise a ValueError if a listing layout is not supported."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Invalid layout '{layout}'. Valid layouts: {', '.join(LAYOUTS)}")
+
+
+class RecordTable:
+    """Entries of a listing, stored in the layout they are rendered in.
+
+    Tables in the "records" layout store the dict of each entry as it is appended, so rendering them costs no more
+    than building the dicts directly. Tables in the "columns" layout store one tuple of field values per entry.
+
+    Attributes:
+        fields: Names of the fields, in the order values are appended.
+        optional: Fields omitted from a record when their value is None (records layout only).
+        key: Fields identifying an entry, the table is sorted by these (default: all fields).
+        layout: Layout the entries are stored and rendered in ("records" or "columns").
+    """
+
+    __slots__ = ("fields", "optional", "key", "layout", "_rows")
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        optional: Sequence[str] = (),
+        key: Optional[Sequence[str]] = None,
+        layout: str = "records",
+    ):
+        check_layout(layout)
+        self.fields = tuple(fields)
+        self.optional = frozenset(optional)
+        self.key = tuple(key) if key is not None else self.fields
+        self.layout = layout
+        self._rows: List[Union[Dict[str, Any], Tuple[Any, ...]]] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(self, *values: Any) -> None:
+        """Append an entry, given the values of all fields in order."""
+        fields = self.fields
+        if len(values) != len(fields):
+            raise ValueError(f"Expected {len(fields)} values ({', '.join(fields)}), got {len(values)}")
+        self._rows.append(self._row(values))
+
+    def _values(self) -> List[Tuple[Any, ...]]:
+        """One tuple of field values per entry (None for omitted optional fields)."""
+        if self.layout == "columns":
+            return self._rows
+        fields = self.fields
+        return [tuple(row.get(field) for field in fields) for row in self._rows]
+
+    def column(self, field: str) -> List[Any]:
+        """Values of a field for all entries."""
+        if self.layout == "records":
+            return [row.get(field) for row in self._rows]
+        index = self.fields.index(field)
+        return [row[index] for row in self._rows]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """One dict per entry."""
+        if self.layout == "records":
+            return list(self._rows)
+
+        fields, optional = self.fields, self.optional
+        return [
+            {field: value for field, value in zip(fields, row) if value is not None or field not in optional}
+            for row in self._rows
+        ]
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """One list per field."""
+        if not self._rows:
+            return {field: [] for field in self.fields}
+        return {field: list(column) for field, column in zip(self.fields, zip(*self._values()))}
+
+    def render(self, layout: Optional[str] = None) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+        """Render the table in a listing layout ("records" or "columns", default: the layout of the table)."""
+        layout = layout or self.layout
+        check_layout(layout)
+        return self.to_records() if layout == "records" else self.to_columns()
+
+    def sort(self) -> None:
+        """Sort the entries by their key fields (None sorts last)."""
+        if self.layout == "records":
+            key = self.key
+            self._rows.sort(key=lambda row: tuple((row.get(f) is None, row.get(f)) for f in key))
+            return
+        indices = [self.fields.index(field) for field in self.key]
+        self._rows.sort(key=lambda row: tuple((row[i] is None, row[i]) for i in indices))
+
+    def _canonical_rows(self) -> List[str]:
+        return [json.dumps(values, sort_keys=True, default=str) for values in self._values()]
+
+    def diff(self, previous: Optional["RecordTable"]) -> Tuple["RecordTable", "RecordTable"]:
+        """Entries added and removed since a previous version of the table.
+
+        Entries whose values changed appear in both, with their new and their old values.
+        """
+        before = set(previous._canonical_rows()) if previous is not None else set()
+        now = self._canonical_rows()
+
+        added = RecordTable(self.fields, self.optional, self.key, self.layout)
+        added._rows = [row for row, canonical in zip(self._rows, now) if canonical not in before]
+        removed = RecordTable(self.fields, self.optional, self.key, self.layout)
+        if previous is not None:
+            current = set(now)
+            removed._rows = [
+                self._row(values)
+                for values, canonical in zip(previous._values(), previous._canonical_rows())
+                if canonical not in current
+            ]
+        return added, removed
+
+    def _row(self, values: Tuple[Any, ...]) -> Union[Dict[str, Any], Tuple[Any, ...]]:
+        """The stored row of an entry, given the values of all fields in order."""
+        if self.layout == "columns":
+            return values
+        optional = self.optional
+        if not optional:
+            return dict(zip(self.fields, values))
+        return {field: value for field, value in zip(self.fields, values) if value is not None or field not in optional}
+
+
+# Recent listing versions by ETag (scope key, tables, estimated size in bytes), for diffs
+_versions: "OrderedDict[str, Tuple[str, Dict[str, RecordTable], int]]" = OrderedDict()
+_versions_bytes = 0
+_versions_lock = threading.Lock()
+
+# Approximate memory of an entry beyond its JSON text (dict or tuple, boxed values)
+_ENTRY_OVERHEAD = 200
+
+
+def _scope_key(scope: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(scope or {}, sort_keys=True, default=str)
+
+
+def _etag(scope_key: str, tables: Dict[str, RecordTable], canonical: Dict[str, List[str]]) -> str:
+    payload = {name: [tables[name].fields, canonical[name]] for name in sorted(tables)}
+    return hashlib.sha256(f"{scope_key}\n{json.dumps(payload)}".encode()).hexdigest()[:16]
+
+
+def listing_etag(tables: Dict[str, RecordTable], scope: Optional[Dict[str, Any]] = None) -> str:
+    """Hash the tool and arguments a listing was produced by and the (sorted) contents of its tables."""
+    canonical = {name: table._canonical_rows() for name, table in tables.items()}
+    return _etag(_scope_key(scope), tables, canonical)
+
+
+def _remember(etag: str, scope_key: str, tables: Dict[str, RecordTable], size: int) -> None:
+    """Keep the tables of a listing version, dropping the least recently used versions above the size limit."""
+    global _versions_bytes
+
+    max_bytes = int(float(os.getenv("COPICK_MCP_LISTING_CACHE_MB", "64")) * 1024**2)
+    with _versions_lock:
+        if etag in _versions:
+            _versions.move_to_end(etag)
+            return
+        if size > max_bytes:
+            return
+        _versions[etag] = (scope_key, tables, size)
+        _versions_bytes += size
+        while _versions_bytes > max_bytes:
+            _, (_, _, dropped) = _versions.popitem(last=False)
+            _versions_bytes -= dropped
+
+
+def render_listing(
+    tables: Dict[str, RecordTable],
+    layout: str = "records",
+    if_none_match: Optional[str] = None,
+    since_etag: Optional[str] = None,
+    scope: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Sort, version and render the tables of a listing tool result.
+
+    Args:
+        tables: Tables of the listing by result field name.
+        layout: Layout of the entries ("records" or "columns").
+        if_none_match: ETag of a previous result. If the listing is unchanged, only the ETag is returned.
+        since_etag: ETag of a previous result. If it is known, only added and removed entries are returned.
+        scope: Tool name and the arguments selecting the entries (not the layout). ETags of listings with different
+            scopes never match, and diffs are only computed against a version with the same scope.
+
+    Returns:
+        Result fields: the ETag, and the rendered tables, their diffs, or `unchanged`.
+    """
+    check_layout(layout)
+    for table in tables.values():
+        table.sort()
+    scope_key = _scope_key(scope)
+    canonical = {name: table._canonical_rows() for name, table in tables.items()}
+    etag = _etag(scope_key, tables, canonical)
+    size = sum(len(row) + _ENTRY_OVERHEAD for rows in canonical.values() for row in rows)
+    _remember(etag, scope_key, tables, size)
+
+    previous = None
+    if since_etag:
+        with _versions_lock:
+            version = _versions.get(since_etag)
+        if version is not None and version[0] == scope_key:
+            previous = version[1]
+
+    if if_none_match is not None and if_none_match == etag:
+        return {"etag": etag, "unchanged": True}
+
+    result: Dict[str, Any] = {"etag": etag}
+    if previous is not None:
+        result["since_etag"] = since_etag
+        for name, table in tables.items():
+            added, removed = table.diff(previous.get(name))
+            result[name] = {"added": added.render(layout), "removed": removed.render(layout)}
+        return result
+
+    if since_etag is not None:
+        # Unknown or expired version, fall back to the full listing
+        result["diff"] = False
+    for name, table in tables.items():
+        result[name] = table.render(layout)
+    return result
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object as JSON, converting unsupported types (e.g. dates) to strings."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str).encode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,69 @@
+"""Store for partial results of long-running tool calls.
+
+When a tool call is cancelled or times out, the units of work it already finished are kept here, keyed on the tool
+name and its arguments. A retry with the same arguments picks up the stored units and only computes the rest.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+
+class ResumableStore:
+    """Bounded, time-limited in-memory store of partial tool results.
+
+    Attributes:
+        ttl: Number of seconds after the last access before partial results are discarded.
+        max_entries: Maximum number of partial results kept (least recently used are evicted first).
+    """
+
+    def __init__(self, ttl: float = 1800.0, max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool: str, **arguments: Any) -> str:
+        """Build a store key from a tool name and its arguments."""
+        return f"{tool}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+    def _expire(self, now: float) -> None:
+        for key in [k for k, entry in self._entries.items() if now - entry["accessed"] > self.ttl]:
+            del self._entries[key]
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Get the partial results for a key, creating an empty record if none exist.
+
+        The returned dictionary is shared: units of work written to it are immediately visible to retries.
+
+        Args:
+            key: Store key (see `ResumableStore.key`).
+
+        Returns:
+            Mutable dictionary mapping unit identifiers to their results.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"accessed": now, "units": {}}
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                entry["accessed"] = now
+                self._entries.move_to_end(key)
+            return entry["units"]
+
+    def discard(self, key: str) -> None:
+        """Forget the partial results for a key (e.g. after the call completed)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Partial results of interrupted tool calls, shared by all tools of the server
+partial_results = ResumableStore()
@@ -0,0 +1,112 @@
+"""Seeded random sampling of picks across the runs of a project.
+
+Sampling uses random priorities (bottom-k sampling, a reservoir sampler that can be merged): every point gets a
+pseudo-random key derived from the seed and its pick set, and the sample is made of the points with the smallest keys.
+Each run keeps only its smallest keys while streaming through its pick files, and the per-run samples are merged by
+keeping the smallest keys overall. The result is a uniform sample without replacement that only depends on the seed,
+not on the order or parallelism in which runs were read, and memory is bounded by one pick file plus the sample.
+
+Samples can be stratified, e.g. by run or user, in which case every stratum gets its own sample of the given size.
+"""
+
+import hashlib
+import heapq
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Fields pick sets can be stratified by
+STRATA = ("run", "user_id", "session_id", "object_name")
+
+
+def point_keys(seed: int, run_name: str, object_name: str, user_id: str, session_id: str, count: int) -> np.ndarray:
+    """Random keys in [0, 1) of the points of a pick set, reproducible from the seed and the pick set's identity."""
+    identity = "\0".join((str(seed), run_name, object_name, str(user_id), str(session_id)))
+    entropy = int.from_bytes(hashlib.sha256(identity.encode()).digest()[:16], "little")
+    return np.random.default_rng(entropy).random(count)
+
+
+def _stratum(stratify_by: Optional[str], run_name: str, pick: Any) -> str:
+    if stratify_by is None:
+        return ""
+    if stratify_by == "run":
+        return run_name
+    return str(getattr(pick, "pickable_object_name" if stratify_by == "object_name" else stratify_by))
+
+
+def sample_run_picks(
+    run: Any,
+    sample_size: int,
+    seed: int,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    stratify_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Sample the picks of a run, keeping the `sample_size` points with the smallest keys per stratum.
+
+    Args:
+        run: The copick run.
+        sample_size: Number of points to keep per stratum.
+        seed: Seed of the point keys.
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        stratify_by: Field the sample is stratified by (one of `STRATA`, optional).
+
+    Returns:
+        Dictionary with the candidate points per stratum (sorted by key) and the number of points read per stratum.
+    """
+    from copick_mcp.bulk_picks import read_run_picks
+
+    candidates: Dict[str, List[Dict[str, Any]]] = {}
+    counts: Dict[str, int] = {}
+    for pick in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id):
+        columns = read_run_picks(pick)
+        points = columns["positions"]
+        if not len(points):
+            continue
+        stratum = _stratum(stratify_by, run.name, pick)
+        counts[stratum] = counts.get(stratum, 0) + len(points)
+
+        keys = point_keys(seed, run.name, pick.pickable_object_name, pick.user_id, pick.session_id, len(points))
+        kept = np.argpartition(keys, sample_size)[:sample_size] if len(keys) > sample_size else np.arange(len(keys))
+        for index in kept.tolist():
+            candidates.setdefault(stratum, []).append(
+                {
+                    "key": float(keys[index]),
+                    "run_name": run.name,
+                    "object_name": pick.pickable_object_name,
+                    "user_id": pick.user_id,
+                    "session_id": pick.session_id,
+                    "point_index": index,
+                    "location": points[index].tolist(),
+                    "score": float(columns["scores"][index]),
+                    "instance_id": int(columns["instance_ids"][index]),
+                },
+            )
+
+    samples = {stratum: heapq.nsmallest(sample_size, entries, key=_key) for stratum, entries in candidates.items()}
+    return {"samples": samples, "counts": counts}
+
+
+def _key(entry: Dict[str, Any]) -> float:
+    return entry["key"]
+
+
+def merge_samples(run_samples: Iterable[Dict[str, Any]], sample_size: int) -> Dict[str, Any]:
+    """Merge per-run samples (see `sample_run_picks`) into the sample of the whole project.
+
+    Returns:
+        Dictionary with the sampled points per stratum, ordered by key (i.e. in random order), and the number of
+        points read per stratum.
+    """
+    candidates: Dict[str, List[Dict[str, Any]]] = {}
+    counts: Dict[str, int] = {}
+    for result in run_samples:
+        for stratum, entries in result["samples"].items():
+            merged = heapq.merge(candidates.get(stratum, []), entries, key=_key)
+            candidates[stratum] = [entry for _, entry in zip(range(sample_size), merged)]
+        for stratum, count in result["counts"].items():
+            counts[stratum] = counts.get(stratum, 0) + count
+    return {"samples": dict(sorted(candidates.items())), "counts": dict(sorted(counts.items()))}
@@ -0,0 +1,347 @@
+"""Spatial queries on pick sets backed by cached KD-trees."""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from copick_mcp.fingerprint import file_token
+
+QUERY_MODES = ("radius", "knn", "box")
+
+
+class KDTreeCache:
+    """Memory-bounded LRU of KD-trees built over pick sets.
+
+    Trees are keyed on the pick file and invalidated when the file changes (size or modification time).
+
+    Attributes:
+        max_bytes: Approximate upper bound of the memory held by cached trees.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("COPICK_MCP_KDTREE_CACHE_MB", "256")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        # path -> (file token, points, tree, estimated size in bytes)
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_bytes(points: np.ndarray) -> int:
+        # The tree keeps a copy of the data, an index array and roughly one node per leaf of 16 points.
+        return 2 * points.nbytes + 8 * len(points) + 64 * (len(points) // 16 + 1)
+
+    def get(self, pick: Any) -> Tuple[np.ndarray, Any]:
+        """Get the points and KD-tree of a pick set, building the tree if needed.
+
+        Args:
+            pick: The copick pick set.
+
+        Returns:
+            Tuple of the [N, 3] point array (x, y, z in angstrom) and the `scipy.spatial.cKDTree` over it (None for
+            empty pick sets).
+        """
+        from scipy.spatial import cKDTree
+
+        token = file_token(pick.fs, pick.path)
+        with self._lock:
+            entry = self._entries.get(pick.path)
+            if entry is not None and entry[0] == token:
+                self._entries.move_to_end(pick.path)
+                return entry[1], entry[2]
+
+        # Re-read the file, the pick object may hold points loaded before the file changed.
+        pick.load()
+        points, _ = pick.numpy()
+        tree = cKDTree(points) if len(points) > 0 else None
+        size = self._estimate_bytes(points)
+
+        with self._lock:
+            previous = self._entries.pop(pick.path, None)
+            if previous is not None:
+                self._bytes -= previous[3]
+            if size <= self.max_bytes:
+                self._entries[pick.path] = (token, points, tree, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted[3]
+
+        return points, tree
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of cached trees and their estimated memory use."""
+        with self._lock:
+            return {"trees": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+kdtree_cache = KDTreeCache()
+
+
+def _as_point(value: Optional[List[float]], name: str) -> np.ndarray:
+    if value is None or len(value) != 3:
+        raise ValueError(f"'{name}' must be a list of three coordinates [x, y, z]")
+    return np.asarray(value, dtype=float)
+
+
+def query_pick_set(
+    points: np.ndarray,
+    tree: Any,
+    mode: str,
+    center: Optional[List[float]] = None,
+    radius: Optional[float] = None,
+    k: Optional[int] = None,
+    min_corner: Optional[List[float]] = None,
+    max_corner: Optional[List[float]] = None,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Run a spatial query against a single pick set.
+
+    Args:
+        points: [N, 3] point array.
+        tree: KD-tree over `points` (None if empty).
+        mode: "radius" (points within `radius` of `center`), "knn" (the `k` points nearest to `center`) or "box"
+            (points with `min_corner <= point <= max_corner`).
+        center: Query point [x, y, z] in angstrom (radius and knn modes).
+        radius: Query radius in angstrom (radius mode).
+        k: Number of neighbors (knn mode).
+        min_corner: Lower corner [x, y, z] of the box in angstrom (box mode).
+        max_corner: Upper corner [x, y, z] of the box in angstrom (box mode).
+
+    Returns:
+        Tuple of the indices of the matching points and their distances to `center` (None in box mode).
+    """
+    if mode == "box":
+        lower, upper = _as_point(min_corner, "min_corner"), _as_point(max_corner, "max_corner")
+        if tree is None:
+            return np.empty(0, dtype=int), None
+        # Chebyshev ball around the box center covering the box, then exact filtering.
+        box_center = (lower + upper) / 2
+        candidates = np.asarray(tree.query_ball_point(box_center, r=float(np.max(upper - box_center)), p=np.inf))
+        if len(candidates) == 0:
+            return np.empty(0, dtype=int), None
+        inside = np.all((points[candidates] >= lower) & (points[candidates] <= upper), axis=1)
+        return np.sort(candidates[inside]), None
+
+    query = _as_point(center, "center")
+    if tree is None:
+        return np.empty(0, dtype=int), np.empty(0)
+
+    if mode == "radius":
+        if radius is None or radius < 0:
+            raise ValueError("'radius' must be a non-negative number for radius queries")
+        indices = np.asarray(tree.query_ball_point(query, r=radius), dtype=int)
+        distances = np.linalg.norm(points[indices] - query, axis=1)
+    elif mode == "knn":
+        if k is None or k < 1:
+            raise ValueError("'k' must be a positive integer for knn queries")
+        distances, indices = tree.query(query, k=min(k, len(points)))
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+    else:
+        raise ValueError(f"Invalid query mode '{mode}'. Valid modes: {', '.join(QUERY_MODES)}")
+
+    order = np.argsort(distances, kind="stable")
+    return indices[order], distances[order]
+
+
+def query_picks_spatial(
+    run: Any,
+    mode: str,
+    center: Optional[List[float]] = None,
+    radius: Optional[float] = None,
+    k: Optional[int] = None,
+    min_corner: Optional[List[float]] = None,
+    max_corner: Optional[List[float]] = None,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    max_results: int = 1000,
+) -> Dict[str, Any]:
+    """Find the picks of a run within a radius of, nearest to, or inside a box around a location.
+
+    Matches from all selected pick sets are merged. In radius and knn mode they are sorted by distance (knn keeps the
+    `k` nearest overall), in box mode by pick set and point index.
+
+    Args:
+        run: The copick run.
+        mode: Query mode, see `query_pick_set`.
+        center: Query point [x, y, z] in angstrom (radius and knn modes).
+        radius: Query radius in angstrom (radius mode).
+        k: Number of neighbors (knn mode).
+        min_corner: Lower corner [x, y, z] of the box in angstrom (box mode).
+        max_corner: Upper corner [x, y, z] of the box in angstrom (box mode).
+        object_name: Name of the object to filter by (optional).
+        user_id: User ID to filter by (optional).
+        session_id: Session ID to filter by (optional).
+        max_results: Maximum number of matches returned.
+
+    Returns:
+        Dictionary with the matches, the total match count and the number of pick sets searched.
+    """
+    if mode not in QUERY_MODES:
+        raise ValueError(f"Invalid query mode '{mode}'. Valid modes: {', '.join(QUERY_MODES)}")
+
+    matches = []
+    picks = run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id)
+    for pick in picks:
+        points, tree = kdtree_cache.get(pick)
+        indices, distances = query_pick_set(points, tree, mode, center, radius, k, min_corner, max_corner)
+        for i, index in enumerate(indices):
+            match = {
+                "object_name": pick.pickable_object_name,
+                "user_id": pick.user_id,
+                "session_id": pick.session_id,
+                "index": int(index),
+                "location": points[index].tolist(),
+            }
+            if distances is not None:
+                match["distance"] = float(distances[i])
+            matches.append(match)
+
+    if mode != "box":
+        matches.sort(key=lambda m: m["distance"])
+        if mode == "knn":
+            matches = matches[:k]
+
+    return {
+        "matches": matches[:max_results],
+        "count": len(matches),
+        "truncated": len(matches) > max_results,
+        "pick_sets_searched": len(picks),
+    }
+
+
+def lookup_labels(array: Any, points: np.ndarray, voxel_size: float) -> np.ndarray:
+    """Look up the segmentation label at each point.
+
+    Points are converted to voxel indices in a single vectorized operation and read with zarr's coordinate
+    selection, which only fetches (and, for stores supporting it, fetches concurrently) the chunks containing points.
+
+    Args:
+        array: The zarr array of the segmentation (z, y, x).
+        points: [N, 3] point array (x, y, z in angstrom).
+        voxel_size: Voxel size of the segmentation in angstrom.
+
+    Returns:
+        [N] array of labels, -1 for points outside the segmentation.
+    """
+    labels = np.full(len(points), -1, dtype=np.int64)
+    if len(points) == 0:
+        return labels
+
+    # Voxel i is centered at i * voxel_size, (x, y, z) -> (z, y, x)
+    indices = np.rint(points[:, ::-1] / voxel_size).astype(np.int64)
+    inside = np.all((indices >= 0) & (indices < np.asarray(array.shape)), axis=1)
+    if inside.any():
+        z, y, x = indices[inside].T
+        labels[inside] = array.vindex[z, y, x]
+
+    return labels
+
+
+def select_segmentation(
+    run: Any,
+    name: str,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+) -> Any:
+    """Get the single segmentation of a run matching the given filters.
+
+    Raises:
+        ValueError: If no or more than one segmentation matches.
+    """
+    segmentations = run.get_segmentations(name=name, user_id=user_id, session_id=session_id, voxel_size=voxel_size)
+    if not segmentations and not run.get_segmentations(name=name):
+        from copick_mcp.names import NameIndex, NameNotFoundError
+
+        suggestions = NameIndex(seg.name for seg in run.segmentations).suggest(name)
+        raise NameNotFoundError("Segmentation", name, suggestions, f" in run '{run.name}'")
+    if not segmentations:
+        raise ValueError(f"No segmentation '{name}' matching the given filters in run '{run.name}'")
+    if len(segmentations) > 1:
+        candidates = ", ".join(f"{s.name}:{s.user_id}/{s.session_id}@{s.voxel_size}" for s in segmentations)
+        raise ValueError(f"Multiple segmentations match, specify seg_user_id/seg_session_id/voxel_size: {candidates}")
+    return segmentations[0]
+
+
+def picks_in_segmentation(
+    run: Any,
+    segmentation_name: str,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: Optional[str] = None,
+    voxel_size: Optional[float] = None,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    return_point_labels: bool = False,
+) -> Dict[str, Any]:
+    """Count how many picks of a run fall inside each label of a segmentation.
+
+    Args:
+        run: The copick run.
+        segmentation_name: Name of the segmentation.
+        seg_user_id: User ID of the segmentation (optional).
+        seg_session_id: Session ID of the segmentation (optional).
+        voxel_size: Voxel size of the segmentation (optional).
+        object_name: Name of the picked object to filter by (optional).
+        user_id: User ID of the picks to filter by (optional).
+        session_id: Session ID of the picks to filter by (optional).
+        return_point_labels: Whether to return the label of every point.
+
+    Returns:
+        Dictionary with the segmentation used and per-pick-set hit counts.
+
+    Raises:
+        ValueError: If no or more than one segmentation matches.
+    """
+    import zarr
+
+    seg = select_segmentation(run, segmentation_name, seg_user_id, seg_session_id, voxel_size)
+
+    array = zarr.open(seg.zarr(), mode="r")["0"]
+    # Binary segmentations are named after their object, multilabel ones use the object labels of the project.
+    label_names = {1: seg.name}
+    if seg.is_multilabel:
+        label_names = {obj.label: obj.name for obj in run.root.pickable_objects}
+
+    pick_sets = []
+    for pick in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id):
+        points, _ = pick.numpy()
+        labels = lookup_labels(array, points, float(seg.voxel_size))
+
+        values, counts = np.unique(labels, return_counts=True)
+        per_label = dict(zip(values.tolist(), counts.tolist()))
+        entry = {
+            "object_name": pick.pickable_object_name,
+            "user_id": pick.user_id,
+            "session_id": pick.session_id,
+            "num_points": int(len(points)),
+            "inside": int(np.count_nonzero(labels > 0)),
+            "background": per_label.get(0, 0),
+            "out_of_bounds": per_label.get(-1, 0),
+            "labels": [
+                {"label": label, "name": label_names.get(label), "count": count}
+                for label, count in sorted(per_label.items())
+                if label > 0
+            ],
+        }
+        if return_point_labels:
+            entry["point_labels"] = labels.tolist()
+        pick_sets.append(entry)
+
+    return {
+        "segmentation": {
+            "name": seg.name,
+            "user_id": seg.user_id,
+            "session_id": seg.session_id,
+            "voxel_size": seg.voxel_size,
+            "is_multilabel": seg.is_multilabel,
+            "shape": list(array.shape),
+        },
+        "pick_sets": pick_sets,
+    }
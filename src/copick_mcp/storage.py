@@ -0,0 +1,216 @@
+"""Storage footprint of copick projects, aggregated per run, artifact type and voxel spacing."""
+
+import concurrent.futures
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from copick_mcp.fingerprint import run_fingerprint, run_locations
+
+# Per-run storage usage: config_path -> run_name -> (fingerprint, usage)
+_run_usage_cache: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+_run_usage_lock = threading.Lock()
+
+# Zarr stores with more chunk files than this, or with at least MIN_CHUNKS_FOR_SIZE_CHECK chunk files smaller than
+# MIN_MEAN_CHUNK_BYTES on average, are flagged as pathologically chunked (slow to list, copy and read).
+MAX_CHUNKS_PER_STORE = 100_000
+MIN_MEAN_CHUNK_BYTES = 16 * 1024
+MIN_CHUNKS_FOR_SIZE_CHECK = 1_000
+
+_ZARR_METADATA_FILES = (".zarray", ".zattrs", ".zgroup", ".zmetadata")
+
+
+def voxel_spacing_key(voxel_size: Any) -> str:
+    """Key of a voxel spacing in reports, formatted like copick's directory names (e.g. "10.000")."""
+    try:
+        return f"{float(voxel_size):.3f}"
+    except ValueError:
+        return str(voxel_size)
+
+
+def _classify(relative_path: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Classify a file below a run directory.
+
+    Returns:
+        Tuple of the artifact type, the voxel spacing (if any) and the relative path of the zarr store containing the
+        file (if any).
+    """
+    parts = relative_path.split("/")
+    store = None
+    for i, part in enumerate(parts[:-1]):
+        if part.endswith(".zarr"):
+            store = "/".join(parts[: i + 1])
+            break
+
+    top = parts[0]
+    if top == "Picks":
+        return "picks", None, store
+    if top == "Meshes":
+        return "meshes", None, store
+    if top == "Segmentations":
+        # Segmentation stores are named "<voxel_size>_<user_id>_<session_id>_<name>.zarr"
+        voxel_spacing = voxel_spacing_key(parts[1].split("_", 1)[0]) if len(parts) > 1 else None
+        return "segmentations", voxel_spacing, store
+    if top.startswith("VoxelSpacing"):
+        voxel_spacing = voxel_spacing_key(top[len("VoxelSpacing") :])
+        artifact = "features" if store is not None and store.endswith("_features.zarr") else "tomograms"
+        return artifact, voxel_spacing, store
+    return "other", None, store
+
+
+def _add(totals: Dict[str, Any], size: int, is_chunk: bool) -> None:
+    totals["bytes"] = totals.get("bytes", 0) + size
+    totals["files"] = totals.get("files", 0) + 1
+    totals["chunk_files"] = totals.get("chunk_files", 0) + int(is_chunk)
+
+
+def run_storage_usage(run: Any) -> Dict[str, Any]:
+    """Walk the static and overlay directories of a run and sum up file sizes.
+
+    Args:
+        run: The copick run.
+
+    Returns:
+        Dictionary with totals per artifact type, per voxel spacing and artifact type, and per zarr store.
+    """
+    by_artifact: Dict[str, Dict[str, int]] = {}
+    by_voxel_spacing: Dict[str, Dict[str, Dict[str, int]]] = {}
+    stores: Dict[str, Dict[str, int]] = {}
+
+    for fs, path in run_locations(run):
+        try:
+            files = fs.find(path, withdirs=False, detail=True)
+        except FileNotFoundError:
+            continue
+
+        # Listed names carry no protocol, e.g. "bucket/key" for object stores.
+        prefix = fs._strip_protocol(path).rstrip("/") + "/"
+        for name, info in files.items():
+            relative = name[len(prefix) :] if name.startswith(prefix) else name
+            size = int(info.get("size") or 0)
+
+            artifact, voxel_spacing, store = _classify(relative)
+            is_chunk = store is not None and relative.rsplit("/", 1)[-1] not in _ZARR_METADATA_FILES
+
+            _add(by_artifact.setdefault(artifact, {}), size, is_chunk)
+            if voxel_spacing is not None:
+                _add(by_voxel_spacing.setdefault(voxel_spacing, {}).setdefault(artifact, {}), size, is_chunk)
+            if store is not None:
+                _add(stores.setdefault(store, {}), size, is_chunk)
+
+    return {"by_artifact": by_artifact, "by_voxel_spacing": by_voxel_spacing, "stores": stores}
+
+
+def _usage_cached(config_path: str, run: Any, refresh: bool) -> Tuple[str, Dict[str, Any], bool]:
+    """Return the storage usage of a run, walking it again only if its fingerprint changed."""
+    fingerprint = run_fingerprint(run)
+    with _run_usage_lock:
+        cached = _run_usage_cache.get(config_path, {}).get(run.name)
+    if cached is not None and cached[0] == fingerprint and not refresh:
+        return run.name, cached[1], False
+
+    usage = run_storage_usage(run)
+    with _run_usage_lock:
+        _run_usage_cache.setdefault(config_path, {})[run.name] = (fingerprint, usage)
+    return run.name, usage, True
+
+
+def _merge(target: Dict[str, int], totals: Dict[str, int]) -> None:
+    for key, value in totals.items():
+        target[key] = target.get(key, 0) + value
+
+
+def chunking_warning(store_totals: Dict[str, int]) -> Optional[str]:
+    """Describe why a zarr store is pathologically chunked, or return None if it is not."""
+    chunks = store_totals.get("chunk_files", 0)
+    if chunks > MAX_CHUNKS_PER_STORE:
+        return f"{chunks} chunk files (more than {MAX_CHUNKS_PER_STORE})"
+    if chunks >= MIN_CHUNKS_FOR_SIZE_CHECK:
+        mean = store_totals["bytes"] / chunks
+        if mean < MIN_MEAN_CHUNK_BYTES:
+            return f"{chunks} chunk files of {mean:.0f} bytes on average (less than {MIN_MEAN_CHUNK_BYTES})"
+    return None
+
+
+def get_storage_report(
+    root: Any,
+    config_path: str,
+    refresh: bool = False,
+    max_workers: Optional[int] = None,
+    max_runs: int = 50,
+    max_warnings: int = 50,
+    progress: Any = None,
+) -> Dict[str, Any]:
+    """Compute the storage footprint of a project by walking all runs in parallel.
+
+    Per-run usage is cached by run fingerprint, so later calls only walk runs whose contents changed.
+
+    Args:
+        root: The copick root of the project.
+        config_path: Path to the copick configuration file (used as cache key).
+        refresh: Walk all runs again, even if their fingerprint is unchanged.
+        max_workers: Maximum number of threads used for the walk (default: executor default).
+        max_runs: Maximum number of runs listed individually (largest first).
+        max_warnings: Maximum number of chunking warnings listed.
+        progress: Optional `ProgressReporter` receiving the number of runs walked.
+
+    Returns:
+        Dictionary containing the aggregated storage report.
+    """
+    runs = root.runs
+
+    usages: Dict[str, Dict[str, Any]] = {}
+    walked = 0
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_usage_cached, config_path, run, refresh) for run in runs]
+        for future in concurrent.futures.as_completed(futures):
+            run_name, usage, was_walked = future.result()
+            usages[run_name] = usage
+            walked += int(was_walked)
+            if progress is not None:
+                progress.update(len(usages), len(runs), f"Walked {len(usages)}/{len(runs)} runs")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    with _run_usage_lock:
+        cached_runs = _run_usage_cache.get(config_path, {})
+        for run_name in set(cached_runs) - set(usages):
+            del cached_runs[run_name]
+
+    by_artifact: Dict[str, Dict[str, int]] = {}
+    by_voxel_spacing: Dict[str, Dict[str, Dict[str, int]]] = {}
+    run_totals: List[Dict[str, Any]] = []
+    warnings = []
+    for run_name, usage in sorted(usages.items()):
+        totals: Dict[str, int] = {}
+        for artifact, artifact_totals in usage["by_artifact"].items():
+            _merge(by_artifact.setdefault(artifact, {}), artifact_totals)
+            _merge(totals, artifact_totals)
+        for voxel_spacing, per_artifact in usage["by_voxel_spacing"].items():
+            for artifact, artifact_totals in per_artifact.items():
+                _merge(by_voxel_spacing.setdefault(voxel_spacing, {}).setdefault(artifact, {}), artifact_totals)
+        for store, store_totals in usage["stores"].items():
+            reason = chunking_warning(store_totals)
+            if reason is not None:
+                warnings.append({"run_name": run_name, "store": store, "reason": reason, **store_totals})
+
+        run_totals.append({"run_name": run_name, **totals, "by_artifact": usage["by_artifact"]})
+
+    run_totals.sort(key=lambda entry: entry.get("bytes", 0), reverse=True)
+    totals: Dict[str, int] = {}
+    for artifact_totals in by_artifact.values():
+        _merge(totals, artifact_totals)
+
+    return {
+        "total_runs": len(usages),
+        "totals": totals,
+        "by_artifact": by_artifact,
+        "by_voxel_spacing": by_voxel_spacing,
+        "largest_runs": run_totals[:max_runs],
+        "chunking_warnings": {
+            "count": len(warnings),
+            "stores": warnings[:max_warnings],
+            "truncated": len(warnings) > max_warnings,
+        },
+        "cache": {"runs_walked": walked, "runs_cached": len(usages) - walked},
+    }
@@ -0,0 +1,419 @@
+"""Low-resolution projection thumbnails of tomograms, with optional segmentation and pick overlays.
+
+Thumbnails are computed from the coarsest pyramid level of a tomogram, read in slabs of one chunk along z, so memory
+use is bounded by the slab size. Six views are available:
+
+    slice_z, slice_y, slice_x  Central slice perpendicular to each axis.
+    mean_z, mean_y, mean_x     Mean intensity projection along each axis.
+
+Views along z are (y, x) images, views along y are (z, x) images and views along x are (z, y) images. Segmentation
+labels are blended in with the color of their object (the label present at the slice, or the highest label along the
+projection axis), and picks are drawn as small squares in the color of their object (in slices, only picks within
+their object's radius of the slice).
+
+PNGs are encoded without additional dependencies and cached below `<cache dir>/thumbnails`. A cached thumbnail is
+reused while the fingerprints of the tomogram level, the segmentation level and the pick files it was computed from
+are unchanged, so repeated requests only cost a few directory listings. The least recently used thumbnails are
+evicted once the cache grows beyond its maximum size.
+
+Environment variables:
+    COPICK_MCP_THUMBNAIL_CACHE_MB: Maximum size of the thumbnail cache in MB (default 256).
+"""
+
+import hashlib
+import math
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from copick_mcp.fingerprint import file_token, store_fingerprint
+from copick_mcp.paths import atomic_write_bytes, get_cache_dir, limit_cache_dir, touch
+from copick_mcp.records import dumps, loads
+from copick_mcp.spatial import kdtree_cache, select_segmentation
+from copick_mcp.volumes import describe_store
+
+VIEWS = ("slice_z", "slice_y", "slice_x", "mean_z", "mean_y", "mean_x")
+
+# Bump to invalidate cached thumbnails when the rendering changes
+_RENDER_VERSION = 1
+
+# Opacity of segmentation labels blended over the tomogram
+_LABEL_ALPHA = 0.4
+
+# Color of labels and picks whose object has no color
+_DEFAULT_COLOR = (255, 255, 0)
+
+# Axis of the volume (z, y, x) each view is computed along, and the axes of its rows and columns
+_VIEW_AXES = {"z": (0, (1, 2)), "y": (1, (0, 2)), "x": (2, (0, 1))}
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode a [H, W] grayscale or [H, W, 3] RGB uint8 image as PNG."""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    color_type = 0 if image.ndim == 2 else 2
+
+    # Every row starts with filter type 0 (none)
+    raw = np.zeros((height, 1 + image[0].size), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+# ============================================================================
+# Projections
+# ============================================================================
+
+
+def coarsest_level(store: Any, voxel_size: float) -> Dict[str, Any]:
+    """Path, shape and voxel spacing (z, y, x in angstrom) of the coarsest pyramid level of an OME-Zarr store."""
+    levels = describe_store(store, include_bytes=False)["levels"]
+    if not levels:
+        raise ValueError(f"No multiscale levels in {store.path}")
+    full, level = levels[0], levels[-1]
+    if level.get("scale") and len(level["scale"]) == 3:
+        spacing = [float(s) for s in level["scale"]]
+    else:
+        spacing = [voxel_size * f / s for f, s in zip(full["shape"], level["shape"])]
+    return {"path": level["path"], "shape": list(level["shape"]), "spacing": spacing}
+
+
+def project_volume(
+    array: Any,
+    centers: Sequence[int],
+    labels: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, np.ndarray]:
+    """Compute the slices and projections of a 3D array, reading it in slabs of one chunk along z.
+
+    Args:
+        array: The zarr array (z, y, x).
+        centers: Index (z, y, x) of the slice perpendicular to each axis.
+        labels: Whether the array holds labels. Projections of labels keep the highest label along the axis instead
+            of the mean intensity.
+        progress: Callback receiving the number of slices read and the total (optional).
+
+    Returns:
+        Images of all views, keyed by view name.
+    """
+    depth, height, width = array.shape
+    cz, cy, cx = (min(max(int(c), 0), n - 1) for c, n in zip(centers, array.shape))
+    dtype = array.dtype if labels else np.float64
+
+    views = {
+        "slice_z": np.zeros((height, width), dtype=dtype),
+        "slice_y": np.zeros((depth, width), dtype=dtype),
+        "slice_x": np.zeros((depth, height), dtype=dtype),
+        "mean_z": np.zeros((height, width), dtype=dtype),
+        "mean_y": np.zeros((depth, width), dtype=dtype),
+        "mean_x": np.zeros((depth, height), dtype=dtype),
+    }
+    slab = array.chunks[0]
+    for z0 in range(0, depth, slab):
+        block = np.asarray(array[z0 : z0 + slab])
+        z1 = z0 + len(block)
+        if z0 <= cz < z1:
+            views["slice_z"] = block[cz - z0].astype(dtype)
+        views["slice_y"][z0:z1] = block[:, cy, :]
+        views["slice_x"][z0:z1] = block[:, :, cx]
+        if labels:
+            np.maximum(views["mean_z"], block.max(axis=0), out=views["mean_z"])
+            views["mean_y"][z0:z1] = block.max(axis=1)
+            views["mean_x"][z0:z1] = block.max(axis=2)
+        else:
+            block = block.astype(np.float64)
+            views["mean_z"] += block.sum(axis=0)
+            views["mean_y"][z0:z1] = block.mean(axis=1)
+            views["mean_x"][z0:z1] = block.mean(axis=2)
+        if progress is not None:
+            progress(z1, depth)
+
+    if not labels and depth:
+        views["mean_z"] /= depth
+    return views
+
+
+def _resample_labels(
+    image: np.ndarray,
+    spacing: Sequence[float],
+    shape: Sequence[int],
+    target_spacing: Sequence[float],
+) -> np.ndarray:
+    """Resample a 2D label image to another grid by nearest neighbour, with 0 outside of the image."""
+    indices = [
+        np.rint(np.arange(n) * target / source).astype(np.int64)
+        for n, target, source in zip(shape, target_spacing, spacing)
+    ]
+    rows, cols = indices
+    valid_rows, valid_cols = rows < image.shape[0], cols < image.shape[1]
+    result = np.zeros(tuple(shape), dtype=image.dtype)
+    result[np.ix_(valid_rows, valid_cols)] = image[np.ix_(rows[valid_rows], cols[valid_cols])]
+    return result
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+
+def _downscale(image: np.ndarray, factor: int, labels: bool = False) -> np.ndarray:
+    """Reduce an image by an integer factor, averaging intensities or subsampling labels."""
+    if factor == 1:
+        return image
+    if labels:
+        return image[::factor, ::factor]
+    # Blocks at the lower and right edges may be partial
+    rows, cols = np.arange(0, image.shape[0], factor), np.arange(0, image.shape[1], factor)
+    sums = np.add.reduceat(np.add.reduceat(image, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, image.shape[0])), np.diff(np.append(cols, image.shape[1])))
+    return sums / counts
+
+
+def _normalize(image: np.ndarray) -> np.ndarray:
+    """Map intensities to uint8, clipping to the 1st and 99th percentiles."""
+    low, high = np.percentile(image, [1, 99]) if image.size else (0.0, 1.0)
+    if high <= low:
+        high = low + 1.0
+    return (np.clip((image - low) / (high - low), 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def _color(value: Any) -> Tuple[int, int, int]:
+    if value is None:
+        return _DEFAULT_COLOR
+    return tuple(int(c) for c in value[:3])
+
+
+def render_view(
+    image: np.ndarray,
+    factor: int,
+    label_image: Optional[np.ndarray] = None,
+    label_colors: Optional[Dict[int, Tuple[int, int, int]]] = None,
+    markers: Optional[List[Tuple[np.ndarray, Tuple[int, int, int]]]] = None,
+) -> np.ndarray:
+    """Render a view as a grayscale image, or an RGB image with labels and markers drawn over it.
+
+    Args:
+        image: Intensities of the view.
+        factor: Integer factor the view is reduced by.
+        label_image: Labels of the view, on the same grid as the intensities (optional).
+        label_colors: Color of each label (optional).
+        markers: Marker positions ([N, 2] rows and columns on the grid of the intensities) and their color (optional).
+
+    Returns:
+        The uint8 image.
+    """
+    gray = _normalize(_downscale(image, factor))
+    if label_image is None and not markers:
+        return gray
+
+    rgb = np.repeat(gray[:, :, None], 3, axis=2).astype(np.float64)
+    if label_image is not None:
+        label_image = _downscale(label_image, factor, labels=True)
+        for label in np.unique(label_image[label_image > 0]).tolist():
+            mask = label_image == label
+            color = np.asarray((label_colors or {}).get(label, _DEFAULT_COLOR), dtype=np.float64)
+            rgb[mask] = (1 - _LABEL_ALPHA) * rgb[mask] + _LABEL_ALPHA * color
+
+    for positions, color in markers or []:
+        if not len(positions):
+            continue
+        centers = np.floor(positions / factor).astype(np.int64)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                rows, cols = centers[:, 0] + dr, centers[:, 1] + dc
+                inside = (rows >= 0) & (rows < rgb.shape[0]) & (cols >= 0) & (cols < rgb.shape[1])
+                rgb[rows[inside], cols[inside]] = color
+
+    return rgb.astype(np.uint8)
+
+
+def _view_markers(
+    view: str,
+    pick_sets: List[Tuple[np.ndarray, Tuple[int, int, int], Optional[float]]],
+    spacing: Sequence[float],
+    centers: Sequence[int],
+) -> List[Tuple[np.ndarray, Tuple[int, int, int]]]:
+    """Positions of the picks in a view, on the grid of the tomogram level."""
+    axis, (row_axis, col_axis) = _VIEW_AXES[view[-1]]
+    markers = []
+    for points, color, radius in pick_sets:
+        # (x, y, z) in angstrom -> (z, y, x) voxel indices of the level
+        indices = np.rint(points[:, ::-1] / np.asarray(spacing))
+        if view.startswith("slice"):
+            tolerance = max(1.0, (radius or 0.0) / spacing[axis])
+            indices = indices[np.abs(indices[:, axis] - centers[axis]) <= tolerance]
+        markers.append((np.stack([indices[:, row_axis], indices[:, col_axis]], axis=1), color))
+    return markers
+
+
+# ============================================================================
+# Thumbnails
+# ============================================================================
+
+
+def tomogram_thumbnails(
+    run: Any,
+    voxel_size: float,
+    tomo_type: str,
+    views: Optional[Sequence[str]] = None,
+    max_size: int = 256,
+    segmentation_name: Optional[str] = None,
+    seg_user_id: Optional[str] = None,
+    seg_session_id: Optional[str] = None,
+    overlay_picks: bool = False,
+    object_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """Compute (or reuse cached) PNG thumbnails of a tomogram.
+
+    Args:
+        run: The copick run.
+        voxel_size: Voxel size of the tomogram.
+        tomo_type: Type of the tomogram.
+        views: Views to render (optional, default all of `VIEWS`).
+        max_size: Maximum width and height of the thumbnails in pixels.
+        segmentation_name: Name of a segmentation to overlay (optional).
+        seg_user_id: User ID of the segmentation (optional).
+        seg_session_id: Session ID of the segmentation (optional).
+        overlay_picks: Whether to draw picks.
+        object_name: Name of the object of the picks to draw (optional).
+        user_id: User ID of the picks to draw (optional).
+        session_id: Session ID of the picks to draw (optional).
+        progress: Callback receiving the number of slices read and the total (optional).
+
+    Returns:
+        Dictionary with the tomogram level used, whether the thumbnails came from the cache, and the path and size of
+        the PNG of every view.
+
+    Raises:
+        ValueError: If the tomogram or segmentation does not exist, or a view is unknown.
+    """
+    import zarr
+
+    views = list(dict.fromkeys(views or VIEWS))
+    unknown = [view for view in views if view not in VIEWS]
+    if unknown:
+        raise ValueError(f"Unknown views: {', '.join(unknown)}. Available views: {', '.join(VIEWS)}")
+    if max_size < 8:
+        raise ValueError("max_size must be at least 8")
+
+    voxel_spacing = run.get_voxel_spacing(voxel_size)
+    tomogram = voxel_spacing.get_tomogram(tomo_type) if voxel_spacing is not None else None
+    if tomogram is None:
+        raise ValueError(f"No tomogram '{tomo_type}' at voxel size {voxel_size} in run '{run.name}'")
+
+    store = tomogram.zarr()
+    level = coarsest_level(store, float(voxel_size))
+    sources: Dict[str, Any] = {"tomogram": store_fingerprint(store, level["path"])}
+
+    seg = seg_store = seg_level = None
+    if segmentation_name is not None:
+        seg = select_segmentation(run, segmentation_name, seg_user_id, seg_session_id)
+        seg_store = seg.zarr()
+        seg_level = coarsest_level(seg_store, float(seg.voxel_size))
+        sources["segmentation"] = store_fingerprint(seg_store, seg_level["path"])
+
+    picks = []
+    if overlay_picks:
+        picks = sorted(
+            (
+                p
+                for p in run.get_picks(object_name=object_name, user_id=user_id, session_id=session_id)
+                if p.fs.exists(p.path)
+            ),
+            key=lambda p: (p.pickable_object_name, p.user_id, p.session_id),
+        )
+        sources["picks"] = [[p.path, file_token(p.fs, p.path)] for p in picks]
+
+    # Thumbnails of the same tomogram and options share a name and are replaced when their sources change
+    options = {
+        "store": store.path,
+        "views": views,
+        "max_size": max_size,
+        "segmentation": [seg.name, seg.user_id, seg.session_id, seg.voxel_size] if seg is not None else None,
+        "picks": [object_name, user_id, session_id] if overlay_picks else None,
+        "version": _RENDER_VERSION,
+    }
+    name = hashlib.sha256(dumps(options)).hexdigest()[:32]
+    directory = get_cache_dir("thumbnails")
+    sidecar = directory / f"{name}.json"
+    paths = {view: directory / f"{name}-{view}.png" for view in views}
+
+    cached = _read_sidecar(sidecar)
+    if cached is not None and cached.get("sources") == sources and all(path.exists() for path in paths.values()):
+        touch(sidecar, *paths.values())
+        return {"level": cached["level"], "cached": True, "views": _describe_views(paths, cached["sizes"])}
+
+    centers = [n // 2 for n in level["shape"]]
+    images = project_volume(zarr.open(store, mode="r")[level["path"]], centers, progress=progress)
+    factor = max(1, math.ceil(max(level["shape"]) / max_size))
+
+    label_images: Dict[str, np.ndarray] = {}
+    label_colors: Dict[int, Tuple[int, int, int]] = {}
+    if seg is not None:
+        # Slices of the segmentation at the same physical positions as the tomogram's slices
+        seg_centers = [round(c * t / s) for c, t, s in zip(centers, level["spacing"], seg_level["spacing"])]
+        seg_images = project_volume(zarr.open(seg_store, mode="r")[seg_level["path"]], seg_centers, labels=True)
+        for view in views:
+            _, axes = _VIEW_AXES[view[-1]]
+            label_images[view] = _resample_labels(
+                seg_images[view],
+                [seg_level["spacing"][a] for a in axes],
+                images[view].shape,
+                [level["spacing"][a] for a in axes],
+            )
+        objects = run.root.pickable_objects
+        if seg.is_multilabel:
+            label_colors = {obj.label: _color(obj.color) for obj in objects}
+        else:
+            colors = {obj.name: _color(obj.color) for obj in objects}
+            present = np.unique(np.concatenate([image.ravel() for image in label_images.values()]))
+            label_colors = {label: colors.get(seg.name, _DEFAULT_COLOR) for label in present.tolist() if label > 0}
+
+    pick_sets = []
+    for pick in picks:
+        points, _ = kdtree_cache.get(pick)
+        if len(points):
+            obj = run.root.get_object(pick.pickable_object_name)
+            color = _color(obj.color) if obj is not None else _DEFAULT_COLOR
+            pick_sets.append((np.asarray(points, dtype=np.float64), color, obj.radius if obj is not None else None))
+
+    sizes = {}
+    for view in views:
+        markers = _view_markers(view, pick_sets, level["spacing"], centers) if pick_sets else None
+        image = render_view(images[view], factor, label_images.get(view), label_colors, markers)
+        atomic_write_bytes(paths[view], encode_png(image))
+        sizes[view] = [int(image.shape[1]), int(image.shape[0])]
+
+    description = {"path": level["path"], "shape": level["shape"], "voxel_spacing": level["spacing"]}
+    atomic_write_bytes(sidecar, dumps({"sources": sources, "level": description, "sizes": sizes}))
+    limit_cache_dir("thumbnails", int(float(os.getenv("COPICK_MCP_THUMBNAIL_CACHE_MB", "256")) * 1024**2))
+    return {"level": description, "cached": False, "views": _describe_views(paths, sizes)}
+
+
+def _read_sidecar(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _describe_views(paths: Dict[str, Path], sizes: Dict[str, List[int]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        view: {"path": str(path), "width": sizes[view][0], "height": sizes[view][1]} for view, path in paths.items()
+    }
@@ -0,0 +1,340 @@
+"""Recording of tool call traces and their replay against a server.
+
+With tracing enabled, every tool call is appended to a JSONL trace: the tool name and arguments, when the call
+started relative to the start of the trace, its duration, the size of its result and whether it succeeded. Replaying
+a trace sends the same calls to a server, in the order and (optionally compressed) rhythm they were recorded, and
+reports latency distributions per tool, so the workload of real agent sessions can be rerun against new versions.
+Calls writing data or changing the state of the server are skipped unless explicitly included, and so are calls
+whose arguments were too large to be recorded verbatim.
+
+Environment variables:
+    COPICK_MCP_TRACE: Path of the trace file calls are appended to, or "1" for a new file per server process below
+        `<cache dir>/traces`.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import anyio
+import numpy as np
+from fastmcp.server.middleware import Middleware
+
+from copick_mcp.paths import get_cache_dir
+from copick_mcp.records import dumps, loads
+
+logger = logging.getLogger("copick-mcp")
+
+# Arguments holding the configuration file of a call, replaced when replaying against another project
+CONFIG_ARGUMENTS = ("config_path",)
+
+# Tools writing project data or changing the state of the server
+WRITE_TOOLS = frozenset(
+    {
+        "add_picks_bulk",
+        "cancel_job",
+        "execute_copick_command",
+        "refresh_portal_metadata",
+        "set_profiling",
+        "submit_job",
+    },
+)
+
+# Arguments making an otherwise read-only tool write, when set
+WRITE_ARGUMENTS = {
+    "get_cache_stats": ("clear_chunk_cache", "clear_result_cache"),
+    "get_pick_density": ("segmentation_name",),
+}
+
+# Argument values whose JSON encoding is longer than this are summarized in traces
+_MAX_ARGUMENT_BYTES = 4096
+_ARGUMENT_PREVIEW_LENGTH = 200
+
+
+def default_trace_path() -> Optional[Path]:
+    """Trace file configured with `COPICK_MCP_TRACE`, or None if tracing is disabled."""
+    value = os.getenv("COPICK_MCP_TRACE", "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on"):
+        started = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        return get_cache_dir("traces") / f"{started}-{os.getpid()}.jsonl"
+    return Path(value).expanduser()
+
+
+def is_write_call(call: Dict[str, Any]) -> bool:
+    """Whether a traced call writes data or changes the state of the server."""
+    tool = call.get("tool")
+    if tool in WRITE_TOOLS:
+        return True
+    arguments = call.get("arguments") or {}
+    return any(arguments.get(name) for name in WRITE_ARGUMENTS.get(tool, ()))
+
+
+def _trace_arguments(arguments: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Arguments of a call as recorded, with large values summarized, and the names of the summarized arguments."""
+    recorded: Dict[str, Any] = {}
+    truncated = []
+    for name, value in arguments.items():
+        encoded = dumps(value)
+        if len(encoded) <= _MAX_ARGUMENT_BYTES:
+            recorded[name] = value
+            continue
+        preview = encoded[:_ARGUMENT_PREVIEW_LENGTH].decode("utf-8", errors="replace")
+        recorded[name] = f"{preview}... ({len(encoded)} bytes)"
+        truncated.append(name)
+    return recorded, truncated
+
+
+def _result_size(result: Any) -> int:
+    """Number of characters of the text content of a tool result."""
+    return sum(len(getattr(block, "text", "") or "") for block in getattr(result, "content", None) or [])
+
+
+def _result_success(result: Any) -> Optional[bool]:
+    """Success flag of a tool result following the `{"success": ...}` convention, if any."""
+    structured = getattr(result, "structured_content", None)
+    if isinstance(structured, dict) and isinstance(structured.get("success"), bool):
+        return structured["success"]
+    return None
+
+
+class TraceRecorder:
+    """Append tool calls to a JSONL trace file.
+
+    Attributes:
+        path: Path of the trace file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Kept open for the lifetime of the server, every entry is written with a single unbuffered write
+        self._file = open(self.path, "ab", buffering=0)  # noqa: SIM115
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        tool: str,
+        arguments: Dict[str, Any],
+        offset: float,
+        duration: float,
+        result_size: int,
+        success: Optional[bool],
+        error: Optional[str] = None,
+    ) -> None:
+        """Append one call to the trace, summarizing argument values too large to be recorded verbatim."""
+        recorded, truncated = _trace_arguments(arguments)
+        entry: Dict[str, Any] = {
+            "tool": tool,
+            "arguments": recorded,
+            "offset_s": round(offset, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "result_chars": result_size,
+            "success": success,
+        }
+        if truncated:
+            entry["truncated_arguments"] = truncated
+        if error is not None:
+            entry["error"] = error
+        line = dumps(entry) + b"\n"
+        with self._lock:
+            self._file.write(line)
+
+    def elapsed(self) -> float:
+        """Seconds since the trace was started."""
+        return time.monotonic() - self._start
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class TracingMiddleware(Middleware):
+    """FastMCP middleware recording every tool call to a trace."""
+
+    def __init__(self, recorder: TraceRecorder):
+        self.recorder = recorder
+
+    async def on_call_tool(self, context, call_next):
+        offset = self.recorder.elapsed()
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception as e:
+            self._record(context, offset, start, None, f"{type(e).__name__}: {e}")
+            raise
+        self._record(context, offset, start, result)
+        return result
+
+    def _record(self, context: Any, offset: float, start: float, result: Any, error: Optional[str] = None) -> None:
+        try:
+            self.recorder.record(
+                tool=context.message.name,
+                arguments=context.message.arguments or {},
+                offset=offset,
+                duration=time.perf_counter() - start,
+                result_size=_result_size(result) if result is not None else 0,
+                success=_result_success(result) if result is not None else False,
+                error=error,
+            )
+        except Exception as e:
+            # Tracing must never fail a tool call
+            logger.warning(f"Could not record tool call to trace {self.recorder.path}: {str(e)}")
+
+
+# ============================================================================
+# Replay
+# ============================================================================
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """Read the calls of a trace file, in the order they were started."""
+    calls = []
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                calls.append(loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: invalid trace entry: {e}") from e
+    calls.sort(key=lambda call: call.get("offset_s", 0.0))
+    return calls
+
+
+def latency_summary(durations_ms: Iterable[float]) -> Dict[str, Any]:
+    """Count, mean and percentiles of a set of latencies in milliseconds."""
+    values = np.asarray(list(durations_ms), dtype=float)
+    if values.size == 0:
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+async def replay_trace(
+    client: Any,
+    calls: List[Dict[str, Any]],
+    config_path: Optional[str] = None,
+    concurrency: int = 1,
+    speedup: float = 0.0,
+    include_writes: bool = False,
+) -> Dict[str, Any]:
+    """Replay the calls of a trace against a connected FastMCP client.
+
+    Calls are started in trace order. With a speed-up, each call waits until its recorded offset divided by the
+    speed-up has passed, otherwise calls are sent as fast as the concurrency limit allows. Calls writing data or
+    changing the state of the server (see `is_write_call`) are skipped unless `include_writes` is set, and calls
+    whose arguments were summarized when recording are always skipped.
+
+    Args:
+        client: A connected `fastmcp.Client`.
+        calls: Calls of the trace (see `load_trace`).
+        config_path: Configuration file replacing the one recorded in the calls' arguments (optional).
+        concurrency: Maximum number of calls in flight.
+        speedup: Factor the recorded pacing is compressed by, 0 to ignore the recorded pacing.
+        include_writes: Also replay calls writing data or changing the state of the server.
+
+    Returns:
+        Replay report with the latency distributions per tool, of the replay and of the recording.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if speedup < 0:
+        raise ValueError("speedup must not be negative")
+
+    replayable = [call for call in calls if not call.get("truncated_arguments")]
+    skipped_truncated = len(calls) - len(replayable)
+    calls = replayable if include_writes else [call for call in replayable if not is_write_call(call)]
+    skipped_writes = len(replayable) - len(calls)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+    limiter = anyio.CapacityLimiter(concurrency)
+
+    async def run(index: int, call: Dict[str, Any]) -> None:
+        arguments = dict(call.get("arguments") or {})
+        if config_path is not None:
+            for name in CONFIG_ARGUMENTS:
+                if name in arguments:
+                    arguments[name] = config_path
+
+        start = time.perf_counter()
+        error = None
+        try:
+            result = await client.call_tool(call["tool"], arguments, raise_on_error=False)
+            success = _result_success(result)
+            if result.is_error:
+                success = False
+                error = _result_text(result)
+            elif success is False:
+                error = (result.structured_content or {}).get("error")
+        except Exception as e:
+            success, error = False, f"{type(e).__name__}: {e}"
+        finally:
+            limiter.release_on_behalf_of(index)
+        results[index] = {
+            "tool": call["tool"],
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "success": success is not False,
+            "error": error,
+        }
+
+    start = time.monotonic()
+    async with anyio.create_task_group() as tg:
+        for index, call in enumerate(calls):
+            if speedup > 0:
+                delay = call.get("offset_s", 0.0) / speedup - (time.monotonic() - start)
+                if delay > 0:
+                    await anyio.sleep(delay)
+            # Calls are started in trace order, each one as soon as a slot is free
+            await limiter.acquire_on_behalf_of(index)
+            tg.start_soon(run, index, call)
+    wall_time = time.monotonic() - start
+
+    replayed = [result for result in results if result is not None]
+    tools = sorted({result["tool"] for result in replayed})
+    per_tool = {}
+    for tool in tools:
+        per_tool[tool] = {
+            "replay": latency_summary(r["duration_ms"] for r in replayed if r["tool"] == tool),
+            "recorded": latency_summary(c["duration_ms"] for c in calls if c["tool"] == tool and "duration_ms" in c),
+            "errors": sum(1 for r in replayed if r["tool"] == tool and not r["success"]),
+        }
+
+    errors = [
+        {"index": index, "tool": result["tool"], "error": result["error"]}
+        for index, result in enumerate(results)
+        if result is not None and not result["success"]
+    ]
+    return {
+        "calls": len(replayed),
+        "errors": len(errors),
+        "wall_time_s": round(wall_time, 3),
+        "throughput_per_s": round(len(replayed) / wall_time, 3) if wall_time > 0 else None,
+        "concurrency": concurrency,
+        "speedup": speedup,
+        "skipped_writes": skipped_writes,
+        "skipped_truncated": skipped_truncated,
+        "overall": {
+            "replay": latency_summary(r["duration_ms"] for r in replayed),
+            "recorded": latency_summary(c["duration_ms"] for c in calls if "duration_ms" in c),
+        },
+        "tools": per_tool,
+        "failed_calls": errors[:100],
+    }
+
+
+def _result_text(result: Any) -> str:
+    return " ".join(getattr(block, "text", "") or "" for block in getattr(result, "content", None) or [])
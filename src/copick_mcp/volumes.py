@@ -0,0 +1,147 @@
+"""Metadata of OME-Zarr volumes read from `.zattrs`/`.zarray` documents only, without opening the data arrays."""
+
+import concurrent.futures
+import json
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from copick_mcp.fingerprint import store_fingerprint
+
+# Volume descriptions: store path -> (fingerprint of all levels, include_bytes, description)
+_volume_cache: Dict[str, Tuple[str, bool, Dict[str, Any]]] = {}
+_volume_lock = threading.Lock()
+
+
+def _read_json(store: Any, key: str) -> Dict[str, Any]:
+    return json.loads(store[key])
+
+
+def _describe_compressor(compressor: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if compressor is None:
+        return None
+    return {key: value for key, value in compressor.items() if key in ("id", "cname", "clevel", "shuffle", "level")}
+
+
+def describe_store(store: Any, include_bytes: bool = True) -> Dict[str, Any]:
+    """Describe the pyramid levels of an OME-Zarr store.
+
+    Args:
+        store: The zarr store (e.g. the `FSStore` returned by `CopickTomogram.zarr()`).
+        include_bytes: Whether to compute the on-disk size of each level (requires listing the chunk files).
+
+    Returns:
+        Dictionary with the axes and per-level shape, dtype, chunks, compressor, scale and byte sizes, and (with
+        `include_bytes`) the time the byte sizes were measured.
+    """
+    attrs = _read_json(store, ".zattrs")
+    multiscales = attrs.get("multiscales", [{}])[0]
+
+    levels = []
+    for dataset in multiscales.get("datasets", []):
+        path = dataset["path"]
+        zarray = _read_json(store, f"{path}/.zarray")
+
+        shape = zarray["shape"]
+        chunks = zarray["chunks"]
+        dtype = np.dtype(zarray["dtype"])
+        scale = None
+        for transform in dataset.get("coordinateTransformations", []):
+            if transform.get("type") == "scale":
+                scale = transform.get("scale")
+
+        level = {
+            "path": path,
+            "shape": shape,
+            "dtype": dtype.name,
+            "chunks": chunks,
+            "compressor": _describe_compressor(zarray.get("compressor")),
+            "scale": scale,
+            "num_chunks": math.prod(math.ceil(s / c) for s, c in zip(shape, chunks)),
+            "uncompressed_bytes": math.prod(shape) * dtype.itemsize,
+        }
+        if include_bytes:
+            level["stored_bytes"] = int(store.fs.du(f"{store.path}/{path}"))
+        levels.append(level)
+
+    description = {"axes": [axis.get("name") for axis in multiscales.get("axes", [])], "levels": levels}
+    if include_bytes:
+        description["stored_bytes_measured_at"] = datetime.now().isoformat(timespec="seconds")
+    return description
+
+
+def _level_paths(store: Any) -> List[str]:
+    attrs = _read_json(store, ".zattrs")
+    return [dataset["path"] for dataset in attrs.get("multiscales", [{}])[0].get("datasets", [])]
+
+
+def _levels_fingerprint(store: Any, levels: List[str]) -> str:
+    return "\0".join(store_fingerprint(store, level) for level in levels)
+
+
+def _describe_cached(store: Any, include_bytes: bool) -> Dict[str, Any]:
+    """Describe a store, reusing the cached description while none of its levels changed.
+
+    Levels are compared with `fingerprint.store_fingerprint`, which covers the `.zattrs` document and the listing of
+    each level's directory. Chunk files rewritten in place deeper in a level are not noticed, so cached byte sizes
+    may be stale: they carry the time they were measured.
+    """
+    with _volume_lock:
+        cached = _volume_cache.get(store.path)
+    if cached is not None:
+        levels = [level["path"] for level in cached[2]["levels"]]
+        fingerprint = _levels_fingerprint(store, levels)
+        if cached[0] == fingerprint and (cached[1] or not include_bytes):
+            return cached[2]
+    # Fingerprint before describing, so that changes made while describing invalidate the description
+    fingerprint = _levels_fingerprint(store, _level_paths(store))
+
+    description = describe_store(store, include_bytes=include_bytes)
+    with _volume_lock:
+        _volume_cache[store.path] = (fingerprint, include_bytes, description)
+    return description
+
+
+def describe_tomograms(
+    run: Any,
+    voxel_spacing: Optional[float] = None,
+    tomo_type: Optional[str] = None,
+    include_bytes: bool = True,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Describe the tomograms of a run from their OME-Zarr metadata, in parallel across tomograms.
+
+    Descriptions are cached per store and reused while none of the store's levels changed (see `_describe_cached`).
+
+    Args:
+        run: The copick run.
+        voxel_spacing: Voxel spacing to filter by (optional).
+        tomo_type: Tomogram type to filter by (optional).
+        include_bytes: Whether to compute the on-disk size of each level.
+        max_workers: Maximum number of threads (default: executor default).
+
+    Returns:
+        List of tomogram descriptions.
+    """
+    tomograms = []
+    for vs in run.voxel_spacings:
+        if voxel_spacing is not None and vs.voxel_size != voxel_spacing:
+            continue
+        for tomo in vs.tomograms:
+            if tomo_type is None or tomo.tomo_type == tomo_type:
+                tomograms.append((vs.voxel_size, tomo))
+
+    def describe(item: Tuple[float, Any]) -> Dict[str, Any]:
+        voxel_size, tomo = item
+        entry = {"voxel_size": voxel_size, "tomo_type": tomo.tomo_type}
+        try:
+            entry.update(_describe_cached(tomo.zarr(), include_bytes))
+        except Exception as e:
+            entry["error"] = str(e)
+        return entry
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(describe, tomograms))
@@ -0,0 +1,146 @@
+import sys
+
+import pytest
+
+from copick_mcp import cli_execution
+from copick_mcp.cli_execution import (
+    CommandPlan,
+    _execute_shards,
+    _load_manifest,
+    _strip_option,
+    make_shards,
+    plan_command,
+)
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{}")
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        "--run-names TS-000 --run-names TS-001",
+        "-r TS-000 -r TS-001",
+        "-rTS-000 --run-names=TS-001",
+        "--run-names TS-000,TS-001",
+        # Hidden legacy alias of the run-selection option
+        "--runs TS-000,TS-001",
+    ],
+)
+def test_run_selection_is_stripped(config, selection):
+    plan = plan_command(f"copick stats picks --config {config} {selection} --user-id bob --output json")
+
+    assert plan.command == "stats.picks"
+    assert plan.args == ["stats", "picks", "--config", config, "--user-id", "bob", "--output", "json"]
+    assert plan.run_names == ["TS-000", "TS-001"]
+    assert plan.run_flag == "--run-names"
+    assert plan.repeatable
+    assert plan.config_path == config
+
+
+def test_all_runs(config):
+    plan = plan_command(f"copick stats picks --config={config}")
+
+    assert plan.args == ["stats", "picks", f"--config={config}"]
+    assert plan.run_names is None
+
+
+def test_shard_args(config):
+    plan = plan_command(f"copick stats picks -c {config} -r TS-000")
+    shards = make_shards(["TS-000", "TS-001", "TS-002"], 2)
+
+    assert shards == [["TS-000", "TS-001"], ["TS-002"]]
+    assert plan.shard_args(shards[0]) == [
+        "stats",
+        "picks",
+        "-c",
+        config,
+        "--run-names",
+        "TS-000",
+        "--run-names",
+        "TS-001",
+    ]
+    plan.repeatable = False
+    assert plan.shard_args(shards[0]) == ["stats", "picks", "-c", config, "--run-names", "TS-000,TS-001"]
+
+
+def test_strip_option_keeps_arguments_after_double_dash():
+    args = ["-r", "a", "--keep", "1", "--", "-r", "b", "--run-names=c"]
+
+    assert _strip_option(args, ["-r", "--run-names"]) == ["--keep", "1", "--", "-r", "b", "--run-names=c"]
+
+
+@pytest.mark.parametrize(
+    ("command", "message"),
+    [
+        ("python -m copick", "must start with 'copick'"),
+        ("copick stats", "Invalid command"),
+        ("copick stats picks --bogus", "Invalid command"),
+        ("copick info", "cannot be sharded by run"),
+    ],
+)
+def test_invalid_commands(command, message):
+    with pytest.raises(ValueError, match=message):
+        plan_command(command)
+
+
+# Shards sleeping for the number of seconds given as their run name
+SLEEP_PLAN = CommandPlan(
+    command="sleep",
+    args=["-c", "import sys, time; time.sleep(float(sys.argv[-1]))"],
+    run_flag="--run-names",
+    repeatable=True,
+    config_path=None,
+    run_names=None,
+)
+
+
+class InterruptAfter:
+    """Progress reporter raising KeyboardInterrupt once some shards finished."""
+
+    def __init__(self, shards):
+        self.shards = shards
+
+    def update(self, done, total, message):
+        if done >= self.shards:
+            raise KeyboardInterrupt
+
+
+def execute(directory, shards, progress=None, workers=2):
+    return _execute_shards(SLEEP_PLAN, shards, "test", directory, workers, False, None, 0, progress)
+
+
+@pytest.fixture
+def sleep_shards(monkeypatch):
+    monkeypatch.setattr(cli_execution, "_COPICK", [sys.executable])
+
+
+def test_interrupted_execution_records_all_shards(tmp_path, sleep_shards):
+    with pytest.raises(KeyboardInterrupt):
+        execute(tmp_path, [["0"], ["30"], ["30"]], progress=InterruptAfter(1), workers=1)
+
+    statuses = [(state["status"], state["attempts"]) for state in _load_manifest(tmp_path)["shards"]]
+    assert statuses[0] == ("succeeded", 1)
+    # The second shard may have started before the interruption, the last one cannot have
+    assert statuses[1] in (("cancelled", 1), ("pending", 0))
+    assert statuses[2] == ("pending", 0)
+
+
+def test_shard_raising_is_failed(tmp_path, sleep_shards, monkeypatch):
+    run_shard = cli_execution._run_shard
+
+    def failing_run_shard(argv, directory, index, stop, timeout=None):
+        if index == 1:
+            raise OSError("disk full")
+        return run_shard(argv, directory, index, stop, timeout)
+
+    monkeypatch.setattr(cli_execution, "_run_shard", failing_run_shard)
+    result = execute(tmp_path, [["0"], ["0"], ["0"]])
+
+    assert [shard["status"] for shard in result["shards"]] == ["succeeded", "failed", "succeeded"]
+    assert result["failed_runs"] == ["0"]
+    assert _load_manifest(tmp_path)["shards"][1]["error"] == "disk full"
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import zarr
+from scipy import ndimage
+
+from copick_mcp.instances import count_instances
+
+
+def reference_sizes(labels: np.ndarray) -> dict:
+    """Instance sizes per label value from labeling the whole volume at once."""
+    sizes = {}
+    for value in np.unique(labels).tolist():
+        if value == 0:
+            continue
+        components, count = ndimage.label(labels == value)
+        sizes[value] = np.sort(np.bincount(components.ravel(), minlength=count + 1)[1:])[::-1]
+    return sizes
+
+
+def chunked(labels: np.ndarray, chunks) -> zarr.Array:
+    array = zarr.zeros(labels.shape, chunks=chunks, dtype=labels.dtype)
+    array[:] = labels
+    return array
+
+
+def assert_same_sizes(result: dict, expected: dict) -> None:
+    assert sorted(result) == sorted(expected)
+    for value, sizes in expected.items():
+        np.testing.assert_array_equal(result[value], sizes)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("chunks", [(8, 9, 7), (5, 5, 5), (37, 41, 29)])
+def test_random_labels_match_scipy(seed, chunks):
+    # Dense random labels make many components crossing chunk faces, edges and corners
+    rng = np.random.default_rng(seed)
+    labels = rng.choice([0, 1, 2, 3], size=(37, 41, 29), p=[0.4, 0.3, 0.2, 0.1]).astype(np.uint8)
+
+    assert_same_sizes(count_instances(chunked(labels, chunks), max_workers=3), reference_sizes(labels))
+
+
+def test_component_crossing_a_chunk_corner():
+    labels = np.zeros((8, 8, 8), dtype=np.uint8)
+    # One component winding through six of the eight chunks meeting at the corner (4, 4, 4)
+    labels[2:6, 3, 3] = 1
+    labels[5, 3:6, 3] = 1
+    labels[5, 5, 3:6] = 1
+    labels[2:6, 5, 5] = 1
+    labels[2, 3:6, 5] = 1
+    # Voxels of another label touching across the corner only diagonally are separate instances
+    labels[3, 6, 6] = 2
+    labels[4, 7, 7] = 2
+    # Voxels of different labels sharing a face across a chunk face are not merged
+    labels[0, 0, 3] = 3
+    labels[0, 0, 4] = 4
+
+    result = count_instances(chunked(labels, (4, 4, 4)))
+
+    assert_same_sizes(result, reference_sizes(labels))
+    assert result[1].tolist() == [int((labels == 1).sum())]
+    assert result[2].tolist() == [1, 1]
+    assert result[3].tolist() == [1]
+    assert result[4].tolist() == [1]
+
+
+def test_worker_count_does_not_change_the_result():
+    rng = np.random.default_rng(3)
+    labels = (rng.random((20, 20, 20)) < 0.35).astype(np.uint16) * rng.integers(1, 3, size=(20, 20, 20))
+    array = chunked(labels.astype(np.uint16), (6, 7, 5))
+
+    single = count_instances(array, max_workers=1)
+    many = count_instances(array, max_workers=8)
+
+    assert_same_sizes(single, reference_sizes(labels))
+    assert_same_sizes(many, single)
+
+
+def test_progress_and_empty_volume():
+    calls = []
+    array = chunked(np.zeros((10, 10, 10), dtype=np.uint8), (5, 5, 5))
+    result = count_instances(array, progress=lambda *args: calls.append(args))
+
+    assert result == {}
+    assert calls[-1] == (8, 8)
+    assert [done for done, _ in calls] == list(range(1, 9))
@@ -0,0 +1,83 @@
+import pytest
+
+from copick_mcp.records import RecordTable, listing_etag, render_listing
+
+
+def runs_table(names, layout="records"):
+    table = RecordTable(["name", "tomograms"], optional=["tomograms"], key=["name"], layout=layout)
+    for name, tomograms in names:
+        table.append(name, tomograms)
+    return table
+
+
+SCOPE = {"tool": "list_runs", "config_path": "/data/config.json"}
+
+
+def test_etag_ignores_entry_order_and_layout():
+    first = render_listing({"runs": runs_table([("b", 1), ("a", None)])}, scope=SCOPE)
+    second = render_listing({"runs": runs_table([("a", None), ("b", 1)], layout="columns")}, "columns", scope=SCOPE)
+
+    assert first["etag"] == second["etag"]
+    assert first["runs"] == [{"name": "a"}, {"name": "b", "tomograms": 1}]
+    assert second["runs"] == {"name": ["a", "b"], "tomograms": [None, 1]}
+
+
+def test_etag_depends_on_entries_and_scope():
+    etag = listing_etag({"runs": runs_table([("a", 1)])}, SCOPE)
+
+    assert listing_etag({"runs": runs_table([("a", 2)])}, SCOPE) != etag
+    assert listing_etag({"runs": runs_table([("a", 1)])}, {**SCOPE, "config_path": "/other.json"}) != etag
+
+
+def test_if_none_match():
+    etag = render_listing({"runs": runs_table([("a", 1)])}, scope=SCOPE)["etag"]
+
+    assert render_listing({"runs": runs_table([("a", 1)])}, if_none_match=etag, scope=SCOPE) == {
+        "etag": etag,
+        "unchanged": True,
+    }
+    changed = render_listing({"runs": runs_table([("a", 1), ("b", 2)])}, if_none_match=etag, scope=SCOPE)
+    assert changed["etag"] != etag
+    assert len(changed["runs"]) == 2
+
+
+@pytest.mark.parametrize("layout", ["records", "columns"])
+def test_since_etag_returns_added_and_removed_entries(layout):
+    before = render_listing({"runs": runs_table([("a", 1), ("b", 2), ("c", 3)])}, layout, scope=SCOPE)
+    after = render_listing(
+        {"runs": runs_table([("a", 1), ("b", 5), ("d", None)])},
+        layout,
+        since_etag=before["etag"],
+        scope=SCOPE,
+    )
+
+    assert after["since_etag"] == before["etag"]
+    # A changed entry is removed with its old values and added with its new ones
+    expected = {
+        "added": [{"name": "b", "tomograms": 5}, {"name": "d"}],
+        "removed": [{"name": "b", "tomograms": 2}, {"name": "c", "tomograms": 3}],
+    }
+    if layout == "columns":
+        expected = {
+            "added": {"name": ["b", "d"], "tomograms": [5, None]},
+            "removed": {"name": ["b", "c"], "tomograms": [2, 3]},
+        }
+    assert after["runs"] == expected
+
+
+def test_since_etag_of_unchanged_listing_is_empty_diff():
+    etag = render_listing({"runs": runs_table([("a", 1)])}, scope=SCOPE)["etag"]
+    result = render_listing({"runs": runs_table([("a", 1)])}, since_etag=etag, scope=SCOPE)
+
+    assert result == {"etag": etag, "since_etag": etag, "runs": {"added": [], "removed": []}}
+
+
+def test_since_etag_falls_back_to_full_listing():
+    other_scope = render_listing({"runs": runs_table([("a", 1)])}, scope={**SCOPE, "config_path": "/other.json"})
+
+    for since_etag in ("unknown", other_scope["etag"]):
+        result = render_listing({"runs": runs_table([("a", 1), ("b", 2)])}, since_etag=since_etag, scope=SCOPE)
+
+        assert result["diff"] is False
+        assert "since_etag" not in result
+        assert result["runs"] == [{"name": "a", "tomograms": 1}, {"name": "b", "tomograms": 2}]
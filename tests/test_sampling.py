@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from copick_mcp.sampling import merge_samples, point_keys, sample_run_picks
+
+MISSING = SimpleNamespace(exists=lambda path: False)
+
+
+def make_pick(run_name, object_name, user_id, count):
+    points = [SimpleNamespace(score=1.0, instance_id=i) for i in range(count)]
+    positions = np.arange(count * 3, dtype=float).reshape(count, 3)
+    return SimpleNamespace(
+        fs=MISSING,
+        path=f"{run_name}/{object_name}/{user_id}",
+        pickable_object_name=object_name,
+        user_id=user_id,
+        session_id="0",
+        points=points,
+        numpy=lambda: (positions, None),
+    )
+
+
+def make_run(name, picks):
+    """A run with pick sets given as (object name, user ID, number of points)."""
+    pick_sets = [make_pick(name, *pick) for pick in picks]
+    return SimpleNamespace(name=name, get_picks=lambda object_name=None, user_id=None, session_id=None: pick_sets)
+
+
+RUNS = [
+    make_run("TS-000", [("ribosome", "alice", 5)]),
+    make_run("TS-001", [("ribosome", "alice", 50), ("ribosome", "bob", 20)]),
+    make_run("TS-002", [("ribosome", "bob", 180)]),
+]
+TOTAL = 255
+
+
+def sample(runs, size, seed, stratify_by=None):
+    return merge_samples((sample_run_picks(run, size, seed, stratify_by=stratify_by) for run in runs), size)
+
+
+def identities(entries):
+    return [(e["run_name"], e["user_id"], e["point_index"]) for e in entries]
+
+
+def test_merge_keeps_the_smallest_keys_overall():
+    result = sample(RUNS, 20, seed=7)
+
+    keys = np.concatenate(
+        [
+            point_keys(7, run.name, pick.pickable_object_name, pick.user_id, pick.session_id, len(pick.points))
+            for run in RUNS
+            for pick in run.get_picks()
+        ],
+    )
+    entries = result["samples"][""]
+    assert [e["key"] for e in entries] == np.sort(keys)[:20].tolist()
+    assert result["counts"] == {"": TOTAL}
+
+
+def test_merge_does_not_depend_on_run_order_or_grouping():
+    expected = identities(sample(RUNS, 20, seed=11)["samples"][""])
+
+    assert identities(sample(RUNS[::-1], 20, seed=11)["samples"][""]) == expected
+    # Merging partial merges, as parallel workers do
+    partial = [merge_samples([sample_run_picks(run, 20, 11)], 20) for run in RUNS]
+    assert identities(merge_samples(partial[::-1], 20)["samples"][""]) == expected
+    assert identities(sample(RUNS, 20, seed=12)["samples"][""]) != expected
+
+
+def test_sample_larger_than_population():
+    result = sample(RUNS, 1000, seed=0)
+
+    assert len(result["samples"][""]) == TOTAL
+    assert len(set(identities(result["samples"][""]))) == TOTAL
+
+
+def test_stratified_sample():
+    result = sample(RUNS, 10, seed=3, stratify_by="user_id")
+
+    assert result["counts"] == {"alice": 55, "bob": 200}
+    assert sorted(result["samples"]) == ["alice", "bob"]
+    for user_id, entries in result["samples"].items():
+        assert len(entries) == 10
+        assert {e["user_id"] for e in entries} == {user_id}
+
+
+def test_merged_sample_is_uniform():
+    size, seeds = 20, 1000
+    inclusions = {}
+    for seed in range(seeds):
+        for identity in identities(sample(RUNS, size, seed)["samples"][""]):
+            inclusions[identity] = inclusions.get(identity, 0) + 1
+
+    counts = np.zeros(TOTAL)
+    counts[: len(inclusions)] = list(inclusions.values())
+    expected = seeds * size / TOTAL
+
+    # Every point is equally likely to be sampled, whatever the size of its run and pick set
+    chi2 = float((((counts - expected) ** 2) / expected).sum())
+    assert chi2 < TOTAL - 1 + 5 * np.sqrt(2 * (TOTAL - 1))
+    per_run = {}
+    for (run_name, _, _), count in inclusions.items():
+        per_run[run_name] = per_run.get(run_name, 0) + count
+    for run, points in zip(RUNS, (5, 70, 180)):
+        assert per_run[run.name] / (seeds * size) == pytest.approx(points / TOTAL, abs=0.02)